@@ -29,6 +29,9 @@ from PySide6.QtGui import QColor, QFont, QPalette, QLinearGradient, QGradient, Q
 
 # Project imports
 from src.scripts.wallet_metrics_db import WalletMetricsDB
+from src.scripts.llm_metrics import llm_metrics
+from src.scripts.chart_render_service import chart_render_service
+from src.scripts.analysis_store import analysis_store
 from src.scripts.wallet_analyzer import WalletAnalyzer
 from src.scripts.token_list_tool import TokenAccountTracker
 from src.nice_funcs import token_price
@@ -879,6 +882,7 @@ class AgentWorker(QObject):
     console_message = Signal(str, str)  # message, message_type
     portfolio_update = Signal(list)  # token_data
     analysis_complete = Signal(str, str, str, str, str, str, str, str, str)  # timestamp, action, token, token_symbol, analysis, confidence, price, change_percent, token_mint
+    analysis_reasoning = Signal(str, str)  # token_mint, analysis (reasoning streamed after the decision)
     changes_detected = Signal(dict)  # changes dictionary from TokenAccountTracker
     order_executed = Signal(str, str, str, float, float, bool, float, object, str, str, str)  # agent_name, action, token, amount, entry_price, is_paper_trade, exit_price, pnl, wallet_address, mint_address, ai_analysis
     
@@ -1130,6 +1134,17 @@ class AgentWorker(QObject):
                         lambda changes: self.changes_detected.emit(changes)
                     )
                 
+                # Connect analysis signals so CopyBot decisions (and their streamed reasoning) reach the Tracker tab
+                if hasattr(self.agent, 'analysis_complete'):
+                    self.agent.analysis_complete.connect(
+                        lambda timestamp, action, token, token_symbol, analysis, confidence, price, change_percent, token_mint: 
+                        self.analysis_complete.emit(timestamp, action, token, token_symbol, analysis, confidence, price, change_percent, token_mint)
+                    )
+                if hasattr(self.agent, 'analysis_reasoning'):
+                    self.agent.analysis_reasoning.connect(
+                        lambda token_mint, analysis: self.analysis_reasoning.emit(token_mint, analysis)
+                    )
+                
                 # Update status to running
                 status_data = {
                     "status": "Running",
@@ -2177,6 +2192,7 @@ class AgentWorker(QObject):
     console_message = Signal(str, str)  # message, message_type
     portfolio_update = Signal(list)  # token_data
     analysis_complete = Signal(str, str, str, str, str, str, str, str, str)  # timestamp, action, token, token_symbol, analysis, confidence, price, change_percent, token_mint
+    analysis_reasoning = Signal(str, str)  # token_mint, analysis (reasoning streamed after the decision)
     changes_detected = Signal(dict)  # changes dictionary from TokenAccountTracker
     order_executed = Signal(str, str, str, float, float, bool, float, object, str, str, str)  # agent_name, action, token, amount, entry_price, is_paper_trade, exit_price, pnl, wallet_address, mint_address, ai_analysis
     
@@ -2428,6 +2444,17 @@ class AgentWorker(QObject):
                         lambda changes: self.changes_detected.emit(changes)
                     )
                 
+                # Connect analysis signals so CopyBot decisions (and their streamed reasoning) reach the Tracker tab
+                if hasattr(self.agent, 'analysis_complete'):
+                    self.agent.analysis_complete.connect(
+                        lambda timestamp, action, token, token_symbol, analysis, confidence, price, change_percent, token_mint: 
+                        self.analysis_complete.emit(timestamp, action, token, token_symbol, analysis, confidence, price, change_percent, token_mint)
+                    )
+                if hasattr(self.agent, 'analysis_reasoning'):
+                    self.agent.analysis_reasoning.connect(
+                        lambda token_mint, analysis: self.analysis_reasoning.emit(token_mint, analysis)
+                    )
+                
                 # Update status to running
                 status_data = {
                     "status": "Running",
@@ -3196,8 +3223,9 @@ class MainWindow(QMainWindow):
                 # Get fresh data from blockchain
                 self.console.append_message("📊 Fetching fresh financial data...", "info")
                 
-                # Get wallet balance
-                wallet_balance = self.risk_agent.get_portfolio_value()
+                # Get wallet balance (one valuation shared with the cash reserve below)
+                snapshot = self.risk_agent.take_snapshot()
+                wallet_balance = snapshot.total_value
                 
                 # Calculate PnL
                 pnl = wallet_balance - self.risk_agent.start_balance
@@ -3208,7 +3236,10 @@ class MainWindow(QMainWindow):
                     from src import nice_funcs as n
                     
                     # Get USDC balance for cash reserve calculation
-                    usdc_value = n.get_token_balance_usd(config.USDC_ADDRESS)
+                    if config.USDC_ADDRESS in snapshot.monitored_tokens:
+                        usdc_value = snapshot.balances.get(config.USDC_ADDRESS, 0.0)
+                    else:
+                        usdc_value = n.get_token_balance_usd(config.USDC_ADDRESS)
                     
                     # Calculate cash reserve percentage
                     cash_reserve_pct = (usdc_value / wallet_balance * 100) if wallet_balance > 0 else 0
@@ -3389,6 +3420,7 @@ class MainWindow(QMainWindow):
         worker.console_message.connect(lambda msg, msg_type: self.console.append_message(msg, msg_type))
         worker.portfolio_update.connect(self.portfolio_viz.set_portfolio_data)
         worker.analysis_complete.connect(self.tracker_tab.add_ai_analysis)
+        worker.analysis_reasoning.connect(self.tracker_tab.update_ai_analysis_reasoning)
         worker.changes_detected.connect(self.tracker_tab.process_token_changes)
         worker.order_executed.connect(self.handle_agent_order)
         
@@ -8941,6 +8973,27 @@ class TrackerTab(QWidget):
         # Scroll to the top to see the newest event (instead of bottom)
         self.analysis_table.scrollToTop()
     
+    def update_ai_analysis_reasoning(self, token_mint, analysis):
+        """Fill in reasoning that streamed in after the newest analysis row for a token was added"""
+        for row in range(self.analysis_table.rowCount()):
+            mint_item = self.analysis_table.item(row, 4)
+            if mint_item and mint_item.text() == str(token_mint):
+                self.analysis_table.setItem(row, 5, QTableWidgetItem(str(analysis or "")))
+                break
+        else:
+            return
+            
+        try:
+            if os.path.isfile(self.analysis_file_path):
+                analysis_df = pd.read_csv(self.analysis_file_path)
+                matches = analysis_df.index[analysis_df['token_mint'].astype(str) == str(token_mint)]
+                if len(matches):
+                    # Rows are stored newest first
+                    analysis_df.loc[matches[0], 'analysis'] = analysis
+                    analysis_df.to_csv(self.analysis_file_path, index=False)
+        except Exception as e:
+            print(f"Error updating AI analysis reasoning: {e}")
+    
     def save_ai_analysis(self, timestamp, action, token, token_symbol, analysis, confidence, price, change_percent=None, token_mint=None, token_name=None):
         """Save an AI analysis event to CSV file"""
         try:
@@ -9164,8 +9217,12 @@ class TrackerTab(QWidget):
                 )
 
 class ChartsTab(QWidget):
+    # Emitted from the render service's callback thread when a requested PNG is ready
+    chart_ready = Signal(str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.chart_ready.connect(lambda _path: self.refresh_charts())
         self.setup_ui()
         
         # Set up timer for auto-refresh
@@ -9226,6 +9283,11 @@ class ChartsTab(QWidget):
         # Initial load
         self.refresh_charts()
         
+    def showEvent(self, event):
+        """Charts are only rendered while the tab is on screen"""
+        super().showEvent(event)
+        self.refresh_charts()
+        
     def refresh_charts(self):
         """Refresh all charts and analysis data"""
         # Clear existing charts
@@ -9237,20 +9299,9 @@ class ChartsTab(QWidget):
                 # Handle spacers or other layout items
                 self.charts_layout.removeItem(item)
             
-        # Get all CSV files
-        charts_dir = Path("src/data/charts")
-        csv_files = list(charts_dir.glob("chart_analysis_*.csv"))
-        
-        for csv_file in csv_files:
+        # Latest analysis per symbol from the analysis store
+        for symbol, latest in analysis_store.latest_all().items():
             try:
-                # Read analysis data
-                df = pd.read_csv(csv_file)
-                if df.empty:
-                    continue
-                    
-                # Get latest analysis
-                latest = df.iloc[-1]
-                symbol = latest['symbol']
                 
                 # Create frame for this symbol
                 frame = NeonFrame(color=CyberpunkColors.PRIMARY)
@@ -9261,20 +9312,26 @@ class ChartsTab(QWidget):
                 header.setStyleSheet(f"color: {CyberpunkColors.TEXT_WHITE}; font-size: 16px; font-weight: bold;")
                 frame_layout.addWidget(header)
                 
-                # Find matching chart image
-                chart_files = list(charts_dir.glob(f"{symbol}_*.png"))
-                if chart_files:
-                    latest_chart = max(chart_files, key=lambda x: x.stat().st_mtime)
-                    
+                # Chart image is rendered on demand from the persisted series (cached by data hash)
+                latest_chart = None
+                if self.isVisible():
+                    latest_chart = chart_render_service.request_chart(
+                        symbol, latest['timeframe'], on_ready=lambda path: self.chart_ready.emit(str(path))
+                    )
+                if latest_chart:
                     # Display chart
                     chart_label = QLabel()
                     pixmap = QPixmap(str(latest_chart))
                     scaled_pixmap = pixmap.scaled(800, 400, Qt.AspectRatioMode.KeepAspectRatio)
                     chart_label.setPixmap(scaled_pixmap)
                     frame_layout.addWidget(chart_label)
+                elif self.isVisible() and chart_render_service.load_meta(symbol, latest['timeframe']):
+                    rendering_label = QLabel("Rendering chart...")
+                    rendering_label.setStyleSheet(f"color: {CyberpunkColors.TEXT_LIGHT}; font-size: 14px;")
+                    frame_layout.addWidget(rendering_label)
                 
                 # Extract Fibonacci level from reasoning if present
-                reasoning_text = latest.get('reasoning', '')
+                reasoning_text = latest.get('reasoning') or ''
                 fib_level = None
                 
                 # Search for Fibonacci information in the reasoning text
@@ -9324,7 +9381,7 @@ class ChartsTab(QWidget):
                 ]
                 
                 # Add entry price label for BUY/SELL signals
-                if latest['signal'].upper() != "NOTHING" and latest['entry_price'] > 0:
+                if str(latest['signal']).upper() != "NOTHING" and (latest['entry_price'] or 0) > 0:
                     entry_price_label = QLabel(f"Entry Price: ${latest['entry_price']:.6f}")
                     labels_to_display.append(entry_price_label)
                 
@@ -9340,7 +9397,7 @@ class ChartsTab(QWidget):
                 self.charts_layout.addWidget(frame)
                 
             except Exception as e:
-                print(f"Error loading chart data for {csv_file}: {str(e)}")
+                print(f"Error loading chart data for {symbol}: {str(e)}")
                 
         # Add stretch to bottom
         self.charts_layout.addStretch()
@@ -10174,6 +10231,7 @@ class MetricsTab(QWidget):
         self.analyzer = WalletAnalyzer()
         self.setup_ui()
         self.load_wallets()
+        self.refresh_llm_metrics()
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -10203,6 +10261,7 @@ class MetricsTab(QWidget):
         # Refresh button
         refresh_btn = NeonButton("Refresh Data", CyberpunkColors.PRIMARY)
         refresh_btn.clicked.connect(self.refresh_metrics)
+        refresh_btn.clicked.connect(self.refresh_llm_metrics)
         wallet_layout.addWidget(refresh_btn)
         
         content_layout.addWidget(wallet_group)
@@ -10281,6 +10340,25 @@ class MetricsTab(QWidget):
         
         content_layout.addWidget(position_group)
         
+        # LLM Call Metrics (last 24h, per agent and model)
+        llm_group = QGroupBox("LLM Call Metrics (24h)")
+        llm_layout = QVBoxLayout(llm_group)
+        llm_group.setStyleSheet("background-color: #000000; color: #E0E0E0;")  # Set group box background to black
+        
+        self.llm_table = QTableWidget()
+        self.llm_table.setColumnCount(12)
+        self.llm_table.setHorizontalHeaderLabels([
+            "Agent", "Model", "Calls", "Errors", "Retries", "Parse Fails", "Fallbacks",
+            "p50 (s)", "p95 (s)", "Prompt Tok", "Completion Tok", "Latency Histogram"
+        ])
+        self.llm_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.llm_table.horizontalHeader().setStretchLastSection(True)
+        self.llm_table.setMinimumHeight(150)
+        self.llm_table.setStyleSheet("background-color: #000000; color: #E0E0E0;")  # Set table background to black
+        
+        llm_layout.addWidget(self.llm_table)
+        content_layout.addWidget(llm_group)
+        
         # Add the content to the scroll area
         scroll.setWidget(content)
         layout.addWidget(scroll)
@@ -10330,6 +10408,26 @@ class MetricsTab(QWidget):
             
         # TODO: Update timing and position charts when implemented
 
+    def refresh_llm_metrics(self):
+        """Refresh the per-agent LLM latency, token and error table"""
+        try:
+            rows = llm_metrics.summary(since_hours=24)
+        except Exception as e:
+            print(f"Error loading LLM metrics: {str(e)}")
+            return
+            
+        self.llm_table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            histogram = " ".join(f"{label}:{count}" for label, count in row['histogram'].items() if count)
+            values = [
+                row['agent'], row['model'], str(row['calls']), str(row['errors']), str(row['retries']),
+                str(row['parse_failures']), str(row['fallbacks']),
+                f"{row['p50_latency']:.2f}", f"{row['p95_latency']:.2f}",
+                str(row['prompt_tokens']), str(row['completion_tokens']), histogram or "--"
+            ]
+            for col, value in enumerate(values):
+                self.llm_table.setItem(i, col, QTableWidgetItem(str(value)))
+
 def main():
     app = QApplication(sys.argv)
     
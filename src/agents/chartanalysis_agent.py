@@ -8,31 +8,42 @@ Chuck the Chart Agent generates and analyzes trading charts using AI vision capa
 import os
 import pandas as pd
 import numpy as np
-import mplfinance as mpf
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta, time
 from pathlib import Path
 import time
 from dotenv import load_dotenv
-import anthropic
-import openai
 from src import nice_funcs as n
 from src import nice_funcs_hl as hl
 from src.agents.base_agent import BaseAgent
 from src.config import (
     TOKEN_MAP, DCA_MONITORED_TOKENS, TIMEFRAMES, LOOKBACK_BARS, CHART_ANALYSIS_INTERVAL_MINUTES,
     CHART_INDICATORS, CHART_STYLE, CHART_VOLUME_PANEL, CHART_MODEL_OVERRIDE,
-    CHART_DEEPSEEK_BASE_URL, CHART_ANALYSIS_PROMPT, VOICE_MODEL, VOICE_NAME, VOICE_SPEED,
+    CHART_DEEPSEEK_BASE_URL, CHART_ANALYSIS_PROMPT, CHART_BATCH_ANALYSIS_PROMPT, VOICE_MODEL, VOICE_NAME, VOICE_SPEED,
     AI_MODEL, AI_TEMPERATURE, AI_MAX_TOKENS,
     ENABLE_FIBONACCI, FIBONACCI_LEVELS, FIBONACCI_LOOKBACK_PERIODS,
     CHART_RUN_AT_ENABLED, CHART_RUN_AT_TIME, CHART_INTERVAL_UNIT, CHART_INTERVAL_VALUE
 )
 import traceback
+import threading
 import base64
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from io import BytesIO
 import re
 from colorama import init, Fore, Back, Style 
 from src.scripts.ohlcv_collector import collect_token_data
+from src.scripts.chart_render_service import chart_render_service
+from src.scripts.indicator_engine import IndicatorEngine, EMA, SMA, MACD, RSI, ATR
+from src.scripts.llm_response_cache import llm_response_cache
+from src.scripts.llm_metrics import llm_metrics
+from src.scripts.recommendation_accuracy import recommendation_accuracy
+from src.scripts.swing_levels import fibonacci_levels
+from src.scripts.analysis_store import analysis_store
+from src.scripts.prompt_features import FEATURE_LEGEND, encode_market_data, log_prompt_size
+from src.scripts.batch_analysis import BATCH_SYSTEM_PROMPT, build_batch_prompt, chunked, parse_batch_response
+from src.models.model_factory import model_factory
+from src.models.model_router import model_router
+from src.models.streaming import DecisionStreamParser
 from src.scripts.logger import debug, info, warning, error, critical, system
 init()
 
@@ -79,32 +90,23 @@ class ChartAnalysisAgent(BaseAgent):
         self.charts_dir = PROJECT_ROOT / "src" / "data" / "charts"
         self.charts_dir.mkdir(parents=True, exist_ok=True)
         
+        # Rolling indicator state per (symbol, timeframe)
+        self.indicator_engine = IndicatorEngine([
+            EMA('20EMA', 20), EMA('50EMA', 50), EMA('100EMA', 100), SMA('200SMA', 200),
+            MACD('MACD', 'MACD_Signal'),
+            RSI('RSI', 14),
+            ATR('ATR', 14),
+        ], time_column='timestamp')
+        
         # Load environment variables
         load_dotenv()
         
-        # Initialize API clients
-        openai_key = os.getenv("OPENAI_KEY")
-        anthropic_key = os.getenv("ANTHROPIC_KEY")
-        deepseek_key = os.getenv("DEEPSEEK_KEY")
-        
-        if not openai_key or not anthropic_key:
-            raise ValueError("API keys not found in environment variables!")
-            
-        # Initialize OpenAI client (for TTS and possibly for analysis)
-        self.openai_client = openai.OpenAI(api_key=openai_key)
-        
-        # Initialize Anthropic client
-        self.client = anthropic.Anthropic(api_key=anthropic_key)
-        
-        # Initialize DeepSeek client if key exists
-        if deepseek_key:
-            self.deepseek_client = openai.OpenAI(
-                api_key=deepseek_key,
-                base_url=CHART_DEEPSEEK_BASE_URL
-            )
+        # AI models come from the shared, lazily-initialized model factory
+        self.model_factory = model_factory
+        self.deepseek_available = bool(os.getenv("DEEPSEEK_KEY"))
+        if self.deepseek_available:
             info("DeepSeek model available")
         else:
-            self.deepseek_client = None
             warning("No DeepSeek API key found. DeepSeek models will not be available")
         
         # Set AI parameters - use config values
@@ -112,6 +114,11 @@ class ChartAnalysisAgent(BaseAgent):
         self.ai_temperature = config.AI_TEMPERATURE
         self.ai_max_tokens = config.AI_MAX_TOKENS
         
+        # Only the selected model's provider needs a key (local models need none)
+        selected_model = self._selected_model()
+        if not self.model_factory.is_model_available(self.model_factory.model_type_for(selected_model)):
+            raise ValueError(f"No API key found in environment variables for {selected_model}!")
+        
         info("Chart Analysis Agent initialized")
         
         # Log which model we'll use (override or default)
@@ -123,35 +130,9 @@ class ChartAnalysisAgent(BaseAgent):
         info(f"Analyzing {len(TIMEFRAMES)} timeframes: {', '.join(TIMEFRAMES)}")
         info(f"Using indicators: {', '.join(CHART_INDICATORS)}")
         
-    def _calculate_indicators(self, data):
-        """Calculate all required indicators"""
-        # Moving Averages
-        data['20EMA'] = data['close'].ewm(span=20, adjust=False).mean()
-        data['50EMA'] = data['close'].ewm(span=50, adjust=False).mean()
-        data['100EMA'] = data['close'].ewm(span=100, adjust=False).mean()
-        data['200SMA'] = data['close'].rolling(window=200).mean()
-        
-        # MACD
-        exp1 = data['close'].ewm(span=12, adjust=False).mean()
-        exp2 = data['close'].ewm(span=26, adjust=False).mean()
-        data['MACD'] = exp1 - exp2
-        data['MACD_Signal'] = data['MACD'].ewm(span=9, adjust=False).mean()
-        
-        # RSI
-        delta = data['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        data['RSI'] = 100 - (100 / (1 + rs))
-        
-        # ATR
-        high_low = data['high'] - data['low']
-        high_close = np.abs(data['high'] - data['close'].shift())
-        low_close = np.abs(data['low'] - data['close'].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        data['ATR'] = true_range.rolling(window=14).mean()
-        
-        return data
+    def _calculate_indicators(self, data, key=None):
+        """Calculate all required indicators (incrementally when keyed by (symbol, timeframe))"""
+        return self.indicator_engine.apply(data, key=key)
     
     def _detect_market_regime(self, data):
         """Detect market regime (trending, sideways, stable)"""
@@ -183,93 +164,23 @@ class ChartAnalysisAgent(BaseAgent):
         else:
             return "NEUTRAL"
     
-    def _generate_chart(self, symbol, timeframe, data):
-        """Generate a chart using mplfinance"""
+    def _fibonacci_for_chart(self, df):
+        """Fibonacci levels to draw, based on the trend of the last 20 candles"""
+        if not ENABLE_FIBONACCI:
+            return None
+        recent_data = df.iloc[-20:]
+        uptrend = recent_data['close'].iloc[-1] > recent_data['close'].iloc[0]
+        return self._calculate_fibonacci_levels(df, is_uptrend=uptrend)
+
+    def _save_chart_series(self, symbol, timeframe, data):
+        """Persist the series the ChartsTab renders on demand (no drawing during analysis)"""
         try:
-            # Prepare data
-            df = data.copy()
-            df.index = pd.to_datetime(df.index)
-            
-            # Check if data is valid
-            if df.empty:
+            if data is None or data.empty:
                 error("No data available for chart generation")
                 return None
-                
-            # Calculate indicators
-            df = self._calculate_indicators(df)
-            
-            # Create addplot for indicators
-            ap = []
-            colors = ['blue', 'orange', 'purple', 'green', 'red']
-            for i, indicator in enumerate(['20EMA', '50EMA', '100EMA', '200SMA']):
-                if indicator in CHART_INDICATORS and indicator in df.columns and not df[indicator].isna().all():
-                    ap.append(mpf.make_addplot(df[indicator], color=colors[i]))
-            
-            # MACD
-            if 'MACD' in CHART_INDICATORS and 'MACD' in df.columns:
-                ap.append(mpf.make_addplot(df['MACD'], panel=1, color='blue', secondary_y=False))
-                ap.append(mpf.make_addplot(df['MACD_Signal'], panel=1, color='orange', secondary_y=False))
-            
-            # RSI
-            if 'RSI' in CHART_INDICATORS and 'RSI' in df.columns:
-                ap.append(mpf.make_addplot(df['RSI'], panel=2, color='purple', ylim=(0, 100), secondary_y=False))
-            
-            # Add Fibonacci levels if enabled
-            if ENABLE_FIBONACCI:
-                # Detect if we're in an uptrend or downtrend based on last 20 candles
-                recent_data = df.iloc[-20:]
-                uptrend = recent_data['close'].iloc[-1] > recent_data['close'].iloc[0]
-                
-                # Calculate Fibonacci levels
-                fib_levels = self._calculate_fibonacci_levels(df, is_uptrend=uptrend)
-                
-                if fib_levels:
-                    # Create horizontal lines for Fibonacci levels
-                    for level, price in fib_levels.items():
-                        if level in [0.0, 1.0]:  # Skip the extremes (0% and 100%)
-                            continue
-                            
-                        # Create a DataFrame with the Fibonacci level price repeated
-                        fib_df = pd.DataFrame(
-                            index=df.index,
-                            data={'fib_{:.3f}'.format(level): [price] * len(df)}
-                        )
-                        
-                        # Determine color based on level
-                        if level == 0.5:
-                            fib_color = 'red'  # 50% is often most important
-                        elif level == 0.618:
-                            fib_color = 'goldenrod'  # Golden ratio
-                        else:
-                            fib_color = 'gray'
-                            
-                        # Add to plot with reduced opacity and dashed style
-                        ap.append(mpf.make_addplot(
-                            fib_df['fib_{:.3f}'.format(level)], 
-                            color=fib_color,
-                            linestyle='dashed',
-                            width=1,
-                            alpha=0.6
-                        ))
-            
-            # Save chart
-            filename = f"{symbol}_{timeframe}_{int(time.time())}.png"
-            chart_path = self.charts_dir / filename
-            
-            # Create the chart
-            mpf.plot(df,
-                    type='candle',
-                    style=CHART_STYLE,
-                    volume=CHART_VOLUME_PANEL,
-                    addplot=ap if ap else None,
-                    title=f"\n{symbol} {timeframe} Chart Analysis",
-                    savefig=chart_path)
-            
-            return chart_path
-            
+            return chart_render_service.save_series(symbol, timeframe, data, self._fibonacci_for_chart(data))
         except Exception as e:
-            error(f"Error generating chart: {str(e)}")
-            traceback.print_exc()
+            error(f"Error saving chart series: {str(e)}")
             return None
             
     def _calculate_fibonacci_levels(self, data, is_uptrend=True):
@@ -284,75 +195,9 @@ class ChartAnalysisAgent(BaseAgent):
             dict: Fibonacci levels with their corresponding prices
         """
         try:
-            # Use a subset of data for finding swing points
-            lookback = min(FIBONACCI_LOOKBACK_PERIODS, len(data) - 1)
-            subset = data.iloc[-lookback:]
-            
-            if is_uptrend:  # For uptrend, find highest high and lowest low after it
-                # Find the highest high in the lookback period
-                highest = subset['high'].max()
-                highest_idx = subset['high'].idxmax()
-                
-                # Find the lowest low after the highest high
-                if isinstance(highest_idx, (int, np.integer)):
-                    # If index is numeric position
-                    lows_after = subset.iloc[subset.index.get_loc(highest_idx):]['low']
-                else:
-                    # If index is datetime or other
-                    lows_after = subset.loc[highest_idx:]['low']
-                    
-                if len(lows_after) > 0:
-                    lowest = lows_after.min()
-                else:
-                    # Fallback: use recent low
-                    lowest = subset['low'].min()
-                    
-                # Price range
-                price_range = highest - lowest
-                
-                # Calculate Fibonacci levels (retracements from high to low)
-                levels = {}
-                for level in FIBONACCI_LEVELS:
-                    levels[level] = highest - (price_range * level)
-                
-                # Add 0% and 100% levels
-                levels[0.0] = highest
-                levels[1.0] = lowest
-                
-                return levels
-                
-            else:  # For downtrend, find lowest low and highest high after it
-                # Find the lowest low in the lookback period
-                lowest = subset['low'].min()
-                lowest_idx = subset['low'].idxmin()
-                
-                # Find the highest high after the lowest low
-                if isinstance(lowest_idx, (int, np.integer)):
-                    # If index is numeric position
-                    highs_after = subset.iloc[subset.index.get_loc(lowest_idx):]['high']
-                else:
-                    # If index is datetime or other
-                    highs_after = subset.loc[lowest_idx:]['high']
-                    
-                if len(highs_after) > 0:
-                    highest = highs_after.max()
-                else:
-                    # Fallback: use recent high
-                    highest = subset['high'].max()
-                    
-                # Price range
-                price_range = highest - lowest
-                
-                # Calculate Fibonacci levels (retracements from low to high)
-                levels = {}
-                for level in FIBONACCI_LEVELS:
-                    levels[level] = lowest + (price_range * level)
-                
-                # Add 0% and 100% levels
-                levels[0.0] = lowest
-                levels[1.0] = highest
-                
-                return levels
+            levels = fibonacci_levels(data['high'].to_numpy(), data['low'].to_numpy(),
+                                      FIBONACCI_LOOKBACK_PERIODS, FIBONACCI_LEVELS)
+            return levels.levels(is_uptrend) if levels else None
                 
         except Exception as e:
             error(f"Error calculating Fibonacci levels: {str(e)}")
@@ -372,8 +217,8 @@ class ChartAnalysisAgent(BaseAgent):
             has_rsi = 'RSI' in data.columns and not data['RSI'].isna().all()
             
             # Get recent price levels
-            recent_high = data['high'].iloc[-10:].max()
-            recent_low = data['low'].iloc[-10:].min()
+            recent_high = data['high'].to_numpy()[-10:].max()
+            recent_low = data['low'].to_numpy()[-10:].min()
             
             # Calculate Fibonacci levels if enabled
             fib_levels = None
@@ -632,104 +477,134 @@ class ChartAnalysisAgent(BaseAgent):
             error(f"Error calculating entry price: {str(e)}")
             return data['close'].iloc[-1]  # Return current price as fallback
 
-    def _analyze_chart(self, symbol, timeframe, data):
-        """Analyze chart data using specified AI model"""
+    def _build_chart_context(self, symbol, data):
+        """Build the prompt chart data block plus the values the analysis result needs"""
+        # Detect market regime
+        market_regime = self._detect_market_regime(data)
+        
+        # Get volume trend
+        volume_trend = 'Increasing' if data['volume'].iloc[-1] > data['volume'].mean() else 'Decreasing'
+        
+        # Get current price
+        current_price = data['close'].iloc[-1]
+        
+        # Encode candles and indicators as a compact feature vector instead of dumping rows
+        chart_data = (
+            f"{FEATURE_LEGEND}\n"
+            f"{encode_market_data(data, regime=market_regime)}\n"
+            f"Volume trend: {volume_trend}"
+        )
+        
+        # Add previous recommendation analysis
         try:
-            # Detect market regime
-            market_regime = self._detect_market_regime(data)
-            
-            # Get volume trend
-            volume_trend = 'Increasing' if data['volume'].iloc[-1] > data['volume'].mean() else 'Decreasing'
-            
-            # Get current price
-            current_price = data['close'].iloc[-1]
-            
-            # Format the chart data
-            chart_data = (
-                f"Recent price action (last 5 candles):\n{data.tail(5).to_string()}\n\n"
-                f"Technical Indicators:\n"
-                f"- 20EMA: {data['20EMA'].iloc[-1]:.2f}\n"
-                f"- 50EMA: {data['50EMA'].iloc[-1]:.2f}\n"
-                f"- 100EMA: {data['100EMA'].iloc[-1]:.2f}\n"
-                f"- 200SMA: {data['200SMA'].iloc[-1]:.2f}\n"
-                f"- MACD: {data['MACD'].iloc[-1]:.2f}\n"
-                f"- MACD Signal: {data['MACD_Signal'].iloc[-1]:.2f}\n"
-                f"- RSI: {data['RSI'].iloc[-1]:.2f}\n"
-                f"- ATR: {data['ATR'].iloc[-1]:.2f}\n"
-                f"Current price: {current_price:.2f}\n"
-                f"24h High: {data['high'].max():.2f}\n"
-                f"24h Low: {data['low'].min():.2f}\n"
-                f"Volume trend: {volume_trend}\n"
-                f"Market Regime: {market_regime}"
-            )
-            
-            # Add previous recommendation analysis
-            filepath = os.path.join('src/data/charts', f'chart_analysis_{symbol}.csv')
-            if os.path.exists(filepath):
-                try:
-                    prev_df = pd.read_csv(filepath)
-                    if not prev_df.empty:
-                        # Get last recommendation
-                        last_rec = prev_df.iloc[-1]
-                        last_rec_time = datetime.fromtimestamp(last_rec['timestamp'])
-                        time_diff = (datetime.now() - last_rec_time).total_seconds() / 3600  # in hours
-                        
-                        # Add to chart data
-                        chart_data += f"\n\nPrevious analysis ({time_diff:.1f} hours ago):\n"
-                        chart_data += f"Signal: {last_rec['signal']}, Confidence: {last_rec['confidence']}%\n"
-                        chart_data += f"Price then: {last_rec['price']:.4f}, Current: {current_price:.4f}, "
-                        chart_data += f"Change: {((current_price/last_rec['price'])-1)*100:.2f}%\n"
-                        chart_data += f"Previous entry price suggestion: {last_rec['entry_price']:.4f}\n"
-                        
-                        # Add performance of that recommendation
-                        if last_rec['signal'] == 'BUY':
-                            performance = ((current_price/last_rec['price'])-1)*100
-                            chart_data += f"Performance since recommendation: {performance:.2f}%\n"
-                        elif last_rec['signal'] == 'SELL':
-                            performance = ((last_rec['price']/current_price)-1)*100
-                            chart_data += f"Performance since recommendation: {performance:.2f}%\n"
-                        
-                        # Get recent history (last 3 signals that were different from each other)
-                        if len(prev_df) >= 3:
-                            unique_signals = []
-                            signal_history = []
-                            
-                            for idx in range(len(prev_df)-1, -1, -1):
-                                rec = prev_df.iloc[idx]
-                                if rec['signal'] not in unique_signals:
-                                    unique_signals.append(rec['signal'])
-                                    signal_history.append({
-                                        'timestamp': datetime.fromtimestamp(rec['timestamp']),
-                                        'signal': rec['signal'],
-                                        'price': rec['price'],
-                                        'confidence': rec['confidence']
-                                    })
-                                    
-                                if len(unique_signals) >= 3:
-                                    break
-                            
-                            if len(signal_history) > 1:
-                                chart_data += "\nRecent signal history:\n"
-                                for rec in signal_history:
-                                    time_ago = (datetime.now() - rec['timestamp']).total_seconds() / 3600
-                                    chart_data += f"- {time_ago:.1f}h ago: {rec['signal']} at ${rec['price']:.4f} (Confidence: {rec['confidence']}%)\n"
+            last_rec = analysis_store.latest(symbol)
+            if last_rec:
+                last_rec_time = datetime.fromtimestamp(last_rec['timestamp'])
+                time_diff = (datetime.now() - last_rec_time).total_seconds() / 3600  # in hours
                 
-                    # Calculate trend consistency - how many consistent recommendations in a row
-                    if len(prev_df) >= 2:
-                        last_signal = prev_df.iloc[-1]['signal']
-                        consistent_count = 1
-                        
-                        for idx in range(len(prev_df)-2, -1, -1):
-                            if prev_df.iloc[idx]['signal'] == last_signal:
-                                consistent_count += 1
-                            else:
-                                break
-                        
-                        if consistent_count > 1:
-                            chart_data += f"\nSignal consistency: {consistent_count} consecutive {last_signal} recommendations\n"
+                # Add to chart data
+                chart_data += f"\n\nPrevious analysis ({time_diff:.1f} hours ago):\n"
+                chart_data += f"Signal: {last_rec['signal']}, Confidence: {last_rec['confidence']}%\n"
+                chart_data += f"Price then: {last_rec['price']:.4f}, Current: {current_price:.4f}, "
+                chart_data += f"Change: {((current_price/last_rec['price'])-1)*100:.2f}%\n"
+                chart_data += f"Previous entry price suggestion: {last_rec['entry_price']:.4f}\n"
                 
-                except Exception as e:
-                    warning(f"Error loading previous recommendation data: {str(e)}")
+                # Add performance of that recommendation
+                if last_rec['signal'] == 'BUY':
+                    performance = ((current_price/last_rec['price'])-1)*100
+                    chart_data += f"Performance since recommendation: {performance:.2f}%\n"
+                elif last_rec['signal'] == 'SELL':
+                    performance = ((last_rec['price']/current_price)-1)*100
+                    chart_data += f"Performance since recommendation: {performance:.2f}%\n"
+                
+                # Get recent history (last 3 signals that were different from each other)
+                signal_history = analysis_store.latest_per_signal(symbol, limit=3)
+                if len(signal_history) > 1:
+                    chart_data += "\nRecent signal history:\n"
+                    for rec in signal_history:
+                        time_ago = (datetime.now() - datetime.fromtimestamp(rec['timestamp'])).total_seconds() / 3600
+                        chart_data += f"- {time_ago:.1f}h ago: {rec['signal']} at ${rec['price']:.4f} (Confidence: {rec['confidence']}%)\n"
+                
+                # Calculate trend consistency - how many consistent recommendations in a row
+                last_signal, consistent_count = analysis_store.signal_streak(symbol)
+                if consistent_count > 1:
+                    chart_data += f"\nSignal consistency: {consistent_count} consecutive {last_signal} recommendations\n"
+        
+        except Exception as e:
+            warning(f"Error loading previous recommendation data: {str(e)}")
+
+        return chart_data, market_regime, volume_trend, current_price
+
+    def _selected_model(self):
+        """Model used for chart analysis: CHART_MODEL_OVERRIDE when usable, else the global model"""
+        if (CHART_MODEL_OVERRIDE.startswith("deepseek") and self.deepseek_available) or \
+                CHART_MODEL_OVERRIDE.startswith(("gpt-", "local")):
+            return CHART_MODEL_OVERRIDE
+        return self.ai_model
+
+    def _get_ai_response(self, context, system_prompt=None, parser_factory=None):
+        """Send a prompt to the configured chart model (served from the response cache when fresh)"""
+        if system_prompt is None:
+            system_prompt = "You are Anarcho Capital's Chart Analysis Agent. Analyze chart data and recommend BUY, SELL, or NOTHING."
+        model_name = self._selected_model()
+
+        def call_model():
+            # Use the model specified in CHART_MODEL_OVERRIDE, or default to config settings
+            info(f"Using {model_name} model for analysis")
+            response = model_router.generate_response(
+                'chartanalysis',
+                model_name,
+                system_prompt,
+                context,
+                temperature=self.ai_temperature,
+                max_tokens=self.ai_max_tokens,
+                base_url=CHART_DEEPSEEK_BASE_URL if model_name.startswith("deepseek") else None,
+                parser_factory=parser_factory
+            )
+            
+            # Debug: Log raw response
+            debug("Raw response:", file_only=True)
+            debug(repr(response.content), file_only=True)
+            # The whole response, so a streamed decision is cached with its full text
+            return response
+
+        return llm_response_cache.get_or_call(
+            'chartanalysis', model_name, context, self.ai_temperature, call_model, system_prompt
+        )
+
+    def _build_analysis_result(self, data, action, analysis, confidence, ai_entry_price,
+                               market_regime, volume_trend, current_price):
+        """Assemble the analysis dict, falling back to a calculated entry price"""
+        # Calculate our own entry price as fallback or if AI didn't provide one
+        calculated_entry_price = self._calculate_entry_price(data, action, market_regime)
+        
+        # Use AI's entry price if provided and reasonable, otherwise use calculated one
+        entry_price = ai_entry_price if ai_entry_price and ai_entry_price > 0 else calculated_entry_price
+        
+        # Determine direction based on action
+        if action == 'BUY':
+            direction = 'BULLISH'
+        elif action == 'SELL':
+            direction = 'BEARISH'
+        else:
+            direction = 'SIDEWAYS'
+        
+        # Update the return dictionary to include price and entry price
+        return {
+            'direction': direction,
+            'analysis': analysis,
+            'action': action,
+            'confidence': confidence,
+            'market_regime': market_regime,
+            'volume_trend': volume_trend,
+            'price': current_price,  # Current price
+            'entry_price': entry_price  # Optimal entry price
+        }
+
+    def _analyze_chart(self, symbol, timeframe, data):
+        """Analyze chart data using specified AI model"""
+        try:
+            chart_data, market_regime, volume_trend, current_price = self._build_chart_context(symbol, data)
             
             # Prepare the context
             context = CHART_ANALYSIS_PROMPT.format(
@@ -739,51 +614,12 @@ class ChartAnalysisAgent(BaseAgent):
             )
             
             info(f"Analyzing {symbol} with AI")
+            log_prompt_size(f"{symbol} {timeframe}", context)
             
-            # Use the model specified in CHART_MODEL_OVERRIDE, or default to config settings
-            if CHART_MODEL_OVERRIDE.startswith("deepseek") and self.deepseek_client:
-                info(f"Using DeepSeek {CHART_MODEL_OVERRIDE} model for analysis")
-                response = self.deepseek_client.chat.completions.create(
-                    model=CHART_MODEL_OVERRIDE.replace("deepseek-", "deepseek-"),  # Ensure correct model name format
-                    messages=[
-                        {"role": "system", "content": "You are Anarcho Capital's Chart Analysis Agent. Analyze chart data and recommend BUY, SELL, or NOTHING."},
-                        {"role": "user", "content": context}
-                    ],
-                    max_tokens=self.ai_max_tokens,
-                    temperature=self.ai_temperature
-                )
-                content = response.choices[0].message.content
-                
-            elif CHART_MODEL_OVERRIDE.startswith("gpt-") and self.openai_client:
-                info(f"Using OpenAI {CHART_MODEL_OVERRIDE} model for analysis")
-                response = self.openai_client.chat.completions.create(
-                    model=CHART_MODEL_OVERRIDE,
-                    messages=[
-                        {"role": "system", "content": "You are Anarcho Capital's Chart Analysis Agent. Analyze chart data and recommend BUY, SELL, or NOTHING."},
-                        {"role": "user", "content": context}
-                    ],
-                    max_tokens=self.ai_max_tokens,
-                    temperature=self.ai_temperature
-                )
-                content = response.choices[0].message.content
-                
-            else:
-                # Use Claude as before (default)
-                info(f"Using Claude {self.ai_model} model for analysis")
-                message = self.client.messages.create(
-                    model=self.ai_model,
-                    max_tokens=self.ai_max_tokens,
-                    temperature=self.ai_temperature,
-                    messages=[{
-                        "role": "user",
-                        "content": context
-                    }]
-                )
-                content = str(message.content)
-                
-                # Debug: Log raw response
-                debug("Raw response:", file_only=True)
-                debug(repr(content), file_only=True)
+            # The 4-line answer is complete once the entry price line arrives
+            content = self._get_ai_response(
+                context, parser_factory=lambda: DecisionStreamParser(require_confidence=False, min_lines=4)
+            )
             
             # Clean up TextBlock formatting for Claude responses
             if isinstance(content, str) and 'TextBlock' in content:
@@ -801,12 +637,14 @@ class ChartAnalysisAgent(BaseAgent):
             
             if not lines:
                 error("Empty response from AI")
+                llm_metrics.record_parse_failure('chartanalysis', self._selected_model(), "Empty response")
                 return None
             
             # First line should be the action
             action = lines[0].strip().upper()
             if action not in ['BUY', 'SELL', 'NOTHING']:
                 warning(f"Invalid action: {action}")
+                llm_metrics.record_parse_failure('chartanalysis', self._selected_model(), f"Invalid action: {action[:80]}")
                 return None
             
             # Rest is analysis
@@ -834,54 +672,10 @@ class ChartAnalysisAgent(BaseAgent):
                 except Exception as e:
                     warning(f"Could not parse AI entry price: {str(e)}")
             
-            # Calculate our own entry price as fallback or if AI didn't provide one
-            calculated_entry_price = self._calculate_entry_price(data, action, market_regime)
-            
-            # Use AI's entry price if provided and reasonable, otherwise use calculated one
-            entry_price = ai_entry_price if ai_entry_price and ai_entry_price > 0 else calculated_entry_price
-            
-            # Determine direction based on action
-            if action == 'BUY':
-                direction = 'BULLISH'
-            elif action == 'SELL':
-                direction = 'BEARISH'
-            else:
-                direction = 'SIDEWAYS'
-            
-            # Update the return dictionary to include price and entry price
-            analysis_dict = {
-                'direction': direction,
-                'analysis': analysis,
-                'action': action,
-                'confidence': confidence,
-                'market_regime': market_regime,
-                'volume_trend': volume_trend,
-                'price': current_price,  # Current price
-                'entry_price': entry_price  # Optimal entry price
-            }
-            
-            # After analyzing with AI and before saving to CSV
-            if analysis and 'action' in analysis:
-                # Check if there are previous recommendations
-                prev_filepath = os.path.join('src/data/charts', f'chart_analysis_{symbol}.csv')
-                if os.path.exists(prev_filepath):
-                    prev_df = pd.read_csv(prev_filepath)
-                    if not prev_df.empty:
-                        last_rec = prev_df.iloc[-1]
-                        last_action = last_rec['signal']
-                        
-                        # Log if the recommendation changed
-                        if analysis['action'] != last_action:
-                            info(f"Signal changed from {last_action} to {analysis['action']} for {symbol}")
-                            
-                            # If the recommendation flipped, check if the previous one was profitable
-                            if last_rec['price'] > 0:
-                                if last_action == 'BUY':
-                                    profit_pct = ((current_price / last_rec['price']) - 1) * 100
-                                    info(f"Previous BUY signal profit: {profit_pct:.2f}%")
-                                elif last_action == 'SELL':
-                                    profit_pct = ((last_rec['price'] / current_price) - 1) * 100
-                                    info(f"Previous SELL signal profit: {profit_pct:.2f}%")
+            analysis_dict = self._build_analysis_result(
+                data, action, analysis, confidence, ai_entry_price,
+                market_regime, volume_trend, current_price
+            )
             
             return analysis_dict
             
@@ -927,21 +721,14 @@ class ChartAnalysisAgent(BaseAgent):
             error(f"Error formatting fallback data: {str(e)}")
             return None
 
-    def _save_analysis_to_csv(self, symbol, timeframe, analysis, address):
-        """Save analysis to CSV with consistent filenames"""
+    def _save_analysis(self, symbol, timeframe, analysis, address):
+        """Append an analysis to the analysis store"""
         try:
-            # Create data directory if it doesn't exist
-            os.makedirs('src/data/charts', exist_ok=True)
-            
-            # Use consistent filename instead of timestamp-based filename
-            filename = f'chart_analysis_{symbol}.csv'
-            filepath = os.path.join('src/data/charts', filename)
-            
             # Calculate historical accuracy
             accuracy_data = self._calculate_recommendation_accuracy(symbol)
             
-            # Create DataFrame and save - use the actual values from the analysis dict
-            df = pd.DataFrame([{
+            # Use the actual values from the analysis dict
+            record = {
                 'symbol': symbol,
                 'timeframe': timeframe,
                 'signal': analysis.get('action', 'NEUTRAL'),
@@ -955,189 +742,353 @@ class ChartAnalysisAgent(BaseAgent):
                 'volume_trend': analysis.get('volume_trend', 'Unknown'),
                 'historical_accuracy': accuracy_data['accuracy'] if accuracy_data else None,
                 'recommendation_performance': accuracy_data['recommendation_performance'] if accuracy_data else None
-            }])
+            }
             
-            debug(f"Analysis data for CSV: {df.to_dict('records')}", file_only=True)
+            debug(f"Analysis record: {record}", file_only=True)
             
-            # Check if file exists to append or create new
-            if os.path.exists(filepath):
-                try:
-                    # Read existing file
-                    existing_df = pd.read_csv(filepath)
-                    
-                    # Check if columns match - if not, update existing file structure
-                    if set(df.columns) != set(existing_df.columns):
-                        # Add missing columns to existing data with default values
-                        for col in df.columns:
-                            if col not in existing_df.columns:
-                                if col == 'market_regime':
-                                    existing_df[col] = 'NEUTRAL'
-                                elif col == 'direction':
-                                    existing_df[col] = 'SIDEWAYS'
-                                elif col == 'volume_trend':
-                                    existing_df[col] = 'Unknown'
-                                elif col == 'entry_price':
-                                    existing_df[col] = existing_df['price']  # Use price as fallback
-                                else:
-                                    existing_df[col] = ''
-                    
-                    # Save combined data
-                    updated_df = pd.concat([existing_df, df], ignore_index=True)
-                    updated_df.to_csv(filepath, index=False)
-                    debug(f"Updated existing analysis file with {len(updated_df)} records", file_only=True)
-                except Exception as e:
-                    # If error reading existing file, just overwrite with new data
-                    df.to_csv(filepath, index=False)
-                    warning(f"Error updating existing file, created new: {str(e)}")
-            else:
-                # File doesn't exist, create new
-                df.to_csv(filepath, index=False)
-                debug("Created new analysis file", file_only=True)
-                
-            info(f"Analysis saved to file: {symbol}_{timeframe}")
+            row_id = analysis_store.append(record)
+            recommendation_accuracy.record(symbol, record)
+            info(f"Analysis saved: {symbol}_{timeframe}")
             
-            return filepath
+            return row_id
         except Exception as e:
-            error(f"Error saving analysis to CSV: {str(e)}")
+            error(f"Error saving analysis: {str(e)}")
             return None
             
-    def analyze_symbol(self, token_info, timeframe):
-        """Analyze a single symbol on a specific timeframe"""
-        try:
-            symbol = token_info["symbol"]
-            hl_symbol = token_info["hl_symbol"]
-            address = token_info["address"]
+    def _prepare_symbol_data(self, symbol, hl_symbol, address, timeframe):
+        """Fetch candles (with fallback), add indicators and persist the chart series for one symbol"""
+        data = self._fetch_symbol_data(symbol, hl_symbol, address, timeframe)
+        if data is None:
+            return None
+        data = self._compute_symbol_indicators(symbol, timeframe, data)
+        self._save_chart_series(symbol, timeframe, data)
+        return data
+
+    def _fetch_symbol_data(self, symbol, hl_symbol, address, timeframe):
+        """Fetch candles for one symbol from Hyperliquid, falling back to the OHLCV collector"""
+        # Calculate historical accuracy
+        accuracy_data = self._calculate_recommendation_accuracy(symbol)
+        if accuracy_data:
+            info(f"Historical recommendation accuracy for {symbol}: {accuracy_data['accuracy']:.1f}% over {accuracy_data['total_evaluated']} signals")
+            info(f"Recommendation performance metric: {accuracy_data['recommendation_performance']:.2f}%")
+            info(f"Rolling accuracy (last {accuracy_data['rolling_window']}): {accuracy_data['rolling_accuracy']:.1f}%")
+            for group in ('by_regime', 'by_timeframe'):
+                for label, stats in accuracy_data[group].items():
+                    debug(f"{symbol} accuracy {group.replace('by_', '')} {label}: {stats['accuracy']:.1f}% over "
+                          f"{stats['total_evaluated']} signals (avg {stats['avg_profit_pct']:.2f}%)", file_only=True)
+        
+        # Get market data using Hyperliquid symbol; every timeframe is derived from one base fetch
+        data = hl.get_resampled_data(
+            symbol=hl_symbol,
+            timeframe=timeframe,
+            timeframes=TIMEFRAMES,
+            bars=LOOKBACK_BARS,
+            add_indicators=True
+        )
+        
+        # If Hyperliquid data is not available, use fallback
+        if data is None or data.empty:
+            warning(f"No Hyperliquid data available for {symbol} {timeframe}, trying fallback")
             
-            info(f"Analyzing {symbol} ({hl_symbol}) on {timeframe}")
+            # Use ohlcv_collector to get data
+            fallback_data = collect_token_data(address)
             
-            # Calculate historical accuracy
-            accuracy_data = self._calculate_recommendation_accuracy(symbol)
-            if accuracy_data:
-                info(f"Historical recommendation accuracy for {symbol}: {accuracy_data['accuracy']:.1f}% over {accuracy_data['total_evaluated']} signals")
-                info(f"Recommendation performance metric: {accuracy_data['recommendation_performance']:.2f}%")
+            if fallback_data is None or fallback_data.empty:
+                error(f"No data available from any source for {symbol} {timeframe}")
+                return None
             
-            # Get market data using Hyperliquid symbol
-            data = hl.get_data(
-                symbol=hl_symbol,
-                timeframe=timeframe,
-                bars=LOOKBACK_BARS,
-                add_indicators=True
-            )
+            # Format the fallback data to match Hyperliquid format
+            data = self._format_fallback_data(fallback_data, timeframe)
             
-            # If Hyperliquid data is not available, use fallback
             if data is None or data.empty:
-                warning(f"No Hyperliquid data available for {symbol} {timeframe}, trying fallback")
-                
-                # Use ohlcv_collector to get data
-                fallback_data = collect_token_data(address)
-                
-                if fallback_data is None or fallback_data.empty:
-                    error(f"No data available from any source for {symbol} {timeframe}")
-                    return
-                
-                # Format the fallback data to match Hyperliquid format
-                data = self._format_fallback_data(fallback_data, timeframe)
+                error(f"Failed to format fallback data for {symbol} {timeframe}")
+                return None
+            
+            info(f"Using fallback data for {symbol} {timeframe}")
+        
+        return data
+
+    def _compute_symbol_indicators(self, symbol, timeframe, data):
+        """Add the chart indicators to fetched candles and log the latest values"""
+        data = self._calculate_indicators(data, key=(symbol, timeframe))
+        
+        # Debug log the chart data
+        debug(f"Chart Data for {symbol} {timeframe} - Last 5 Candles", file_only=True)
+        
+        # Log last 5 candles with proper timestamp formatting
+        last_5 = data.tail(5)
+        last_5.index = pd.to_datetime(last_5.index)
+        for idx, row in last_5.iterrows():
+            time_str = idx.strftime('%Y-%m-%d %H:%M')  # Include date and time
+            debug(f"{time_str} | Open: {row['open']:.2f} | High: {row['high']:.2f} | Low: {row['low']:.2f} | Close: {row['close']:.2f} | Volume: {row['volume']:.0f}", file_only=True)
+        
+        debug("Technical Indicators:", file_only=True)
+        debug(f"20EMA: {data['20EMA'].iloc[-1]:.2f}", file_only=True)
+        debug(f"50EMA: {data['50EMA'].iloc[-1]:.2f}", file_only=True)
+        debug(f"100EMA: {data['100EMA'].iloc[-1]:.2f}", file_only=True)
+        debug(f"200SMA: {data['200SMA'].iloc[-1]:.2f}", file_only=True)
+        debug(f"MACD: {data['MACD'].iloc[-1]:.2f}", file_only=True)
+        debug(f"MACD Signal: {data['MACD_Signal'].iloc[-1]:.2f}", file_only=True)
+        debug(f"RSI: {data['RSI'].iloc[-1]:.2f}", file_only=True)
+        debug(f"ATR: {data['ATR'].iloc[-1]:.2f}", file_only=True)
+        debug(f"24h High: {data['high'].max():.2f}", file_only=True)
+        debug(f"24h Low: {data['low'].min():.2f}", file_only=True)
+        debug(f"Volume Trend: {'Increasing' if data['volume'].iloc[-1] > data['volume'].mean() else 'Decreasing'}", file_only=True)
+
+        return data
+
+    def _report_analysis(self, symbol, timeframe, analysis, address):
+        """Persist and log an analysis result"""
+        if analysis and all(k in analysis for k in ['direction', 'analysis', 'action', 'confidence', 'market_regime']):
+            # Previous recommendation, read before this one becomes the latest
+            last_rec = analysis_store.latest(symbol)
+            
+            # Append analysis to the analysis store
+            self._save_analysis(symbol, timeframe, analysis, address)
                 
-                if data is None or data.empty:
-                    error(f"Failed to format fallback data for {symbol} {timeframe}")
-                    return
+            # Print analysis summary
+            info(f"Analysis result for {symbol} {timeframe}:")
+            info(f"Market Regime: {analysis['market_regime']}")
+            info(f"Direction: {analysis['direction']}")
+            info(f"Action: {analysis['action']}")
+            info(f"Confidence: {analysis['confidence']}%")
+            info(f"Current Price: ${analysis['price']:.4f}")
+            info(f"Optimal Entry Price: ${analysis['entry_price']:.4f}")
+            info(f"Analysis: {analysis['analysis']}")
+            
+            # Check if there are previous recommendations
+            if last_rec:
+                last_action = last_rec['signal']
                 
-                info(f"Using fallback data for {symbol} {timeframe}")
-            
-            # Calculate additional indicators
-            data = self._calculate_indicators(data)
-            
-            # Generate and save chart first
-            info(f"Generating chart for {symbol} {timeframe}")
-            chart_path = self._generate_chart(symbol, timeframe, data)
-            if chart_path:
-                info(f"Chart saved to: {chart_path}")
-            
-            # Debug log the chart data
-            debug(f"Chart Data for {symbol} {timeframe} - Last 5 Candles", file_only=True)
+                # Log if the recommendation changed
+                if analysis['action'] != last_action:
+                    info(f"Signal changed from {last_action} to {analysis['action']} for {symbol}")
+                    
+                    # If the recommendation flipped, check if the previous one was profitable
+                    if last_rec['price'] and last_rec['price'] > 0:
+                        if last_action == 'BUY':
+                            profit_pct = ((analysis['price'] / last_rec['price']) - 1) * 100
+                            info(f"Previous BUY signal profit: {profit_pct:.2f}%")
+                        elif last_action == 'SELL':
+                            profit_pct = ((last_rec['price'] / analysis['price']) - 1) * 100
+                            info(f"Previous SELL signal profit: {profit_pct:.2f}%")
+        else:
+            warning(f"Invalid analysis result for {symbol}")
+
+    def analyze_symbol(self, token_info, timeframe):
+        """Analyze a single symbol on a specific timeframe"""
+        try:
+            symbol = token_info["symbol"]
+            hl_symbol = token_info["hl_symbol"]
+            address = token_info["address"]
             
-            # Log last 5 candles with proper timestamp formatting
-            last_5 = data.tail(5)
-            last_5.index = pd.to_datetime(last_5.index)
-            for idx, row in last_5.iterrows():
-                time_str = idx.strftime('%Y-%m-%d %H:%M')  # Include date and time
-                debug(f"{time_str} | Open: {row['open']:.2f} | High: {row['high']:.2f} | Low: {row['low']:.2f} | Close: {row['close']:.2f} | Volume: {row['volume']:.0f}", file_only=True)
+            info(f"Analyzing {symbol} ({hl_symbol}) on {timeframe}")
             
-            debug("Technical Indicators:", file_only=True)
-            debug(f"20EMA: {data['20EMA'].iloc[-1]:.2f}", file_only=True)
-            debug(f"50EMA: {data['50EMA'].iloc[-1]:.2f}", file_only=True)
-            debug(f"100EMA: {data['100EMA'].iloc[-1]:.2f}", file_only=True)
-            debug(f"200SMA: {data['200SMA'].iloc[-1]:.2f}", file_only=True)
-            debug(f"MACD: {data['MACD'].iloc[-1]:.2f}", file_only=True)
-            debug(f"MACD Signal: {data['MACD_Signal'].iloc[-1]:.2f}", file_only=True)
-            debug(f"RSI: {data['RSI'].iloc[-1]:.2f}", file_only=True)
-            debug(f"ATR: {data['ATR'].iloc[-1]:.2f}", file_only=True)
-            debug(f"24h High: {data['high'].max():.2f}", file_only=True)
-            debug(f"24h Low: {data['low'].min():.2f}", file_only=True)
-            debug(f"Volume Trend: {'Increasing' if data['volume'].iloc[-1] > data['volume'].mean() else 'Decreasing'}", file_only=True)
+            data = self._prepare_symbol_data(symbol, hl_symbol, address, timeframe)
+            if data is None:
+                return
                 
             # Analyze with AI
             info(f"Analyzing {symbol} {timeframe} with AI")
             analysis = self._analyze_chart(symbol, timeframe, data)
-            
-            if analysis and all(k in analysis for k in ['direction', 'analysis', 'action', 'confidence', 'market_regime']):
-                # Save analysis to CSV - this now captures all values correctly
-                self._save_analysis_to_csv(symbol, timeframe, analysis, address)
-                    
-                # Print analysis summary
-                info(f"Analysis result for {symbol} {timeframe}:")
-                info(f"Market Regime: {analysis['market_regime']}")
-                info(f"Direction: {analysis['direction']}")
-                info(f"Action: {analysis['action']}")
-                info(f"Confidence: {analysis['confidence']}%")
-                info(f"Current Price: ${analysis['price']:.4f}")
-                info(f"Optimal Entry Price: ${analysis['entry_price']:.4f}")
-                info(f"Analysis: {analysis['analysis']}")
-                
-                # Check if there are previous recommendations
-                prev_filepath = os.path.join('src/data/charts', f'chart_analysis_{symbol}.csv')
-                if os.path.exists(prev_filepath):
-                    prev_df = pd.read_csv(prev_filepath)
-                    if not prev_df.empty:
-                        last_rec = prev_df.iloc[-1]
-                        last_action = last_rec['signal']
-                        
-                        # Log if the recommendation changed
-                        if analysis['action'] != last_action:
-                            info(f"Signal changed from {last_action} to {analysis['action']} for {symbol}")
-                            
-                            # If the recommendation flipped, check if the previous one was profitable
-                            if last_rec['price'] > 0:
-                                if last_action == 'BUY':
-                                    profit_pct = ((analysis['price'] / last_rec['price']) - 1) * 100
-                                    info(f"Previous BUY signal profit: {profit_pct:.2f}%")
-                                elif last_action == 'SELL':
-                                    profit_pct = ((last_rec['price'] / analysis['price']) - 1) * 100
-                                    info(f"Previous SELL signal profit: {profit_pct:.2f}%")
-            else:
-                warning(f"Invalid analysis result for {symbol}")
+            self._report_analysis(symbol, timeframe, analysis, address)
             
         except Exception as e:
             error(f"Error analyzing {symbol} {timeframe}: {str(e)}")
             traceback.print_exc()
-            
-    def _cleanup_old_charts(self):
-        """Remove all existing charts from the charts directory"""
-        try:
-            for chart in self.charts_dir.glob("*.png"):
-                chart.unlink()
-            info("Cleaned up old charts")
-        except Exception as e:
-            error(f"Error cleaning up charts: {str(e)}")
+
+    def _prepare_analysis_item(self, token_info, timeframe, data):
+        """Build the prompt context for one fetched (token_info, timeframe) job"""
+        chart_data, market_regime, volume_trend, current_price = self._build_chart_context(token_info["symbol"], data)
+        return {
+            'token_info': token_info,
+            'timeframe': timeframe,
+            'data': data,
+            'chart_data': chart_data,
+            'market_regime': market_regime,
+            'volume_trend': volume_trend,
+            'current_price': current_price,
+        }
+
+    def analyze_symbols_batch(self, jobs):
+        """
+        Analyze several (token_info, timeframe) jobs with one LLM request, falling back
+        to the single-symbol prompt for any item the batched reply does not cover
+        """
+        prepared = {}
+        for token_info, timeframe in jobs:
+            symbol = token_info["symbol"]
+            try:
+                info(f"Analyzing {symbol} ({token_info['hl_symbol']}) on {timeframe}")
+                data = self._prepare_symbol_data(symbol, token_info["hl_symbol"], token_info["address"], timeframe)
+                if data is None:
+                    continue
+                prepared[f"{symbol}:{timeframe}"] = self._prepare_analysis_item(token_info, timeframe, data)
+            except Exception as e:
+                error(f"Error preparing {symbol} {timeframe}: {str(e)}")
+
+        for symbol, timeframe, analysis, address in self._analyze_prepared_batch(prepared):
+            self._report_analysis(symbol, timeframe, analysis, address)
+
+    def _analyze_prepared_batch(self, prepared):
+        """
+        Run the LLM stage for prepared items (keyed "SYMBOL:TIMEFRAME")
+
+        Returns:
+            list: (symbol, timeframe, analysis, address) for every item that was analyzed
+        """
+        if not prepared:
+            return []
+
+        results = {}
+        response = None
+        if len(prepared) > 1:
+            prompt = build_batch_prompt(
+                [(key, item['chart_data'].replace(FEATURE_LEGEND + "\n", "")) for key, item in prepared.items()],
+                f"{CHART_BATCH_ANALYSIS_PROMPT}\n{FEATURE_LEGEND}"
+            )
+            info(f"Analyzing {len(prepared)} charts with one batched AI request")
+            log_prompt_size(f"{len(prepared)} batched charts", prompt)
+            try:
+                response = self._get_ai_response(prompt, system_prompt=BATCH_SYSTEM_PROMPT)
+                debug(f"Batched chart analysis response:\n{response}", file_only=True)
+                results = parse_batch_response(response, list(prepared))
+            except Exception as e:
+                warning(f"Batched chart analysis failed, analyzing individually: {str(e)}")
+
+        analyses = []
+        for key, item in prepared.items():
+            token_info, timeframe = item['token_info'], item['timeframe']
+            symbol = token_info["symbol"]
+            try:
+                result = results.get(key)
+                if result is None:
+                    # Per-item fallback to the single-symbol prompt
+                    if response is not None:
+                        llm_metrics.record_parse_failure('chartanalysis', self._selected_model(), f"Batch item missing: {key}")
+                    analysis = self._analyze_chart(symbol, timeframe, item['data'])
+                else:
+                    analysis = self._build_analysis_result(
+                        item['data'], result['action'], result['reasoning'], result['confidence'],
+                        result['entry_price'], item['market_regime'], item['volume_trend'], item['current_price']
+                    )
+                analyses.append((symbol, timeframe, analysis, token_info["address"]))
+            except Exception as e:
+                error(f"Error analyzing {symbol} {timeframe}: {str(e)}")
+        return analyses
+
+    def run_pipeline(self, jobs):
+        """
+        Analyze (token_info, timeframe) jobs through bounded, overlapping stages:
+        data fetch (I/O threads) -> indicators and chart series -> LLM analysis ->
+        reporting (this thread, so analysis store appends stay serial per symbol)
+        """
+        batch_size = getattr(config, 'CHART_BATCH_ANALYSIS_SIZE', 5)
+        batching = getattr(config, 'CHART_BATCH_ANALYSIS', True) and batch_size > 1
+        timings = defaultdict(list)
+        timings_lock = threading.Lock()
+
+        def timed(stage, fn, *args):
+            start = time.time()
+            try:
+                return fn(*args)
+            finally:
+                with timings_lock:
+                    timings[stage].append(time.time() - start)
+
+        cycle_start = time.time()
+        pending = {}
+        ready = {}
+        with ThreadPoolExecutor(getattr(config, 'CHART_PIPELINE_FETCH_WORKERS', 4), thread_name_prefix="chart-fetch") as fetch_pool, \
+                ThreadPoolExecutor(getattr(config, 'CHART_PIPELINE_INDICATOR_WORKERS', 2), thread_name_prefix="chart-indicators") as indicator_pool, \
+                ThreadPoolExecutor(getattr(config, 'CHART_PIPELINE_LLM_WORKERS', 2), thread_name_prefix="chart-llm") as llm_pool:
+
+            for token_info, timeframe in jobs:
+                label = f"{token_info['symbol']} {timeframe}"
+                future = fetch_pool.submit(
+                    timed, 'fetch', self._fetch_symbol_data,
+                    token_info["symbol"], token_info["hl_symbol"], token_info["address"], timeframe
+                )
+                pending[future] = ('fetch', label, (token_info, timeframe))
+
+            def submit_batch(items):
+                future = llm_pool.submit(timed, 'llm', self._analyze_prepared_batch, dict(items))
+                pending[future] = ('llm', ", ".join(items), None)
+                items.clear()
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, label, payload = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error(f"Chart pipeline {stage} stage failed for {label}: {str(e)}")
+                        continue
+
+                    if stage == 'fetch':
+                        if result is None:
+                            continue
+                        token_info, timeframe = payload
+                        next_future = indicator_pool.submit(
+                            timed, 'indicators', self._compute_analysis_item, token_info, timeframe, result
+                        )
+                        pending[next_future] = ('indicators', label, None)
+
+                    elif stage == 'indicators':
+                        item = result
+                        symbol, timeframe = item['token_info']['symbol'], item['timeframe']
+                        if batching:
+                            ready[f"{symbol}:{timeframe}"] = item
+                            if len(ready) >= batch_size:
+                                submit_batch(ready)
+                        else:
+                            llm_future = llm_pool.submit(timed, 'llm', self._analyze_prepared_batch, {label: item})
+                            pending[llm_future] = ('llm', label, None)
+
+                    elif stage == 'llm':
+                        for symbol, timeframe, analysis, address in result:
+                            timed('report', self._report_analysis, symbol, timeframe, analysis, address)
+
+                # Flush a partial batch once no more items can arrive for it
+                if ready and not any(stage in ('fetch', 'indicators') for stage, _, _ in pending.values()):
+                    submit_batch(ready)
+
+        self._log_stage_timings(timings, time.time() - cycle_start, len(jobs))
+
+    def _compute_analysis_item(self, token_info, timeframe, data):
+        """Indicator stage: indicators, persisted chart series and prompt context for one job"""
+        data = self._compute_symbol_indicators(token_info["symbol"], timeframe, data)
+        self._save_chart_series(token_info["symbol"], timeframe, data)
+        return self._prepare_analysis_item(token_info, timeframe, data)
+
+    def _log_stage_timings(self, timings, wall_seconds, job_count):
+        """Report per-stage work time against the cycle's wall time"""
+        info(f"Chart pipeline: {job_count} jobs in {wall_seconds:.1f}s")
+        busy = 0.0
+        for stage in ('fetch', 'indicators', 'llm', 'report'):
+            durations = timings.get(stage)
+            if not durations:
+                continue
+            busy += sum(durations)
+            info(f"  {stage:<10} {len(durations):>3} runs | total {sum(durations):.1f}s | "
+                 f"avg {sum(durations) / len(durations):.2f}s | max {max(durations):.2f}s")
+        if wall_seconds > 0:
+            info(f"  Stage work {busy:.1f}s overlapped {busy / wall_seconds:.1f}x within the cycle")
 
     def run_monitoring_cycle(self):
         """Run one monitoring cycle"""
         try:
-            # Clean up old charts before starting new cycle
-            self._cleanup_old_charts()
-            
-            for token_info in self.dca_tokens:
-                for timeframe in TIMEFRAMES:
+            jobs = [(token_info, timeframe) for token_info in self.dca_tokens for timeframe in TIMEFRAMES]
+            batch_size = getattr(config, 'CHART_BATCH_ANALYSIS_SIZE', 5)
+            
+            if getattr(config, 'CHART_PIPELINE_ENABLED', True):
+                self.run_pipeline(jobs)
+            elif getattr(config, 'CHART_BATCH_ANALYSIS', True) and batch_size > 1:
+                for batch in chunked(jobs, batch_size):
+                    self.analyze_symbols_batch(batch)
+            else:
+                for token_info, timeframe in jobs:
                     self.analyze_symbol(token_info, timeframe)
                     time.sleep(2)  # Small delay between analyses
                     
@@ -1177,62 +1128,17 @@ class ChartAnalysisAgent(BaseAgent):
             time.sleep(CHART_ANALYSIS_INTERVAL_MINUTES * 60)
 
     def _calculate_recommendation_accuracy(self, symbol):
-        """Calculate the accuracy of historical recommendations"""
+        """Accuracy of historical recommendations overall, by market regime and by timeframe"""
         try:
-            filepath = os.path.join('src/data/charts', f'chart_analysis_{symbol}.csv')
-            if not os.path.exists(filepath):
-                return None
-            
-            df = pd.read_csv(filepath)
-            if len(df) < 3:  # Need at least a few recommendations to calculate accuracy
-                return None
-            
-            # Add a 'correct' column
-            df = df.sort_values('timestamp')
-            df['correct'] = False
-            df['profit_pct'] = 0.0
-            
-            # Loop through recommendations
-            for i in range(len(df) - 1):
-                current_rec = df.iloc[i]
-                next_price = df.iloc[i+1]['price']
-                
-                # Evaluate if recommendation was correct
-                if current_rec['signal'] == 'BUY':
-                    profit_pct = ((next_price / current_rec['price']) - 1) * 100
-                    df.at[df.index[i], 'profit_pct'] = profit_pct
-                    df.at[df.index[i], 'correct'] = profit_pct > 0
-                    
-                elif current_rec['signal'] == 'SELL':
-                    profit_pct = ((current_rec['price'] / next_price) - 1) * 100
-                    df.at[df.index[i], 'profit_pct'] = profit_pct
-                    df.at[df.index[i], 'correct'] = profit_pct > 0
-                    
-                elif current_rec['signal'] == 'NOTHING':
-                    # Nothing is correct if price stayed within ±3%
-                    price_change_pct = abs((next_price / current_rec['price'] - 1) * 100)
-                    df.at[df.index[i], 'correct'] = price_change_pct < 3
-                
-            # Calculate accuracy
-            accurate_recs = df['correct'].sum()
-            total_evaluated = df['correct'].count() - 1  # Last one can't be evaluated yet
-            
-            if total_evaluated > 0:
-                accuracy = (accurate_recs / total_evaluated) * 100
-                df['profit_pct'].mean()
-                
-                return {
-                    'accuracy': accuracy,
-                    'recommendation_performance': df['profit_pct'].mean(),
-                    'total_evaluated': total_evaluated
-                }
-            
-            return None
-            
+            return recommendation_accuracy.summary(symbol, lambda: self._load_recommendation_history(symbol))
         except Exception as e:
             error(f"Error calculating recommendation accuracy: {str(e)}")
             return None
 
+    def _load_recommendation_history(self, symbol):
+        """Saved recommendations for a symbol in time order"""
+        return analysis_store.history(symbol)
+
 if __name__ == "__main__":
     # Create and run the agent
     info("Chart Analysis Agent Starting Up")
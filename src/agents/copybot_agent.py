@@ -25,8 +25,6 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from src.scripts.token_list_tool import TokenAccountTracker
 
 # Rest of your imports
-import anthropic
-import openai
 from termcolor import colored, cprint
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
@@ -35,6 +33,15 @@ import re
 import src.config as config
 from src import nice_funcs as n
 from src.scripts.ohlcv_collector import collect_all_tokens, collect_token_data
+from src.scripts.market_data_cache import market_data_cache
+from src.scripts.jupiter_batch import execute_trade_batch
+from src.scripts.llm_response_cache import llm_response_cache
+from src.scripts.llm_metrics import llm_metrics
+from src.scripts.prompt_features import FEATURE_LEGEND, encode_market_data, log_prompt_size
+from src.scripts.batch_analysis import BATCH_SYSTEM_PROMPT, build_batch_prompt, chunked, parse_batch_response
+from src.models.model_factory import model_factory
+from src.models.model_router import model_router
+from src.models.streaming import DecisionStreamParser
 from concurrent.futures import ThreadPoolExecutor
 
 # Try importing PySide6 with fallback
@@ -86,6 +93,7 @@ class CopyBotAgent(QObject):
     
     # Update the signal to include change_percent and symbol
     analysis_complete = Signal(str, str, str, str, str, str, str, str, str)  # timestamp, action, token, token_symbol, analysis, confidence, price, change_percent, token_mint
+    analysis_reasoning = Signal(str, str)  # token_mint, analysis (streamed reasoning that arrived after the decision)
     changes_detected = Signal(dict)  # changes dictionary from TokenAccountTracker
     mirror_mode_active = Signal(bool)  # Signal to indicate mirror mode is active
     order_executed = Signal(str, str, str, float, float, float, object, str, str, str)  # agent_name, action, token, amount, entry_price, exit_price, pnl, wallet_address, mint_address, ai_analysis
@@ -98,36 +106,20 @@ class CopyBotAgent(QObject):
         # Track if this is the first run (to skip analysis and execution if configured)
         self.is_first_run = True
         
-        # Add market data cache to avoid collecting data more than once
-        self.market_data_cache = {}
+        # Shared TTL/LRU market data cache (same instance collect_token_data uses)
+        self.market_data_cache = market_data_cache
         
-        # Get API keys
-        self.anthropic_key = os.getenv("ANTHROPIC_KEY")
-        self.openai_key = os.getenv("OPENAI_KEY")
-        self.deepseek_key = os.getenv("DEEPSEEK_KEY")
+        # AI models come from the shared, lazily-initialized model factory
+        self.model_factory = model_factory
+        self.anthropic_available = model_factory.is_model_available("claude")
+        self.openai_available = model_factory.is_model_available("openai")
+        self.deepseek_available = model_factory.is_model_available("deepseek")
         
-        # Initialize Anthropic client if key exists
-        if self.anthropic_key:
-            self.anthropic_client = anthropic.Anthropic(api_key=self.anthropic_key)
-        else:
-            self.anthropic_client = None
+        if not self.anthropic_available:
             warning("No Anthropic API key found. Claude models will not be available.")
-        
-        # Initialize OpenAI client if key exists
-        if self.openai_key:
-            self.openai_client = openai.OpenAI(api_key=self.openai_key)
-        else:
-            self.openai_client = None
+        if not self.openai_available:
             warning("No OpenAI API key found. GPT models will not be available.")
-            
-        # Initialize DeepSeek client if key exists
-        if self.deepseek_key:
-            self.deepseek_client = openai.OpenAI(
-                api_key=self.deepseek_key,
-                base_url=DEEPSEEK_BASE_URL
-            )
-        else:
-            self.deepseek_client = None
+        if not self.deepseek_available:
             warning("No DeepSeek API key found. DeepSeek models will not be available.")
             
         # Check trading mode and leverage availability
@@ -158,9 +150,9 @@ class CopyBotAgent(QObject):
         
         # Check if necessary functions exist in nice_funcs
         self.ai_analysis_available = (
-            (self.anthropic_client and config.COPYBOT_MODEL_OVERRIDE == "deepseek-reasoner") or
-            (self.deepseek_client and config.COPYBOT_MODEL_OVERRIDE in ["deepseek-chat", "deepseek-reasoner"]) or
-            (self.openai_client and config.COPYBOT_MODEL_OVERRIDE.startswith("gpt-"))
+            (self.anthropic_available and config.COPYBOT_MODEL_OVERRIDE == "deepseek-reasoner") or
+            (self.deepseek_available and config.COPYBOT_MODEL_OVERRIDE in ["deepseek-chat", "deepseek-reasoner"]) or
+            (self.openai_available and config.COPYBOT_MODEL_OVERRIDE.startswith("gpt-"))
         )
         
         if not self.ai_analysis_available:
@@ -227,9 +219,9 @@ class CopyBotAgent(QObject):
         try:
             from src.config import ENABLE_AI_ANALYSIS
             self.ai_analysis_available = ENABLE_AI_ANALYSIS and (
-                (self.anthropic_client is not None) or 
-                (self.deepseek_client is not None) or 
-                (self.openai_client is not None)
+                self.anthropic_available or 
+                self.deepseek_available or 
+                self.openai_available
             )
             if not self.ai_analysis_available:
                 if not ENABLE_AI_ANALYSIS:
@@ -318,37 +310,17 @@ class CopyBotAgent(QObject):
                         
                     debug(f"Token mint: {token_mint}", file_only=True)
                     
-                    # Check if token data is already in the cache
                     usd_value = 0
                     name = 'Unknown'
                     
-                    if hasattr(self, 'market_data_cache') and token_mint in self.market_data_cache:
-                        # Use cached data
-                        token_data = self.market_data_cache[token_mint]
-                        debug(f"Using cached market data for {token_mint}", file_only=True)
-                        
-                        if token_data is not None and not token_data.empty:
-                            if 'price' in token_data.columns:
-                                usd_value = token_data['price'].iloc[-1] * float(token['amount'])
-                            if 'name' in token_data.columns:
-                                name = token_data['name'].iloc[-1]
-                    else:
-                        # Fetch token data only if not in cache
-                        debug(f"Fetching market data for {token_mint}", file_only=True)
-                        token_data = collect_token_data(token_mint)
-                        
-                        # Cache the data for future use
-                        if not hasattr(self, 'market_data_cache'):
-                            self.market_data_cache = {}
-                        
-                        if token_data is not None:
-                            self.market_data_cache[token_mint] = token_data
-                            
-                            if not token_data.empty:
-                                if 'price' in token_data.columns:
-                                    usd_value = token_data['price'].iloc[-1] * float(token['amount'])
-                                if 'name' in token_data.columns:
-                                    name = token_data['name'].iloc[-1]
+                    # collect_token_data serves from the shared cache while the entry is fresh
+                    token_data = collect_token_data(token_mint)
+                    
+                    if token_data is not None and not token_data.empty:
+                        if 'price' in token_data.columns:
+                            usd_value = token_data['price'].iloc[-1] * float(token['amount'])
+                        if 'name' in token_data.columns:
+                            name = token_data['name'].iloc[-1]
                     
                     portfolio_data.append({
                         'Mint Address': token_mint,
@@ -372,175 +344,274 @@ class CopyBotAgent(QObject):
             self.portfolio_df = pd.DataFrame(columns=['wallet', 'Mint Address', 'amount', 'decimals'])
             return False  # Return False if an error occurs
             
-    def get_ai_response(self, prompt):
-        """Get response from the selected AI model"""
+    def _selected_model(self):
+        """Model used for analysis: the agent override if set, else the global model"""
+        return config.COPYBOT_MODEL_OVERRIDE if config.COPYBOT_MODEL_OVERRIDE != "0" else self.ai_model
+
+    @staticmethod
+    def _is_valid_response(content):
+        """A usable reply starts with an action line or contains a batched JSON array"""
+        if not content or not content.strip():
+            return False
+        first_line = content.strip().split('\n')[0].strip().upper()
+        return first_line in ("BUY", "SELL", "NOTHING") or '[' in content
+
+    def get_ai_response(self, prompt, system_prompt=None, parser_factory=None, on_complete=None):
+        """
+        Get response from the selected AI model
+
+        With parser_factory (and streaming enabled) this returns as soon as the decision
+        is parsed; on_complete then receives the full text once the reasoning has streamed in.
+        """
         try:
             # Select the model based on settings hierarchy:
             # 1. Use agent-specific override if set
             # 2. Otherwise fall back to global AI model
-            selected_model = config.COPYBOT_MODEL_OVERRIDE if config.COPYBOT_MODEL_OVERRIDE != "0" else self.ai_model
+            selected_model = self._selected_model()
             
             info(f"Using AI model: {selected_model}")
             
-            # Use the appropriate client based on the selected model
-            if "deepseek" in selected_model.lower() and self.deepseek_client:
-                # Use DeepSeek client with the exact model specified
-                info(f"Using DeepSeek {selected_model} model for analysis...")
-                response = self.deepseek_client.chat.completions.create(
-                    model=selected_model,  # Use the exact selected model, not hardcoded
-                    messages=[
-                        {"role": "system", "content": "You are Anarcho Capital's CopyBot Agent. Analyze portfolio data and recommend BUY, SELL, or NOTHING."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=self.ai_max_tokens,
-                    temperature=self.ai_temperature
-                )
-                return response.choices[0].message.content
-                
-            elif selected_model.startswith("gpt-") and self.openai_client:
-                info(f"Using OpenAI {selected_model} model for analysis...")
-                response = self.openai_client.chat.completions.create(
-                    model=selected_model,
-                    messages=[
-                        {"role": "system", "content": "You are Anarcho Capital's CopyBot Agent. Analyze portfolio data and recommend BUY, SELL, or NOTHING."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=self.ai_max_tokens,
-                    temperature=self.ai_temperature
-                )
-                return response.choices[0].message.content
-                
-            elif self.anthropic_client:
-                # For Claude models
-                info(f"Using Claude {selected_model} model for analysis...")
-                message = self.anthropic_client.messages.create(
-                    model=selected_model,
-                    max_tokens=self.ai_max_tokens,
+            if system_prompt is None:
+                system_prompt = "You are Anarcho Capital's CopyBot Agent. Analyze portfolio data and recommend BUY, SELL, or NOTHING."
+
+            def call_model():
+                # Slow models are hedged with a fast fallback and bounded by the copybot deadline
+                info(f"Using {selected_model} model for analysis...")
+                response = model_router.generate_response(
+                    'copybot',
+                    selected_model,
+                    system_prompt,
+                    prompt,
                     temperature=self.ai_temperature,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
+                    max_tokens=self.ai_max_tokens,
+                    base_url=DEEPSEEK_BASE_URL if "deepseek" in selected_model.lower() else None,
+                    validate=self._is_valid_response,
+                    parser_factory=parser_factory,
+                    on_complete=on_complete
                 )
-                
-                # Handle Claude response format
-                response = message.content
-                if isinstance(response, list):
-                    response = '\n'.join([
-                        item.text if hasattr(item, 'text') else str(item)
-                        for item in response
-                    ])
+                # The whole response, so a streamed decision is cached with its reasoning
                 return response
-            else:
-                raise ValueError(f"No AI client available for model: {selected_model}. Please check your API keys.")
+
+            # Identical prompts within the TTL are served from the response cache
+            return llm_response_cache.get_or_call(
+                'copybot', selected_model, prompt, self.ai_temperature, call_model, system_prompt
+            )
                 
         except Exception as e:
             warning(f"Error getting AI response: {str(e)}")
+            llm_metrics.record_fallback('copybot', self._selected_model(), str(e))
             return "NOTHING\nError: Could not get AI analysis. No action recommended."
             
-    def analyze_position(self, token, token_status=None, wallet_action=None, pct_change=None):
-        """Analyze a single portfolio position with wallet action context"""
-
-        try:
-            if token in config.EXCLUDED_TOKENS:
-                warning(f"Skipping analysis for excluded token: {token}")
-                return None
+    def _build_position_context(self, token, token_status=None, pct_change=None):
+        """Gather position data, market data and wallet action context for one token"""
+        if token in config.EXCLUDED_TOKENS:
+            warning(f"Skipping analysis for excluded token: {token}")
+            return None
 
-            # Check if token exists in portfolio_df
-            position_data = self.portfolio_df[self.portfolio_df['Mint Address'] == token]
-            
-            # Special handling for removed tokens that might not be in portfolio_df anymore
-            if position_data.empty and token_status == "removed":
-                warning(f"Token {token} was removed and is not in current portfolio - creating synthetic data for analysis")
-                # Create synthetic position data for analysis
-                position_data = pd.DataFrame([{
-                    'Mint Address': token,
-                    'Amount': 0,  # Amount is zero since it was removed
-                    'USD Value': 0,  # USD value is zero
-                    'name': f"Removed Token ({token[:6]}...)",  # Use shortened token mint as name
-                }])
-            elif position_data.empty:
-                warning(f"No portfolio data for token: {token}")
-                return None
-                
-            info(f"\nAnalyzing position for {position_data['name'].values[0]}...")
-            debug(f"Current Amount: {position_data['Amount'].values[0]}", file_only=True)
-            debug(f"USD Value: ${position_data['USD Value'].values[0]:.2f}", file_only=True)
+        # Check if token exists in portfolio_df
+        position_data = self.portfolio_df[self.portfolio_df['Mint Address'] == token]
+        
+        # Special handling for removed tokens that might not be in portfolio_df anymore
+        if position_data.empty and token_status == "removed":
+            warning(f"Token {token} was removed and is not in current portfolio - creating synthetic data for analysis")
+            # Create synthetic position data for analysis
+            position_data = pd.DataFrame([{
+                'Mint Address': token,
+                'Amount': 0,  # Amount is zero since it was removed
+                'USD Value': 0,  # USD value is zero
+                'name': f"Removed Token ({token[:6]}...)",  # Use shortened token mint as name
+            }])
+        elif position_data.empty:
+            warning(f"No portfolio data for token: {token}")
+            return None
             
-            # Add wallet action context if available
-            if token_status:
-                debug(f"Token Status: {token_status}, Percentage Change: {pct_change}", file_only=True)
+        info(f"\nAnalyzing position for {position_data['name'].values[0]}...")
+        debug(f"Current Amount: {position_data['Amount'].values[0]}", file_only=True)
+        debug(f"USD Value: ${position_data['USD Value'].values[0]:.2f}", file_only=True)
+        
+        # Add wallet action context if available
+        if token_status:
+            debug(f"Token Status: {token_status}, Percentage Change: {pct_change}", file_only=True)
 
-            # Get token market data - USE CACHE
-            debug(f"Getting market data for token: {token}", file_only=True)
-            token_market_data = None
-            
-            # Check cache first - this is the important part!
-            if token in self.market_data_cache:
-                debug(f"Using cached market data for {token}", file_only=True)
-                token_market_data = self.market_data_cache[token]
-            else:
-                # Only collect if not in cache
-                debug(f"Collecting market data for {token}", file_only=True)
-                token_market_data = collect_token_data(token)
-                
-                # Cache the data for future reference
-                if token_market_data is not None:
-                    self.market_data_cache[token] = token_market_data
-            
-            # If no data available (either from cache or collection)
-            if token_market_data is None or (isinstance(token_market_data, pd.DataFrame) and token_market_data.empty):
-                warning("No market data found")
-                token_market_data = "No market data available"
+        # Get token market data (served from the shared cache while fresh)
+        debug(f"Getting market data for token: {token}", file_only=True)
+        token_market_data = collect_token_data(token)
+        
+        # If no data available (either from cache or collection)
+        if token_market_data is None or (isinstance(token_market_data, pd.DataFrame) and token_market_data.empty):
+            warning("No market data found")
+            token_market_data = "No market data available"
 
-            # Prepare wallet action context for the AI prompt
-            wallet_context = ""
-            action_weight = 0
+        # Prepare wallet action context for the AI prompt
+        wallet_context = ""
+        action_weight = 0
+        
+        if token_status == "new":
+            wallet_context = "IMPORTANT: The tracked wallet has just BOUGHT this token. This is a STRONG BUY signal."
+            action_weight = config.COPYBOT_WALLET_ACTION_WEIGHT  # Weight toward BUY
+        elif token_status == "removed":
+            wallet_context = "IMPORTANT: The tracked wallet has SOLD ALL holdings of this token. This is a STRONG SELL signal."
+            action_weight = -config.COPYBOT_WALLET_ACTION_WEIGHT  # Weight toward SELL
+        elif token_status == "modified" and pct_change is not None:
+            # Positive pct_change means the wallet INCREASED holdings (BUY signal)
+            # Negative pct_change means the wallet DECREASED holdings (SELL signal)
+            debug(f"Processing modified token with pct_change = {pct_change}", file_only=True)
             
-            if token_status == "new":
-                wallet_context = "IMPORTANT: The tracked wallet has just BOUGHT this token. This is a STRONG BUY signal."
-                action_weight = config.COPYBOT_WALLET_ACTION_WEIGHT  # Weight toward BUY
-            elif token_status == "removed":
-                wallet_context = "IMPORTANT: The tracked wallet has SOLD ALL holdings of this token. This is a STRONG SELL signal."
-                action_weight = -config.COPYBOT_WALLET_ACTION_WEIGHT  # Weight toward SELL
-            elif token_status == "modified" and pct_change is not None:
-                # Fix the logic - ensure pct_change is treated correctly
-                # Positive pct_change means the wallet INCREASED holdings (BUY signal)
-                # Negative pct_change means the wallet DECREASED holdings (SELL signal)
-                
-                # Add debug logging to verify the value
-                debug(f"Processing modified token with pct_change = {pct_change}", file_only=True)
-                
-                # Use absolute value check first to determine magnitude
-                abs_pct_change = abs(pct_change)
-                
-                # Check if token amount actually increased or decreased based on pct_change sign
-                if pct_change > 0:
-                    # Wallet INCREASED position - BUY signal
-                    if abs_pct_change > 20:
-                        wallet_context = f"IMPORTANT: The tracked wallet has SIGNIFICANTLY INCREASED holdings of this token by {abs_pct_change:.2f}%. This is a STRONG BUY signal."
-                        action_weight = config.COPYBOT_WALLET_ACTION_WEIGHT * 0.9  # 90% weight toward BUY
-                    else:
-                        wallet_context = f"IMPORTANT: The tracked wallet has slightly increased holdings of this token by {abs_pct_change:.2f}%. This suggests a BUY signal."
-                        action_weight = config.COPYBOT_WALLET_ACTION_WEIGHT * 0.5  # 50% weight toward BUY
+            # Use absolute value check first to determine magnitude
+            abs_pct_change = abs(pct_change)
+            
+            # Check if token amount actually increased or decreased based on pct_change sign
+            if pct_change > 0:
+                # Wallet INCREASED position - BUY signal
+                if abs_pct_change > 20:
+                    wallet_context = f"IMPORTANT: The tracked wallet has SIGNIFICANTLY INCREASED holdings of this token by {abs_pct_change:.2f}%. This is a STRONG BUY signal."
+                    action_weight = config.COPYBOT_WALLET_ACTION_WEIGHT * 0.9  # 90% weight toward BUY
+                else:
+                    wallet_context = f"IMPORTANT: The tracked wallet has slightly increased holdings of this token by {abs_pct_change:.2f}%. This suggests a BUY signal."
+                    action_weight = config.COPYBOT_WALLET_ACTION_WEIGHT * 0.5  # 50% weight toward BUY
+            else:
+                # Wallet DECREASED position - SELL signal
+                if abs_pct_change > 20:
+                    wallet_context = f"IMPORTANT: The tracked wallet has SIGNIFICANTLY DECREASED holdings of this token by {abs_pct_change:.2f}%. This is a STRONG SELL signal."
+                    action_weight = -config.COPYBOT_WALLET_ACTION_WEIGHT * 0.9  # 90% weight toward SELL
                 else:
-                    # Wallet DECREASED position - SELL signal
-                    if abs_pct_change > 20:
-                        wallet_context = f"IMPORTANT: The tracked wallet has SIGNIFICANTLY DECREASED holdings of this token by {abs_pct_change:.2f}%. This is a STRONG SELL signal."
-                        action_weight = -config.COPYBOT_WALLET_ACTION_WEIGHT * 0.9  # 90% weight toward SELL
+                    wallet_context = f"IMPORTANT: The tracked wallet has slightly decreased holdings of this token by {abs_pct_change:.2f}%. This suggests a SELL signal."
+                    action_weight = -config.COPYBOT_WALLET_ACTION_WEIGHT * 0.5  # 50% weight toward SELL
+
+        return {
+            'token': token,
+            'token_status': token_status,
+            'pct_change': pct_change,
+            'position_data': position_data,
+            'market_data': token_market_data,
+            'wallet_context': wallet_context,
+            'action_weight': action_weight,
+        }
+
+    def _parse_confidence(self, lines):
+        """Extract a 0-100 confidence value from free-text response lines"""
+        confidence = 0
+        for line in lines:
+            if 'confidence' in line.lower():
+                try:
+                    # Look for patterns like "confidence: 65%" or "65% confidence"
+                    match = re.search(r'confidence:?\s*(\d{1,3})\s*%|(\d{1,3})\s*%\s*confidence', line.lower())
+                    if match:
+                        # Use the first non-None group
+                        confidence_str = match.group(1) if match.group(1) else match.group(2)
+                        confidence = int(confidence_str)
+                        # Validate the range
+                        if confidence < 0 or confidence > 100:
+                            warning(f"Invalid confidence value: {confidence}. Setting to default 50%.")
+                            confidence = 50
+                        break
                     else:
-                        wallet_context = f"IMPORTANT: The tracked wallet has slightly decreased holdings of this token by {abs_pct_change:.2f}%. This suggests a SELL signal."
-                        action_weight = -config.COPYBOT_WALLET_ACTION_WEIGHT * 0.5  # 50% weight toward SELL
+                        # Fallback to traditional method but with validation
+                        digits = ''.join(filter(str.isdigit, line))
+                        if digits:
+                            # Check if the number is reasonable (between 0-100)
+                            if len(digits) <= 3 and int(digits) <= 100:
+                                confidence = int(digits)
+                            else:
+                                # If too large, try to extract just 2-3 digits that might be the confidence
+                                if len(digits) >= 2:
+                                    # Try the first 2-3 digits
+                                    potential_confidence = int(digits[:2]) if len(digits) >= 2 else int(digits)
+                                    if potential_confidence <= 100:
+                                        confidence = potential_confidence
+                                    else:
+                                        confidence = 50
+                                else:
+                                    confidence = 50
+                except:
+                    warning("Error parsing confidence value, using default 50%.")
+                    confidence = 50
+        
+        # Final validation to ensure confidence is in range 0-100
+        if confidence < 0 or confidence > 100:
+            warning(f"Confidence value out of range: {confidence}. Clamping to 0-100.")
+            confidence = max(0, min(confidence, 100))
+        return confidence
+
+    @staticmethod
+    def _reasoning_from_lines(lines):
+        """Reasoning text after the action line, without a standalone confidence line"""
+        reasoning_lines = [line for line in lines[1:] if line.strip()]
+        if reasoning_lines and re.fullmatch(r'confidence:?\s*\d{1,3}\s*%', reasoning_lines[0].strip(), re.IGNORECASE):
+            reasoning_lines = reasoning_lines[1:]
+        return '\n'.join(reasoning_lines) if reasoning_lines else "No detailed reasoning provided"
+
+    def _record_recommendation(self, token, position_data, action, confidence, reasoning):
+        """Store a recommendation for execution and notify the UI"""
+        self.recommendations_df = pd.concat([
+            self.recommendations_df,
+            pd.DataFrame([{
+                'token': token,
+                'action': action,
+                'confidence': confidence,
+                'reasoning': reasoning
+            }])
+        ], ignore_index=True)
+        
+        # Extract token name and price
+        token_name = position_data['name'].values[0] if not position_data.empty else "Unknown"
+        token_symbol = position_data['symbol'].values[0] if not position_data.empty and 'symbol' in position_data.columns else "UNK"
+        price = f"${position_data['USD Value'].values[0] / position_data['Amount'].values[0]:.4f}" if not position_data.empty and position_data['Amount'].values[0] > 0 else "N/A"
+        
+        # Try to extract change percentage from the analysis
+        change_percent = None
+        for line in reasoning.split('\n'):
+            # Look for common patterns indicating percentage change
+            if any(pattern in line.lower() for pattern in ['change', 'increase', 'decrease', 'moved', 'up by', 'down by']):
+                # Try to extract percentage values
+                percentage_match = re.search(r'(\+|-)?\s*(\d+\.?\d*)%', line)
+                if percentage_match:
+                    sign = percentage_match.group(1) or ''
+                    value = percentage_match.group(2)
+                    change_percent = f"{sign}{value}"
+                    break
+        
+        # Generate a timestamp for the analysis
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Emit the analysis_complete signal with all relevant data
+        self.analysis_complete.emit(
+            timestamp,
+            action,
+            token_name,
+            token_symbol,
+            reasoning.split('\n')[0] if reasoning else "No analysis",
+            str(confidence),
+            price,
+            change_percent if change_percent else None,
+            token
+        )
+        
+        info(f"\nSummary for {token_name}:")
+        info(f"Action: {action}")
+        info(f"Confidence: {confidence}%")
+        info(f"Position Analysis Complete!")
+
+    def analyze_position(self, token, token_status=None, wallet_action=None, pct_change=None):
+        """Analyze a single portfolio position with wallet action context"""
+
+        try:
+            context = self._build_position_context(token, token_status, pct_change)
+            if context is None:
+                return None
+            
+            # Market data goes in as a compact feature vector rather than a DataFrame dump
+            market_features = FEATURE_LEGEND + "\n" + encode_market_data(context['market_data'])
             
             # Prepare context for LLM with wallet action context
             full_prompt = f"""
-{wallet_context}
+{context['wallet_context']}
 
 Your analysis should confirm or reject this signal based on market data, but give significant weight ({int(config.COPYBOT_WALLET_ACTION_WEIGHT*100)}%) to the wallet's action.
 
 {config.PORTFOLIO_ANALYSIS_PROMPT.format(
-    portfolio_data=position_data.to_string(),
-    market_data=token_market_data
+    portfolio_data=context['position_data'].to_string(),
+    market_data=market_features
 )}
 
 Based on the wallet's action and your analysis, recommend: 
@@ -552,9 +623,15 @@ Confidence should reflect your agreement with the wallet's action, with higher c
 """
             
             info("\nSending data to AI for analysis...")
+            log_prompt_size(token[:8], full_prompt)
             
-            # Get LLM analysis using the selected model
-            response = self.get_ai_response(full_prompt)
+            def on_reasoning(text):
+                # Reasoning streamed in after the decision was acted on; update the Tracker tab
+                reasoning = self._reasoning_from_lines(text.split('\n'))
+                self.analysis_reasoning.emit(token, reasoning.split('\n')[0])
+
+            # Get LLM analysis using the selected model (returns once the decision lines are parsed)
+            response = self.get_ai_response(full_prompt, parser_factory=DecisionStreamParser, on_complete=on_reasoning)
             
             # Log complete analysis to file only
             debug("AI Analysis Results:", file_only=True)
@@ -564,108 +641,84 @@ Confidence should reflect your agreement with the wallet's action, with higher c
             
             lines = response.split('\n')
             action = lines[0].strip() if lines else "NOTHING"
+            if action not in ("BUY", "SELL", "NOTHING"):
+                llm_metrics.record_parse_failure('copybot', self._selected_model(), f"Unexpected action line: {action[:80]}")
+            confidence = self._parse_confidence(lines)
+            reasoning = self._reasoning_from_lines(lines)
             
-            # Extract confidence with proper regex and validation
-            confidence = 0
-            for line in lines:
-                if 'confidence' in line.lower():
-                    try:
-                        # Look for patterns like "confidence: 65%" or "65% confidence"
-                        match = re.search(r'confidence:?\s*(\d{1,3})\s*%|(\d{1,3})\s*%\s*confidence', line.lower())
-                        if match:
-                            # Use the first non-None group
-                            confidence_str = match.group(1) if match.group(1) else match.group(2)
-                            confidence = int(confidence_str)
-                            # Validate the range
-                            if confidence < 0 or confidence > 100:
-                                warning(f"Invalid confidence value: {confidence}. Setting to default 50%.")
-                                confidence = 50
-                            break
-                        else:
-                            # Fallback to traditional method but with validation
-                            digits = ''.join(filter(str.isdigit, line))
-                            if digits:
-                                # Check if the number is reasonable (between 0-100)
-                                if len(digits) <= 3 and int(digits) <= 100:
-                                    confidence = int(digits)
-                                else:
-                                    # If too large, try to extract just 2-3 digits that might be the confidence
-                                    if len(digits) >= 2:
-                                        # Try the first 2-3 digits
-                                        potential_confidence = int(digits[:2]) if len(digits) >= 2 else int(digits)
-                                        if potential_confidence <= 100:
-                                            confidence = potential_confidence
-                                        else:
-                                            confidence = 50
-                                    else:
-                                        confidence = 50
-                    except:
-                        warning("Error parsing confidence value, using default 50%.")
-                        confidence = 50
-            
-            # Final validation to ensure confidence is in range 0-100
-            if confidence < 0 or confidence > 100:
-                warning(f"Confidence value out of range: {confidence}. Clamping to 0-100.")
-                confidence = max(0, min(confidence, 100))
-            
-            # Store recommendation
-            reasoning = '\n'.join(lines[1:]) if len(lines) > 1 else "No detailed reasoning provided"
-            self.recommendations_df = pd.concat([
-                self.recommendations_df,
-                pd.DataFrame([{
-                    'token': token,
-                    'action': action,
-                    'confidence': confidence,
-                    'reasoning': reasoning
-                }])
-            ], ignore_index=True)
-            
-            # Extract token name and price
-            token_name = position_data['name'].values[0] if not position_data.empty else "Unknown"
-            token_symbol = position_data['symbol'].values[0] if not position_data.empty and 'symbol' in position_data.columns else "UNK"
-            price = f"${position_data['USD Value'].values[0] / position_data['Amount'].values[0]:.4f}" if not position_data.empty and position_data['Amount'].values[0] > 0 else "N/A"
-            
-            # Try to extract change percentage from the analysis
-            change_percent = None
-            for line in lines:
-                # Look for common patterns indicating percentage change
-                if any(pattern in line.lower() for pattern in ['change', 'increase', 'decrease', 'moved', 'up by', 'down by']):
-                    # Try to extract percentage values
-                    percentage_match = re.search(r'(\+|-)?\s*(\d+\.?\d*)%', line)
-                    if percentage_match:
-                        sign = percentage_match.group(1) or ''
-                        value = percentage_match.group(2)
-                        change_percent = f"{sign}{value}"
-                        break
-            
-            # Generate a timestamp for the analysis
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Store the mint address
-            token_mint = token
-            
-            # Emit the analysis_complete signal with all relevant data
-            self.analysis_complete.emit(
-                timestamp,
-                action,
-                token_name,
-                token_symbol,
-                reasoning.split('\n')[0] if reasoning else "No analysis",
-                str(confidence),
-                price,
-                change_percent if change_percent else None,
-                token_mint
-            )
-            
-            info(f"\nSummary for {position_data['name'].values[0]}:")
-            info(f"Action: {action}")
-            info(f"Confidence: {confidence}%")
-            info(f"Position Analysis Complete!")
+            self._record_recommendation(token, context['position_data'], action, confidence, reasoning)
             return response
             
         except Exception as e:
             warning(f"Error analyzing position: {str(e)}")
             return None
+
+    def analyze_positions(self, position_requests):
+        """
+        Analyze several positions, packing them into shared LLM requests when batching is enabled
+
+        Args:
+            position_requests (list): (token, token_status, pct_change) tuples
+        """
+        batch_size = getattr(config, 'COPYBOT_BATCH_ANALYSIS_SIZE', 5)
+        if not getattr(config, 'COPYBOT_BATCH_ANALYSIS', True) or len(position_requests) < 2 or batch_size < 2:
+            for token, token_status, pct_change in position_requests:
+                self.analyze_position(token, token_status=token_status, pct_change=pct_change)
+            return
+
+        for chunk in chunked(position_requests, batch_size):
+            contexts = {}
+            for token, token_status, pct_change in chunk:
+                try:
+                    context = self._build_position_context(token, token_status, pct_change)
+                except Exception as e:
+                    warning(f"Error preparing analysis for {token}: {str(e)}")
+                    context = None
+                if context is not None:
+                    contexts[token] = context
+
+            if len(contexts) < 2:
+                for context in contexts.values():
+                    self.analyze_position(context['token'], token_status=context['token_status'], pct_change=context['pct_change'])
+                continue
+
+            items = []
+            for token, context in contexts.items():
+                items.append((token, "\n".join([
+                    context['wallet_context'] or "No wallet action for this token.",
+                    "Position:",
+                    context['position_data'].to_string(),
+                    "Market data:",
+                    encode_market_data(context['market_data']),
+                ])))
+
+            prompt = build_batch_prompt(items, f"""
+You are Anarcho Capital's CopyBot Agent 🌙
+Each token below was just traded by a tracked wallet. Confirm or reject each wallet signal based on its market data,
+giving significant weight ({int(config.COPYBOT_WALLET_ACTION_WEIGHT*100)}%) to the wallet's action.
+Recommend BUY to confirm a buy signal, SELL to confirm a sell signal, or NOTHING only with strong evidence against the wallet.
+Confidence should reflect your agreement with the wallet's action.
+{FEATURE_LEGEND}
+""")
+
+            info(f"\nSending {len(items)} positions to AI in one batched request...")
+            log_prompt_size(f"{len(items)} batched positions", prompt)
+            response = self.get_ai_response(prompt, system_prompt=BATCH_SYSTEM_PROMPT)
+            debug(f"Batched AI Analysis Results:\n{response}", file_only=True)
+
+            results = parse_batch_response(response, list(contexts))
+            for token, context in contexts.items():
+                result = results.get(token)
+                if result is None:
+                    # Per-item fallback keeps one bad entry from dropping the signal
+                    warning(f"No valid batched result for {token[:8]}..., analyzing individually")
+                    llm_metrics.record_parse_failure('copybot', self._selected_model(), f"Batch item missing: {token}")
+                    self.analyze_position(token, token_status=context['token_status'], pct_change=context['pct_change'])
+                    continue
+                self._record_recommendation(
+                    token, context['position_data'], result['action'], result['confidence'],
+                    result['reasoning'] or "No detailed reasoning provided"
+                )
             
     def execute_position_updates(self, wallet_results=None, changes=None):
         """Execute position size updates based on analysis"""
@@ -678,6 +731,9 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                 self.mirror_mode_active.emit(True)
                 return self.execute_mirror_trades(wallet_results, changes)
             
+            # Spot trades are queued and executed together as one batch
+            pending_trades = []
+            
             for _, row in self.recommendations_df.iterrows():
                 token = row['token']
                 action = row['action']
@@ -712,11 +768,10 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                     current_price = 0
                     try:
                         # Use the cached market data if available
-                        if token in self.market_data_cache:
-                            token_data = self.market_data_cache[token]
-                            if isinstance(token_data, pd.DataFrame) and not token_data.empty and 'price' in token_data.columns:
-                                current_price = token_data['price'].iloc[-1]
-                                debug(f"Using cached price {current_price} for {token}", file_only=True)
+                        token_data = self.market_data_cache.get(token)
+                        if isinstance(token_data, pd.DataFrame) and not token_data.empty and 'price' in token_data.columns:
+                            current_price = token_data['price'].iloc[-1]
+                            debug(f"Using cached price {current_price} for {token}", file_only=True)
                         
                         # If we didn't get a price from the cache, use zero
                         if current_price == 0:
@@ -829,76 +884,66 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                             info(f"Already at or above target size! (${current_position:.2f} > ${target_size:.2f})")
                             continue
                             
-                        info(f"Buying ${amount_to_buy:.2f} of {token}")
-                        
-                        # Execute the buy using nice_funcs
-                        success = n.ai_entry(
-                            token,
-                            amount_to_buy
-                        )
+                        info(f"Queueing buy of ${amount_to_buy:.2f} of {token}")
                         
-                        if success:
-                            info(f"Successfully bought {token}")
-                            # Emit trade signal
-                            self.order_executed.emit(
-                                "copybot", "BUY", token_name or token, amount_to_buy, 
-                                current_price, None, None, wallet_address, token, ai_analysis
-                            )
-                        else:
-                            warning(f"Trade execution failed for {token}")
+                        pending_trades.append({
+                            'side': "BUY",
+                            'token_mint': token,
+                            'symbol': token_symbol,
+                            'token_name': token_name or token,
+                            'wallet': wallet_address,
+                            'usd_amount': amount_to_buy,
+                            'amount': amount_to_buy,
+                            'entry_price': current_price,
+                            'exit_price': None,
+                            'pnl': None,
+                            'ai_analysis': ai_analysis,
+                            'legacy': lambda mint=token, usd=amount_to_buy: n.ai_entry(mint, usd),
+                        })
                                 
                     elif action == "SELL":
                         if current_position > 0:
-                            info(f"Selling position worth ${current_position:.2f}")
+                            info(f"Queueing sell of position worth ${current_position:.2f}")
                             
                             # Remember the token price before selling
                             entry_price = 0
                             if position_amount > 0:
                                 entry_price = current_position / position_amount
                             
-                            # Execute the sell using nice_funcs
-                            success = n.chunk_kill(
-                                token,
-                                config.max_usd_order_size,  # From config.py
-                                config.slippage  # From config.py
-                            )
+                            # Calculate PnL (we don't have the original buy price, so use current_price as best guess)
+                            pnl_value = None
+                            pnl_percent = None
+                            exit_price = current_price  # Use the cached price we already have
+                            if entry_price > 0 and exit_price > 0:
+                                pnl_value = position_amount * (exit_price - entry_price)
+                                pnl_percent = ((exit_price / entry_price) - 1) * 100
                             
-                            if success:
-                                info(f"Successfully sold {token}")
-                                
-                                # Calculate PnL (we don't have the original buy price, so use current_price as best guess)
-                                pnl_value = None
-                                pnl_percent = None
-                                
-                                # Use the cached price data - no need to fetch again
-                                try:
-                                    exit_price = current_price  # Use the price we already have
-                                    
-                                    # Calculate PnL if we have both prices
-                                    if entry_price > 0 and exit_price > 0:
-                                        pnl_value = position_amount * (exit_price - entry_price)
-                                        pnl_percent = ((exit_price / entry_price) - 1) * 100
-                                except Exception as e:
-                                    warning(f"Error calculating PnL for {token}: {str(e)}")
-                                
-                                # Emit trade signal
-                                self.order_executed.emit(
-                                    "copybot", "SELL", token_name or token, position_amount, 
-                                    entry_price, current_price, 
-                                    (pnl_value, pnl_percent) if pnl_value is not None else None,
-                                    wallet_address, token, ai_analysis
-                                )
-                            else:
-                                warning(f"Failed to sell {token}")
+                            pending_trades.append({
+                                'side': "SELL",
+                                'token_mint': token,
+                                'symbol': token_symbol,
+                                'token_name': token_name or token,
+                                'wallet': wallet_address,
+                                'token_amount': position_amount,
+                                'amount': position_amount,
+                                'entry_price': entry_price,
+                                'exit_price': current_price,
+                                'pnl': (pnl_value, pnl_percent) if pnl_value is not None else None,
+                                'ai_analysis': ai_analysis,
+                                'legacy': lambda mint=token: n.chunk_kill(
+                                    mint,
+                                    config.max_usd_order_size,  # From config.py
+                                    config.slippage  # From config.py
+                                ),
+                            })
                         else:
                             info("No position to sell")
                     
-                    # Sleep between trades
-                    time.sleep(config.API_SLEEP_SECONDS)
-                    
                 except Exception as e:
                     warning(f"Error executing trade for {token}: {str(e)}")
                     continue
+            
+            self.execute_pending_trades(pending_trades)
                 
         except Exception as e:
             warning(f"Error updating positions: {str(e)}")
@@ -932,6 +977,9 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                 info("No changes to mirror!")
                 return False
             
+            # Collect every trade first, then execute them together as one batch
+            pending_trades = []
+            
             # Process each wallet's changes
             for wallet, wallet_changes in changes.items():
                 info(f"\nProcessing changes for wallet {wallet[:8]}...")
@@ -941,7 +989,6 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                     token_name = details.get('name', 'Unknown Token')
                     symbol = details.get('symbol', 'UNK')
                     price = details.get('price', 0)
-                    amount = details.get('amount', 0)
                     
                     info(f"New token detected: {symbol} ({token_name}) - BUY signal")
                     self.analyze_position(token_mint, token_status="new")
@@ -956,37 +1003,24 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                     
                     # Calculate our desired position
                     desired_position = wallet_position_value * config.position_scale
+                    info(f"Queueing buy of {symbol} worth ${desired_position:.2f}")
                     
-                    # Buy the token
-                    try:
-                        # Use buy_token_usd from nice_funcs to buy the token
-                        info(f"Buying {symbol} worth ${desired_position:.2f}")
-                        
-                        success = False
-                        try:
-                            success = n.buy_token_usd(
-                                token_mint,
-                                desired_position,
-                                config.max_usd_order_size,
-                                config.slippage
-                            )
-                        except Exception as e:
-                            warning(f"Error buying {symbol}: {e}")
-                            continue
-                            
-                        if success:
-                            info(f"Successfully bought {symbol}")
-                            
-                            # Emit trade signal to UI
-                            self.order_executed.emit(
-                                "copybot", "BUY", token_name, desired_position / price if price else 0,
-                                price, price, None, wallet, token_mint,
-                                f"Mirror Trading: New token in wallet {wallet[:8]}..."
-                            )
-                        else:
-                            warning(f"Failed to buy {symbol}")
-                    except Exception as e:
-                        warning(f"Error buying {symbol}: {e}")
+                    pending_trades.append({
+                        'side': "BUY",
+                        'token_mint': token_mint,
+                        'symbol': symbol,
+                        'token_name': token_name,
+                        'wallet': wallet,
+                        'usd_amount': desired_position,
+                        'amount': desired_position / price if price else 0,
+                        'entry_price': price,
+                        'exit_price': price,
+                        'pnl': None,
+                        'ai_analysis': f"Mirror Trading: New token in wallet {wallet[:8]}...",
+                        'legacy': lambda mint=token_mint, usd=desired_position: n.buy_token_usd(
+                            mint, usd, config.max_usd_order_size, config.slippage
+                        ),
+                    })
                 
                 # Process removed tokens (potential sells)
                 for token_mint, details in wallet_changes.get('removed', {}).items():
@@ -1003,23 +1037,25 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                         continue
                     
                     # We should sell all of this token since the wallet removed it
-                    try:
-                        info(f"Selling all {symbol} (${current_position:.2f})")
-                        success = n.chunk_kill(token_mint, config.max_usd_order_size, config.slippage)
-                        
-                        if success:
-                            info(f"Successfully sold all {symbol}")
-                            
-                            # Emit trade signal
-                            self.order_executed.emit(
-                                "copybot", "SELL", token_name, n.get_token_balance(token_mint),
-                                0, 0, None, wallet, token_mint,
-                                f"Mirror Trading: Token removed from wallet {wallet[:8]}..."
-                            )
-                        else:
-                            warning(f"Failed to sell {symbol}")
-                    except Exception as e:
-                        warning(f"Error selling {symbol}: {e}")
+                    position_amount = n.get_token_balance(token_mint)
+                    info(f"Queueing sell of all {symbol} (${current_position:.2f})")
+                    
+                    pending_trades.append({
+                        'side': "SELL",
+                        'token_mint': token_mint,
+                        'symbol': symbol,
+                        'token_name': token_name,
+                        'wallet': wallet,
+                        'token_amount': position_amount,
+                        'amount': position_amount,
+                        'entry_price': 0,
+                        'exit_price': 0,
+                        'pnl': None,
+                        'ai_analysis': f"Mirror Trading: Token removed from wallet {wallet[:8]}...",
+                        'legacy': lambda mint=token_mint: n.chunk_kill(
+                            mint, config.max_usd_order_size, config.slippage
+                        ),
+                    })
                 
                 # Process modified tokens
                 for token_mint, details in wallet_changes.get('modified', {}).items():
@@ -1067,27 +1103,22 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                                 info(f"Buy amount too small for {symbol} (${amount_to_buy:.2f} < ${config.min_position_usd:.2f}) - skipping")
                                 continue
                             
-                            try:
-                                success = n.buy_token_usd(
-                                    token_mint,
-                                    amount_to_buy,
-                                    config.max_usd_order_size,
-                                    config.slippage
-                                )
-                                
-                                if success:
-                                    info(f"Successfully bought more {symbol}")
-                                    
-                                    # Emit trade signal
-                                    self.order_executed.emit(
-                                        "copybot", "BUY", token_name, amount_to_buy / current_price if current_price else 0,
-                                        entry_price, current_price, None, wallet, token_mint,
-                                        f"Mirror Trading: Position increased by {pct_change:.2f}% in wallet {wallet[:8]}..."
-                                    )
-                                else:
-                                    warning(f"Failed to buy more {symbol}")
-                            except Exception as e:
-                                warning(f"Error buying more {symbol}: {e}")
+                            pending_trades.append({
+                                'side': "BUY",
+                                'token_mint': token_mint,
+                                'symbol': symbol,
+                                'token_name': token_name,
+                                'wallet': wallet,
+                                'usd_amount': amount_to_buy,
+                                'amount': amount_to_buy / current_price if current_price else 0,
+                                'entry_price': entry_price,
+                                'exit_price': current_price,
+                                'pnl': None,
+                                'ai_analysis': f"Mirror Trading: Position increased by {pct_change:.2f}% in wallet {wallet[:8]}...",
+                                'legacy': lambda mint=token_mint, usd=amount_to_buy: n.buy_token_usd(
+                                    mint, usd, config.max_usd_order_size, config.slippage
+                                ),
+                            })
                         else:
                             # Wallet DECREASED position - SELL signal
                             # Calculate percentage to sell based on pct_change
@@ -1098,55 +1129,94 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                             
                             if sell_percentage > 0:
                                 info(f"Decreasing position by {abs(pct_change):.2f}% - Selling {sell_percentage*100:.2f}%")
-                                try:
-                                    success = False
-                                    amount_to_sell = position_amount * sell_percentage
-                                    
-                                    if has_partial_kill:
-                                        success = n.partial_kill(token_mint, sell_percentage, config.max_usd_order_size, config.slippage)
-                                    else:
-                                        # If we don't have partial_kill, and the sell is significant (>50%), do a full sale
-                                        if sell_percentage > 0.5:
-                                            success = n.chunk_kill(token_mint, config.max_usd_order_size, config.slippage)
-                                        else:
-                                            warning(f"No partial_kill available and sell percentage is only {sell_percentage*100:.2f}% - skipping")
-                                            success = False
-                                                
-                                    if success:
-                                        info(f"Successfully sold portion of {symbol}")
-                                        
-                                        # Calculate PnL
-                                        pnl_value = None
-                                        pnl_percent = None
-                                        
-                                        if entry_price > 0 and current_price > 0:
-                                            pnl_value = amount_to_sell * (current_price - entry_price)
-                                            pnl_percent = ((current_price / entry_price) - 1) * 100
-                                        
-                                        # Emit trade signal with mirror trading context
-                                        mirror_context = f"Mirror Trading: Position decreased by {abs(pct_change):.2f}% in wallet {wallet[:8]}..."
-                                        self.order_executed.emit(
-                                            "copybot", "SELL", token_name, amount_to_sell,
-                                            entry_price, current_price, 
-                                            (pnl_value, pnl_percent) if pnl_value is not None else None,
-                                            wallet, token_mint, mirror_context
-                                        )
-                                    else:
-                                        warning(f"Failed to sell portion of {symbol}")
-                                except Exception as e:
-                                    warning(f"Error selling portion of {symbol}: {e}")
+                                amount_to_sell = position_amount * sell_percentage
+                                
+                                if has_partial_kill:
+                                    legacy_sell = lambda mint=token_mint, pct=sell_percentage: n.partial_kill(
+                                        mint, pct, config.max_usd_order_size, config.slippage
+                                    )
+                                elif sell_percentage > 0.5:
+                                    # If we don't have partial_kill, and the sell is significant (>50%), do a full sale
+                                    legacy_sell = lambda mint=token_mint: n.chunk_kill(
+                                        mint, config.max_usd_order_size, config.slippage
+                                    )
+                                else:
+                                    warning(f"No partial_kill available and sell percentage is only {sell_percentage*100:.2f}% - skipping")
+                                    legacy_sell = lambda: False
+                                
+                                # Calculate PnL
+                                pnl_value = None
+                                pnl_percent = None
+                                
+                                if entry_price > 0 and current_price > 0:
+                                    pnl_value = amount_to_sell * (current_price - entry_price)
+                                    pnl_percent = ((current_price / entry_price) - 1) * 100
+                                
+                                pending_trades.append({
+                                    'side': "SELL",
+                                    'token_mint': token_mint,
+                                    'symbol': symbol,
+                                    'token_name': token_name,
+                                    'wallet': wallet,
+                                    'token_amount': amount_to_sell,
+                                    'amount': amount_to_sell,
+                                    'entry_price': entry_price,
+                                    'exit_price': current_price,
+                                    'pnl': (pnl_value, pnl_percent) if pnl_value is not None else None,
+                                    'ai_analysis': f"Mirror Trading: Position decreased by {abs(pct_change):.2f}% in wallet {wallet[:8]}...",
+                                    'legacy': legacy_sell,
+                                })
                             
                             # In AI mode, we would want to analyze the position
                             self.analyze_position(token_mint, token_status="modified", pct_change=pct_change)
                     else:
                         info(f"No position to modify for {symbol}")
             
+            self.execute_pending_trades(pending_trades)
+            
             info("\nMirror trade execution complete!")
             return True
             
         except Exception as e:
             warning(f"Error executing mirror trades: {str(e)}")
             return False
+    
+    def execute_pending_trades(self, pending_trades):
+        """
+        Execute a batch of queued spot trades and emit order signals for the ones that went through
+        
+        With COPYBOT_BATCH_EXECUTION enabled, each trade is split into orders of at most
+        max_usd_order_size, quotes for all orders are prefetched concurrently and validated
+        for price impact and worst-case fill, and the signed swaps are submitted with bounded
+        parallelism across trades. Otherwise each trade's legacy callable runs in turn.
+        """
+        if not pending_trades:
+            return
+        
+        info(f"\nExecuting {len(pending_trades)} queued trade(s)...")
+        if getattr(config, 'COPYBOT_BATCH_EXECUTION', True):
+            execute_trade_batch(pending_trades)
+        else:
+            for trade in pending_trades:
+                try:
+                    trade['status'] = "sent" if trade['legacy']() else "failed"
+                except Exception as e:
+                    trade['status'] = "failed"
+                    trade['error'] = str(e)
+                time.sleep(config.API_SLEEP_SECONDS)
+        
+        for trade in pending_trades:
+            symbol = trade.get('symbol', trade['token_mint'][:8])
+            if trade.get('status') == "sent":
+                info(f"Successfully {'bought' if trade['side'] == 'BUY' else 'sold'} {symbol}")
+                self.order_executed.emit(
+                    "copybot", trade['side'], trade['token_name'], trade['amount'],
+                    trade['entry_price'], trade['exit_price'], trade['pnl'],
+                    trade['wallet'], trade['token_mint'], trade['ai_analysis']
+                )
+            else:
+                warning(f"Failed to {trade['side'].lower()} {symbol}" +
+                        (f": {trade['error']}" if trade.get('error') else ""))
             
     def run_analysis_cycle(self):
         """Run one cycle of analysis and trading"""
@@ -1161,17 +1231,13 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                 if getattr(config, 'COPYBOT_SKIP_ANALYSIS_ON_FIRST_RUN', True):
                     info("\nFirst run detected. Fetching tokens without analysis or execution...")
             
-            # Initialize or clear market data cache for fresh data this cycle
-            if not hasattr(self, 'market_data_cache'):
-                self.market_data_cache = {}
-            else:
-                # Only clear if we want fresh data every cycle
-                refresh_data = getattr(config, 'REFRESH_MARKET_DATA_EVERY_CYCLE', False)
-                if refresh_data:
-                    info("\nClearing market data cache for fresh analysis")
-                    self.market_data_cache = {}
-                else:
-                    info("\nReusing existing market data cache")
+            # Drop stale market data; fresh entries are reused across cycles
+            expired = self.market_data_cache.purge_expired()
+            if expired:
+                debug(f"Purged {expired} expired market data entries", file_only=True)
+            self.market_data_cache.log_stats()
+            llm_response_cache.purge_expired()
+            llm_response_cache.log_stats()
             
             # Instead of creating a token tracker here, use the existing one from token_list_tool.py
             info("\nRunning wallet token tracker...")
@@ -1202,6 +1268,14 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                 info(f"First run token fetching completed in {elapsed:.2f} seconds")
                 return
             
+            # Force fresh market data only for the tokens we are about to act on
+            if has_changes and getattr(config, 'REFRESH_MARKET_DATA_EVERY_CYCLE', False):
+                info("\nRefreshing market data for changed tokens")
+                for wallet_changes in changes.values():
+                    for change_type in ['new', 'removed', 'modified']:
+                        for token_mint in wallet_changes.get(change_type, {}):
+                            self.market_data_cache.invalidate(token_mint)
+            
             # If no changes detected, skip the rest of the cycle
             if not has_changes:
                 info("\nNo changes detected in any tracked wallets. Skipping analysis.")
@@ -1229,20 +1303,21 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                 
                 # Analyze ONLY tokens with changes detected
                 info("\nAnalyzing ONLY tokens with detected changes...")
+                position_requests = []
                 for wallet, wallet_changes in changes.items():
                     # Process new tokens with context
                     for token_mint, details in wallet_changes.get('new', {}).items():
                         token_name = details.get('name', 'Unknown Token')
                         symbol = details.get('symbol', 'UNK')
                         info(f"Analyzing new token: {symbol} ({token_name}) - BUY signal from wallet")
-                        self.analyze_position(token_mint, token_status="new")
+                        position_requests.append((token_mint, "new", None))
                     
                     # Process removed tokens with context
                     for token_mint, details in wallet_changes.get('removed', {}).items():
                         token_name = details.get('name', 'Unknown Token')
                         symbol = details.get('symbol', 'UNK')
                         info(f"Analyzing removed token: {symbol} ({token_name}) - SELL signal from wallet")
-                        self.analyze_position(token_mint, token_status="removed")
+                        position_requests.append((token_mint, "removed", None))
                     
                     # Process modified tokens with context
                     for token_mint, details in wallet_changes.get('modified', {}).items():
@@ -1259,7 +1334,9 @@ Confidence should reflect your agreement with the wallet's action, with higher c
                         debug(f"  Percentage change: {pct_change} ({change_direction})", file_only=True)
                         
                         info(f"Analyzing modified token: {symbol} ({token_name}) - {abs(pct_change):.2f}% {change_direction} in wallet")
-                        self.analyze_position(token_mint, token_status="modified", pct_change=pct_change)
+                        position_requests.append((token_mint, "modified", pct_change))
+                
+                self.analyze_positions(position_requests)
                 
                 # Execute position updates based on AI recommendations
                 info("\nExecuting position updates based on AI recommendations...")
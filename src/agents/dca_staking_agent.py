@@ -22,8 +22,6 @@ from dotenv import load_dotenv
 from termcolor import colored, cprint
 import pandas as pd
 import json
-import anthropic
-import openai
 import requests  # For API calls
 from colorama import init, Fore, Back, Style 
 init()
@@ -32,6 +30,10 @@ init()
 from src.config import *
 from src import nice_funcs as n
 from src.scripts.ohlcv_collector import collect_all_tokens
+from src.scripts.llm_response_cache import llm_response_cache
+from src.scripts.llm_metrics import llm_metrics
+from src.scripts.analysis_store import analysis_store
+from src.models.model_factory import model_factory
 # Import logging utilities
 from src.scripts.logger import debug, info, warning, error, critical, system
 
@@ -132,14 +134,8 @@ class DCAAgent(QObject if QT_AVAILABLE else object):
             warning("WARNING: No wallet address configured in config.py")
             info("Staking operations will be limited without a wallet address")
 
-        # Initialize AI clients
-        try:
-            self.client_anthropic = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_KEY"))
-            self.client_openai = openai.OpenAI(api_key=os.getenv("OPENAI_KEY"))
-            self.client_deepseek = None  # Placeholder for DeepSeek client
-        except Exception as e:
-            warning(f"Error initializing AI clients: {str(e)}")
-            info("Some AI functionality may not be available")
+        # AI models come from the shared, lazily-initialized model factory
+        self.model_factory = model_factory
 
         info("Anarcho Capital's DCA Agent initialized!")
 
@@ -158,20 +154,7 @@ class DCAAgent(QObject if QT_AVAILABLE else object):
         self.market_condition_weight = getattr(sys.modules['src.config'], 'MARKET_CONDITION_WEIGHT', 0.6)
         self.ai_recommendation_weight = getattr(sys.modules['src.config'], 'AI_RECOMMENDATION_WEIGHT', 0.4)
 
-        # Initialize DeepSeek client if needed for the model
-        if self.ai_model.startswith("deepseek") and os.getenv("DEEPSEEK_KEY"):
-            deepseek_base_url = getattr(sys.modules['src.config'], 'DCA_DEEPSEEK_BASE_URL', "https://api.deepseek.com")
-            try:
-                self.client_deepseek = openai.OpenAI(
-                    api_key=os.getenv("DEEPSEEK_KEY"),
-                    base_url=deepseek_base_url
-                )
-                info("DeepSeek client initialized for DCA agent")
-            except Exception as e:
-                warning(f"Failed to initialize DeepSeek client: {str(e)}")
-                self.client_deepseek = None
-        else:
-            self.client_deepseek = None
+        self.deepseek_base_url = getattr(sys.modules['src.config'], 'DCA_DEEPSEEK_BASE_URL', "https://api.deepseek.com")
 
     def get_staking_rewards_and_apy(self):
         """Get SOL staking rewards and APY data from different protocols"""
@@ -689,83 +672,62 @@ class DCAAgent(QObject if QT_AVAILABLE else object):
             error(f"Error optimizing yield: {str(e)}")
 
     def read_chart_recommendations(self):
-        """Read chart recommendations from CSV files"""
+        """Read the latest chart recommendation per token from the analysis store"""
         try:
-            charts_dir = PROJECT_ROOT / "src" / "data" / "charts"
+            latest_by_symbol = analysis_store.latest_all()
             
-            if not charts_dir.exists():
+            if not latest_by_symbol:
                 warning("No chart recommendations found")
                 return {}
                 
             all_recommendations = {}
-            csv_files = list(charts_dir.glob("chart_analysis_*.csv"))
-            
-            if not csv_files:
-                warning("No chart recommendation files found")
-                return {}
             
-            for file in csv_files:
+            for symbol, latest in latest_by_symbol.items():
                 try:
-                    debug(f"Processing file: {file.name}", file_only=True)
+                    debug(f"Processing recommendation for {symbol}", file_only=True)
                     
-                    # Extract token symbol from filename
-                    # Format: chart_analysis_SYMBOL.csv
-                    file_parts = file.stem.split('_')
-                    if len(file_parts) >= 3:
-                        symbol = file_parts[2]
-                        debug(f"Extracted token symbol from filename: {symbol}", file_only=True)
-                        
-                        # Get token address from the symbol
-                        token_address = None
-                        for token_info in TOKEN_MAP.items():
-                            if token_info[1][0] == symbol:
-                                token_address = token_info[0]
-                                debug(f"Found matching token address for {symbol}: {token_address}", file_only=True)
-                                break
-                        
-                        if not token_address:
-                            warning(f"Could not find token address for {symbol}, skipping")
-                            continue
-                        
-                        # Read CSV and process the data
-                        df = pd.read_csv(file)
-                        
-                        # Find the most recent recommendation
-                        if not df.empty:
-                            # Sort by timestamp descending to get the most recent
-                            df = df.sort_values('timestamp', ascending=False)
-                            latest = df.iloc[0]
-                            
-                            # Extract action, confidence and entry price
-                            action = latest.get('signal', 'NEUTRAL')
-                            confidence = latest.get('confidence', 50)
-                            current_price = latest.get('price', 0)
-                            
-                            # Explicitly check for entry_price first
-                            entry_price = None
-                            if 'entry_price' in latest and not pd.isna(latest['entry_price']):
-                                entry_price = latest['entry_price']
-                                info(f"{symbol}: Using entry_price (${entry_price:.6f}) from chart analysis for limit orders")
-                            else:
-                                # Fall back to current price if entry_price not available
-                                entry_price = current_price
-                                warning(f"{symbol}: No entry_price found, using current price (${current_price:.6f}) instead")
-                            
-                            # Store the recommendation with both prices
-                            all_recommendations[token_address] = {
-                                'symbol': symbol,
-                                'action': action,
-                                'confidence': confidence,
-                                'price': current_price,           # Current market price
-                                'entry_price': entry_price,       # Optimal entry price (for limit orders)
-                                'analysis': latest.get('reasoning', ''),
-                                'timestamp': latest.get('timestamp', int(time.time()))
-                            }
+                    # Get token address from the symbol
+                    token_address = None
+                    for token_info in TOKEN_MAP.items():
+                        if token_info[1][0] == symbol:
+                            token_address = token_info[0]
+                            debug(f"Found matching token address for {symbol}: {token_address}", file_only=True)
+                            break
                     
-                            info(f"Created recommendation for {symbol}: {action} (confidence: {confidence}%), Entry: ${entry_price:.6f}")
+                    if not token_address:
+                        warning(f"Could not find token address for {symbol}, skipping")
+                        continue
+                    
+                    # Extract action, confidence and entry price
+                    action = latest.get('signal') or 'NEUTRAL'
+                    confidence = latest.get('confidence', 50)
+                    current_price = latest.get('price') or 0
+                    
+                    # Explicitly check for entry_price first
+                    entry_price = None
+                    if latest.get('entry_price') is not None:
+                        entry_price = latest['entry_price']
+                        info(f"{symbol}: Using entry_price (${entry_price:.6f}) from chart analysis for limit orders")
+                    else:
+                        # Fall back to current price if entry_price not available
+                        entry_price = current_price
+                        warning(f"{symbol}: No entry_price found, using current price (${current_price:.6f}) instead")
+                    
+                    # Store the recommendation with both prices
+                    all_recommendations[token_address] = {
+                        'symbol': symbol,
+                        'action': action,
+                        'confidence': confidence,
+                        'price': current_price,           # Current market price
+                        'entry_price': entry_price,       # Optimal entry price (for limit orders)
+                        'analysis': latest.get('reasoning') or '',
+                        'timestamp': latest.get('timestamp', int(time.time()))
+                    }
+            
+                    info(f"Created recommendation for {symbol}: {action} (confidence: {confidence}%), Entry: ${entry_price:.6f}")
                             
                 except Exception as e:
-                    warning(f"Error processing file {file.name}: {str(e)}")
+                    warning(f"Error processing recommendation for {symbol}: {str(e)}")
             
             info(f"Total: Loaded {len(all_recommendations)} chart recommendations")
             return all_recommendations
@@ -1943,44 +1905,31 @@ class DCAAgent(QObject if QT_AVAILABLE else object):
                 market_conditions=market_conditions
             )
             
-            # 3. Choose the appropriate AI client based on model name
-            response = None
-            if self.ai_model.startswith("claude"):
-                info(f"Using Anthropic's {self.ai_model} for staking advice")
-                response = self.client_anthropic.messages.create(
-                    model=self.ai_model,
-                    max_tokens=self.ai_max_tokens,
-                    temperature=self.ai_temperature,
-                    messages=[
-                        {"role": "user", "content": formatted_prompt}
-                    ]
-                )
-                ai_advice = response.content[0].text
-            elif self.ai_model.startswith("gpt"):
-                info(f"Using OpenAI's {self.ai_model} for staking advice")
-                response = self.client_openai.chat.completions.create(
-                    model=self.ai_model,
-                    temperature=self.ai_temperature,
-                    max_tokens=self.ai_max_tokens,
-                    messages=[
-                        {"role": "user", "content": formatted_prompt}
-                    ]
-                )
-                ai_advice = response.choices[0].message.content
-            elif self.ai_model.startswith("deepseek") and hasattr(self, 'client_deepseek') and self.client_deepseek:
-                info(f"Using DeepSeek's {self.ai_model} for staking advice")
-                response = self.client_deepseek.chat.completions.create(
-                    model=self.ai_model.replace("deepseek-", ""),  # Handle model name formatting
+            system_prompt = "You are Anarcho Capital Staking Bot, an AI that provides staking and yield optimization advice."
+
+            def call_model():
+                # 3. Get the model for the configured name from the shared factory
+                if self.ai_model.startswith("deepseek"):
+                    model = self.model_factory.get_model("deepseek", self.ai_model, base_url=self.deepseek_base_url, agent="dca")
+                else:
+                    model = self.model_factory.get_model_for(self.ai_model, agent="dca")
+                if model is None:
+                    warning(f"Unknown AI model type: {self.ai_model}, falling back to default logic")
+                    return None
+                
+                info(f"Using {model.model_type} {self.ai_model} for staking advice")
+                return model.generate_response(
+                    system_prompt,
+                    formatted_prompt,
                     temperature=self.ai_temperature,
-                    max_tokens=self.ai_max_tokens,
-                    messages=[
-                        {"role": "system", "content": "You are Anarcho Capital Staking Bot, an AI that provides staking and yield optimization advice."},
-                        {"role": "user", "content": formatted_prompt}
-                    ]
-                )
-                ai_advice = response.choices[0].message.content
-            else:
-                warning(f"Unknown AI model type: {self.ai_model}, falling back to default logic")
+                    max_tokens=self.ai_max_tokens
+                ).content
+
+            ai_advice = llm_response_cache.get_or_call(
+                'dca', self.ai_model, formatted_prompt, self.ai_temperature, call_model, system_prompt
+            )
+            if ai_advice is None:
+                llm_metrics.record_fallback('dca', self.ai_model, "No model available, using default logic")
                 return None
             
             # Parse the response for structured data
@@ -2009,6 +1958,9 @@ class DCAAgent(QObject if QT_AVAILABLE else object):
                 elif line.startswith("REASONING:"):
                     reasoning = line.replace("REASONING:", "").strip()
             
+            if protocol is None:
+                llm_metrics.record_parse_failure('dca', self.ai_model, "No PROTOCOL line in staking advice")
+            
             info(f"AI Staking Recommendation: {protocol} protocol, {allocation}% allocation")
             info(f"Convert: {convert}, Compound: {compound}")
             info(f"Reasoning: {reasoning}")
@@ -4,29 +4,35 @@ Built with love by Anarcho Capital 🚀
 """
 
 # Import necessary modules
-import anthropic
 import os
 import pandas as pd
 import json
 from termcolor import colored, cprint
 from dotenv import load_dotenv
-import openai
 from src import config
 from src import nice_funcs as n
 from src import paper_trading
 from src.scripts.ohlcv_collector import collect_all_tokens
+from src.scripts.llm_response_cache import llm_response_cache
+from src.scripts.llm_metrics import llm_metrics
+from src.models.model_factory import model_factory
+from src.models.model_router import model_router
 from datetime import datetime, timedelta
 import time
+import threading
 from src.config import *
 from src.agents.base_agent import BaseAgent
 import traceback
 import re
 from src.scripts.logger import logger, debug, info, warning, error, critical, system
 from src.scripts.token_list_tool import TokenAccountTracker
+from src.scripts.portfolio_snapshot import PortfolioSnapshot, LeverageSnapshot
+from src.scripts.risk_engine import risk_engine, evaluate_limits, drawdown_breach
+from src.scripts.balance_store import balance_store
 
 # Import leverage utilities if available
 try:
-    from src.scripts.leverage_utils import get_hl_positions, get_hl_symbol
+    from src.scripts.leverage_utils import get_hl_positions
     LEVERAGE_UTILS_AVAILABLE = True
 except ImportError:
     LEVERAGE_UTILS_AVAILABLE = False
@@ -42,18 +48,9 @@ from src.config import (
     MAX_LOSS_PERCENT, MAX_GAIN_PERCENT, 
     MAX_LOSS_USD, MAX_GAIN_USD,
     MINIMUM_BALANCE_USD, USE_AI_CONFIRMATION,
-    USE_PERCENTAGE
+    USE_PERCENTAGE, MAX_DRAWDOWN_PERCENT
 )
 
-# Try importing models for AI
-try:
-    import anthropic
-    import openai
-    AI_AVAILABLE = True
-except ImportError:
-    AI_AVAILABLE = False
-    warning("AI libraries not available. AI risk assessment will be disabled.")
-
 # Try importing PySide6 for signals
 try:
     from PySide6.QtCore import QObject, Signal as QtSignal
@@ -121,15 +118,7 @@ class RiskAgent(BaseAgent):
         
         load_dotenv()
         
-        # Get API keys
-        openai_key = os.getenv("OPENAI_KEY")
-        anthropic_key = os.getenv("ANTHROPIC_KEY")
         deepseek_key = os.getenv("DEEPSEEK_KEY")
-        
-        if not openai_key:
-            raise ValueError("OPENAI_KEY not found in environment variables!")
-        if not anthropic_key:
-            raise ValueError("ANTHROPIC_KEY not found in environment variables!")
             
         # Check if leverage trading is enabled
         self.leverage_mode = config.TRADING_MODE.lower() == "leverage"
@@ -140,26 +129,29 @@ class RiskAgent(BaseAgent):
                 warning("Leverage trading mode detected but utilities not available")
                 warning("Risk agent will only monitor spot positions")
             
-        # Initialize OpenAI client for DeepSeek
-        if deepseek_key and RISK_MODEL_OVERRIDE.lower() in ["deepseek-chat", "deepseek-reasoner"]:
-            self.deepseek_client = openai.OpenAI(
-                api_key=deepseek_key,
-                base_url=RISK_DEEPSEEK_BASE_URL
-            )
-            info(f"DeepSeek model initialized with {RISK_MODEL_OVERRIDE}!")
-        else:
-            self.deepseek_client = None
-            
-        # Initialize Anthropic client
-        self.client = anthropic.Anthropic(api_key=anthropic_key)
+        # AI models come from the shared, lazily-initialized model factory
+        self.model_factory = model_factory
+        self.use_deepseek = bool(deepseek_key) and RISK_MODEL_OVERRIDE.lower() in ["deepseek-chat", "deepseek-reasoner"]
+        if self.use_deepseek:
+            info(f"DeepSeek model selected: {RISK_MODEL_OVERRIDE}")
+        
+        # Only the selected model's provider needs a key (local models need none)
+        selected_model = RISK_MODEL_OVERRIDE.lower() if self.use_deepseek else self.ai_model
+        if not self.model_factory.is_model_available(self.model_factory.model_type_for(selected_model)):
+            raise ValueError(f"No API key found in environment variables for {selected_model}!")
         
         self.override_active = False
         self.last_override_check = None
+        self._breach_lock = threading.RLock()
         
         # Initialize start balance using portfolio value
         self.start_balance = self.get_portfolio_value()
         info(f"Initial Portfolio Balance: ${self.start_balance:.2f}")
         
+        # Re-check limits on every new price between interval checks
+        if getattr(config, 'RISK_STREAMING_ENABLED', True):
+            risk_engine.start(self._handle_streaming_breach)
+        
         self.current_value = self.start_balance
         info("Risk Agent initialized!")
         
@@ -237,8 +229,8 @@ class RiskAgent(BaseAgent):
             # Fallback to just MONITORED_TOKENS
             return config.MONITORED_TOKENS
 
-    def get_portfolio_value(self):
-        """Calculate total portfolio value in USD"""
+    def take_snapshot(self):
+        """Value the portfolio once; the snapshot is shared by every check in a risk cycle"""
         try:
             info("\nPortfolio Value Calculator Starting...")
             
@@ -250,7 +242,12 @@ class RiskAgent(BaseAgent):
                     paper_value = paper_trading.get_portfolio_value()
                     if paper_value is not None:
                         info(f"Using paper trading portfolio value: ${paper_value:.2f}")
-                        return paper_value
+                        snapshot = PortfolioSnapshot(
+                            paper_value, {}, self.get_all_monitored_tokens(), EXCLUDED_TOKENS,
+                            holdings_loader=lambda: n.fetch_wallet_holdings_og(address), source='paper'
+                        )
+                        self._record_snapshot(snapshot)
+                        return snapshot
             except ImportError:
                 # If can't import the config, continue with real portfolio calculation
                 pass
@@ -260,60 +257,109 @@ class RiskAgent(BaseAgent):
             tokens_to_check = self.get_all_monitored_tokens()
             
             # Use the batch method to check all token balances
-            total_value, _ = self.batch_check_token_balances(tokens_to_check)
+            total_value, balances = self.batch_check_token_balances(list(tokens_to_check))
             
-            return total_value
+            snapshot = PortfolioSnapshot(
+                total_value, balances, tokens_to_check, EXCLUDED_TOKENS,
+                holdings_loader=lambda: n.fetch_wallet_holdings_og(address)
+            )
+            self._record_snapshot(snapshot)
+            self._sync_risk_engine(snapshot)
+            return snapshot
             
         except Exception as e:
             error(f"Error calculating portfolio value: {str(e)}")
             debug("Full error trace:", file_only=True)
             logger.error(f"Error: {str(e)}\n{traceback.format_exc()}", file_only=True)
-            return 0.0
+            return PortfolioSnapshot(0.0, {}, [], EXCLUDED_TOKENS)
+
+    def _record_snapshot(self, snapshot, checkpoint=False):
+        """Append a valuation to the balance time series"""
+        try:
+            snapshot.record_id = balance_store.append(snapshot.total_value, snapshot.balances, snapshot.source,
+                                                      timestamp=snapshot.taken_at.timestamp(), checkpoint=checkpoint)
+        except Exception as e:
+            debug(f"Could not record portfolio balance: {str(e)}", file_only=True)
+
+    def _sync_risk_engine(self, snapshot):
+        """Re-base the streaming risk engine on a fresh valuation"""
+        try:
+            held = [token for token, value in snapshot.balances.items() if value > 0]
+            # Served from the price cache the valuation just filled
+            prices = n.batch_fetch_prices(held) if held else {}
+            baseline, peak = self.get_lookback_baseline(default=snapshot.total_value)
+            risk_engine.reset(snapshot.balances, prices, snapshot.total_value, baseline, peak)
+        except Exception as e:
+            debug(f"Could not sync risk engine: {str(e)}", file_only=True)
 
-    def log_daily_balance(self):
+    def _handle_streaming_breach(self, breach_type, value):
+        """Confirm a breach seen on a price tick with a full valuation, then handle it"""
+        # A breach already being handled (streaming or interval) covers this one
+        if not self._breach_lock.acquire(blocking=False):
+            return
+        try:
+            warning(f"\n{breach_type} limit crossed on a price update - confirming with a full valuation")
+            snapshot = self.take_snapshot()
+            breach = evaluate_limits(snapshot.total_value, *self.get_lookback_baseline())
+            if breach is None:
+                info("Breach not confirmed by the full valuation - no action taken")
+                return
+            self.handle_limit_breach(*breach, snapshot)
+        finally:
+            self._breach_lock.release()
+
+    def get_portfolio_value(self, snapshot=None):
+        """Calculate total portfolio value in USD"""
+        return (snapshot or self.take_snapshot()).total_value
+
+    def get_lookback_baseline(self, default=None):
+        """
+        Baseline and peak portfolio value over the last MAX_LOSS_GAIN_CHECK_HOURS
+
+        Read from the balance store (see BalanceStore.lookback), so the lookback
+        survives restarts. With nothing recorded yet the baseline falls back to
+        `default` (the start balance unless given); the peak comes from daily
+        balance logs only and is None until one exists in the window.
+
+        Returns:
+            tuple: (baseline, peak)
+        """
+        if default is None:
+            default = getattr(self, 'start_balance', 0.0)
+        try:
+            baseline, peak = balance_store.lookback(config.MAX_LOSS_GAIN_CHECK_HOURS)
+        except Exception as e:
+            debug(f"Could not read balance history: {str(e)}", file_only=True)
+            return default, None
+        return (default if baseline is None else baseline), peak
+
+    def log_daily_balance(self, snapshot=None):
         """Log portfolio value if not logged in past check period"""
         try:
             debug("\nChecking if we need to log daily balance...")
             
-            # Create data directory if it doesn't exist
-            os.makedirs('src/data', exist_ok=True)
-            balance_file = 'src/data/portfolio_balance.csv'
-            debug(f"Using balance file: {balance_file}")
-            
-            # Check if we already have a recent log
-            if os.path.exists(balance_file):
-                debug("Found existing balance log file")
-                df = pd.read_csv(balance_file)
-                if not df.empty:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'])
-                    last_log = df['timestamp'].max()
-                    hours_since_log = (datetime.now() - last_log).total_seconds() / 3600
-                    
-                    debug(f"Hours since last log: {hours_since_log:.1f}")
-                    debug(f"Max hours between checks: {config.MAX_LOSS_GAIN_CHECK_HOURS}")
-                    
-                    if hours_since_log < config.MAX_LOSS_GAIN_CHECK_HOURS:
-                        info(f"Recent balance log found ({hours_since_log:.1f} hours ago)")
-                        return
+            # Check if we already have a recent log (an indexed lookup, not a file read)
+            last_log = balance_store.last_checkpoint()
+            if last_log is not None:
+                hours_since_log = (time.time() - last_log) / 3600
+                
+                debug(f"Hours since last log: {hours_since_log:.1f}")
+                debug(f"Max hours between checks: {config.MAX_LOSS_GAIN_CHECK_HOURS}")
+                
+                if hours_since_log < config.MAX_LOSS_GAIN_CHECK_HOURS:
+                    info(f"Recent balance log found ({hours_since_log:.1f} hours ago)")
+                    return
+            
+            # Get current portfolio value (from this cycle's snapshot when given)
+            debug("\nGetting portfolio value...")
+            snapshot = snapshot or self.take_snapshot()
+            current_value = snapshot.total_value
+            
+            # take_snapshot already recorded this valuation; flag that row instead of adding another
+            if snapshot.record_id is not None:
+                balance_store.mark_checkpoint(snapshot.record_id)
             else:
-                debug("Creating new balance log file")
-                df = pd.DataFrame(columns=['timestamp', 'balance'])
-            
-            # Get current portfolio value
-            debug("\nGetting fresh portfolio value...")
-            current_value = self.get_portfolio_value()
-            
-            # Add new row
-            new_row = {
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'balance': current_value
-            }
-            debug(f"Adding new balance record: {new_row}")
-            
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            
-            # Save updated log
-            df.to_csv(balance_file, index=False)
+                self._record_snapshot(snapshot, checkpoint=True)
             info(f"New portfolio balance logged: ${current_value:.2f}")
             
         except Exception as e:
@@ -323,11 +369,10 @@ class RiskAgent(BaseAgent):
     def get_position_data(self, token):
         """Get recent market data for a token"""
         try:
-            # Get 8h of 15m data
-            data_15m = n.get_data(token, 0.33, '15m')  # 8 hours = 0.33 days
-            
-            # Get 2h of 5m data
-            data_5m = n.get_data(token, 0.083, '5m')   # 2 hours = 0.083 days
+            # 8h of 15m data and 2h of 5m data, both built from one 5m fetch
+            data = n.get_multi_timeframe_data(token, {'15m': 0.33, '5m': 0.083})  # 0.33 days = 8h, 0.083 days = 2h
+            data_15m = data.get('15m')
+            data_5m = data.get('5m')
             
             return {
                 '15m': data_15m.to_dict() if data_15m is not None else None,
@@ -337,7 +382,7 @@ class RiskAgent(BaseAgent):
             warning(f"Error getting data for {token}: {str(e)}")
             return None
 
-    def should_override_limit(self, limit_type):
+    def should_override_limit(self, limit_type, snapshot=None):
         """Ask AI if we should override the limit based on recent market data"""
         try:
             # Only check every X minutes according to config
@@ -346,17 +391,8 @@ class RiskAgent(BaseAgent):
                 datetime.now() - self.last_override_check < check_interval):
                 return self.override_active
             
-            # Get current positions first
-            positions = n.fetch_wallet_holdings_og(address)
-            
-            # Get comprehensive token list to monitor
-            all_monitored_tokens = self.get_all_monitored_tokens()
-            
-            # Filter for tokens that are in our monitoring list and not excluded
-            positions = positions[
-                positions['Mint Address'].isin(all_monitored_tokens) & 
-                ~positions['Mint Address'].isin(EXCLUDED_TOKENS)
-            ]
+            # Monitored, non-excluded positions from this cycle's snapshot
+            positions = (snapshot or self.take_snapshot()).monitored_positions()
             
             if positions.empty:
                 warning("No monitored positions found to analyze")
@@ -389,33 +425,27 @@ class RiskAgent(BaseAgent):
             
             info("AI Agent analyzing market data...")
             
-            # Use DeepSeek if configured
-            if self.deepseek_client and RISK_MODEL_OVERRIDE.lower() in ["deepseek-chat", "deepseek-reasoner"]:
-                info(f"Using {RISK_MODEL_OVERRIDE} for analysis...")
-                response = self.deepseek_client.chat.completions.create(
-                    model=RISK_MODEL_OVERRIDE.lower(),
-                    messages=[
-                        {"role": "system", "content": "You are Anarcho Capital's Risk Management AI. Analyze positions and respond with OVERRIDE or RESPECT_LIMIT."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=self.ai_max_tokens,
+            system_prompt = "You are Anarcho Capital's Risk Management AI. Analyze positions and respond with OVERRIDE or RESPECT_LIMIT."
+            model_name = RISK_MODEL_OVERRIDE.lower() if self.use_deepseek else self.ai_model
+
+            def call_model():
+                # Slow models are hedged with a fast fallback; missing the risk deadline
+                # raises and the limit is respected
+                info(f"Using {model_name} for analysis...")
+                return model_router.generate_response(
+                    'risk',
+                    model_name,
+                    system_prompt,
+                    prompt,
                     temperature=self.ai_temperature,
-                    stream=False
-                )
-                response_text = response.choices[0].message.content.strip()
-            else:
-                # Use Claude as before
-                info("Using Claude for analysis...")
-                message = self.client.messages.create(
-                    model=self.ai_model,
                     max_tokens=self.ai_max_tokens,
-                    temperature=self.ai_temperature,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
-                response_text = str(message.content)
+                    base_url=RISK_DEEPSEEK_BASE_URL if self.use_deepseek else None,
+                    validate=lambda content: any(word in (content or "").upper() for word in ("OVERRIDE", "RESPECT_LIMIT"))
+                )  # The response itself, so the cache keys it by the model that answered
+
+            response_text = llm_response_cache.get_or_call(
+                'risk', model_name, prompt, self.ai_temperature, call_model, system_prompt
+            )
             
             # Handle TextBlock format if using Claude
             if 'TextBlock' in response_text:
@@ -437,6 +467,7 @@ class RiskAgent(BaseAgent):
                 info(f"Detected confidence score: {confidence_score}%")
             else:
                 warning("No confidence score detected in AI response")
+                llm_metrics.record_parse_failure('risk', model_name, "No confidence score in override response")
             
             # Determine required confidence based on limit type
             required_confidence = RISK_LOSS_CONFIDENCE_THRESHOLD if "LOSS" in limit_type.upper() else RISK_GAIN_CONFIDENCE_THRESHOLD
@@ -454,7 +485,7 @@ class RiskAgent(BaseAgent):
             
             # Print the AI's reasoning with model info
             info("\nRisk Agent Analysis:")
-            info(f"Using model: {'DeepSeek' if self.deepseek_client else 'Claude'}")
+            info(f"Using model: {'DeepSeek' if self.use_deepseek else 'Claude'}")
             # Log full response to file only, but provide a summary to console
             logger.debug(f"Full AI response:\n{response_text}", file_only=True)
             
@@ -470,19 +501,29 @@ class RiskAgent(BaseAgent):
             logger.error(f"Error: {str(e)}\n{traceback.format_exc()}", file_only=True)
             return False
 
-    def check_pnl_limits(self):
+    def check_pnl_limits(self, snapshot=None):
         """Check if PnL limits have been hit"""
         try:
-            self.current_value = self.get_portfolio_value()
+            self.current_value = self.get_portfolio_value(snapshot)
+            
+            # Baseline and peak of the lookback window, from the recorded valuations
+            baseline, peak = self.get_lookback_baseline()
+            if peak:
+                drawdown_pct = min(0.0, (self.current_value / peak - 1) * 100)
+                info(f"Drawdown ({config.MAX_LOSS_GAIN_CHECK_HOURS}h): {drawdown_pct:.2f}% from peak ${peak:.2f}")
+                if drawdown_breach(self.current_value, peak):
+                    warning("\nMAXIMUM DRAWDOWN REACHED")
+                    warning(f"Drawdown: {drawdown_pct:.2f}% (Limit: {MAX_DRAWDOWN_PERCENT}%)")
+                    return True
             
             # Prevent division by zero when checking percentage changes
-            if USE_PERCENTAGE and self.start_balance == 0:
-                debug("Skipping percentage PnL check - start balance is zero")
+            if USE_PERCENTAGE and baseline == 0:
+                debug("Skipping percentage PnL check - baseline balance is zero")
                 return False
                 
             if USE_PERCENTAGE:
                 # Calculate percentage change
-                percent_change = ((self.current_value - self.start_balance) / self.start_balance) * 100
+                percent_change = ((self.current_value - baseline) / baseline) * 100
                 
                 if percent_change <= -MAX_LOSS_PERCENT:
                     warning("\nMAXIMUM LOSS PERCENTAGE REACHED")
@@ -496,7 +537,7 @@ class RiskAgent(BaseAgent):
                     
             else:
                 # Calculate USD change
-                usd_change = self.current_value - self.start_balance
+                usd_change = self.current_value - baseline
                 
                 if usd_change <= -MAX_LOSS_USD:
                     warning("\nMAXIMUM LOSS USD REACHED")
@@ -515,28 +556,21 @@ class RiskAgent(BaseAgent):
             logger.error(f"Error: {str(e)}\n{traceback.format_exc()}", file_only=True)
             return False
 
-    def close_all_positions(self):
+    def close_all_positions(self, snapshot=None):
         """Close all monitored positions except USDC and SOL"""
         try:
             info("\nClosing monitored positions...")
             
-            # Get all positions
-            positions = n.fetch_wallet_holdings_og(address)
-            
-            # Get comprehensive token list to monitor
-            all_monitored_tokens = self.get_all_monitored_tokens()
+            snapshot = snapshot or self.take_snapshot()
             
             # Debug print to see what we're working with
             debug("\nCurrent positions:", file_only=True)
-            logger.debug(f"Current positions:\n{positions.head()}", file_only=True)
+            logger.debug(f"Current positions:\n{snapshot.holdings.head()}", file_only=True)
             debug("\nAll monitored tokens:", file_only=True)
-            logger.debug(f"All monitored tokens:\n{all_monitored_tokens}", file_only=True)
+            logger.debug(f"All monitored tokens:\n{snapshot.monitored_tokens}", file_only=True)
             
-            # Filter for tokens that are both in all_monitored_tokens and not in EXCLUDED_TOKENS
-            positions = positions[
-                positions['Mint Address'].isin(all_monitored_tokens) & 
-                ~positions['Mint Address'].isin(EXCLUDED_TOKENS)
-            ]
+            # Filter for tokens that are both monitored and not in EXCLUDED_TOKENS
+            positions = snapshot.monitored_positions()
             
             if positions.empty:
                 info("No monitored positions to close")
@@ -600,12 +634,14 @@ class RiskAgent(BaseAgent):
             error(f"Error in close_all_positions: {str(e)}")
             logger.error(f"Error: {str(e)}\n{traceback.format_exc()}", file_only=True)
 
-    def check_risk_limits(self):
+    def check_risk_limits(self, snapshot=None):
         """Check if any risk limits have been breached"""
         try:
-            # Get current PnL
-            current_pnl = self.get_current_pnl()
-            current_balance = self.get_portfolio_value()
+            # One valuation for the PnL, the balance and any breach handling
+            snapshot = snapshot or self.take_snapshot()
+            baseline, peak = self.get_lookback_baseline()
+            current_pnl = self.get_current_pnl(snapshot, baseline)
+            current_balance = snapshot.total_value
             
             info(f"\nCurrent PnL: ${current_pnl:.2f}")
             info(f"Current Balance: ${current_balance:.2f}")
@@ -614,19 +650,26 @@ class RiskAgent(BaseAgent):
             # Check minimum balance limit
             if current_balance < MINIMUM_BALANCE_USD:
                 warning(f"ALERT: Current balance ${current_balance:.2f} is below minimum ${MINIMUM_BALANCE_USD:.2f}")
-                self.handle_limit_breach("MINIMUM_BALANCE", current_balance)
+                self.handle_limit_breach("MINIMUM_BALANCE", current_balance, snapshot)
+                return True
+            
+            # Check drawdown from the peak of the lookback window
+            breach = drawdown_breach(current_balance, peak)
+            if breach is not None:
+                warning(f"Drawdown limit reached: {breach[1]:.2f}% from peak ${peak:.2f}")
+                self.handle_limit_breach(*breach, snapshot)
                 return True
             
             # Check PnL limits
             if USE_PERCENTAGE:
                 if abs(current_pnl) >= MAX_LOSS_PERCENT:
                     warning(f"PnL limit reached: {current_pnl}%")
-                    self.handle_limit_breach("PNL_PERCENT", current_pnl)
+                    self.handle_limit_breach("PNL_PERCENT", current_pnl, snapshot)
                     return True
             else:
                 if abs(current_pnl) >= MAX_LOSS_USD:
                     warning(f"PnL limit reached: ${current_pnl:.2f}")
-                    self.handle_limit_breach("PNL_USD", current_pnl)
+                    self.handle_limit_breach("PNL_USD", current_pnl, snapshot)
                     return True
                     
             info("All risk limits OK")
@@ -637,31 +680,35 @@ class RiskAgent(BaseAgent):
             logger.error(f"Error: {str(e)}\n{traceback.format_exc()}", file_only=True)
             return False
             
-    def handle_limit_breach(self, breach_type, current_value):
+    def handle_limit_breach(self, breach_type, current_value, snapshot=None):
         """Handle breached risk limits with AI consultation if enabled"""
+        # Interval checks and the streaming engine can both see a breach; handle it once
+        if not self._breach_lock.acquire(blocking=False):
+            info(f"{breach_type} breach already being handled")
+            return
+        try:
+            self._handle_limit_breach(breach_type, current_value, snapshot)
+        finally:
+            self._breach_lock.release()
+
+    def _handle_limit_breach(self, breach_type, current_value, snapshot=None):
         try:
             # If AI confirmation is disabled, close positions immediately
             if not USE_AI_CONFIRMATION:
                 warning(f"\n{breach_type} limit breached! Closing all positions immediately...")
                 info(f"(AI confirmation disabled in config)")
-                self.close_all_positions()
+                self.close_all_positions(snapshot)
                 return
                 
-            # Get all current positions using fetch_wallet_holdings_og
-            positions_df = n.fetch_wallet_holdings_og(address)
-            
-            # Get comprehensive token list to monitor
-            all_monitored_tokens = self.get_all_monitored_tokens()
-            
-            # Filter for positions that are in our monitoring lists
-            positions_df = positions_df[
-                positions_df['Mint Address'].isin(all_monitored_tokens) & 
-                ~positions_df['Mint Address'].isin(EXCLUDED_TOKENS)
-            ]
+            # Positions in our monitoring lists, from the same snapshot that breached
+            snapshot = snapshot or self.take_snapshot()
+            positions_df = snapshot.monitored_positions()
             
             # Prepare breach context
             if breach_type == "MINIMUM_BALANCE":
                 context = f"Current balance (${current_value:.2f}) has fallen below minimum balance limit (${MINIMUM_BALANCE_USD:.2f})"
+            elif breach_type == "DRAWDOWN":
+                context = f"Portfolio is {abs(current_value):.2f}% below its {config.MAX_LOSS_GAIN_CHECK_HOURS}h peak (limit {MAX_DRAWDOWN_PERCENT}%)"
             elif breach_type == "PNL_USD":
                 context = f"Current PnL (${current_value:.2f}) has exceeded USD limit (${MAX_LOSS_USD:.2f})"
             else:
@@ -691,33 +738,28 @@ Respond with:
 CLOSE_ALL or HOLD_POSITIONS
 Then explain your reasoning.
 """
-            # Use DeepSeek if configured
-            if self.deepseek_client and RISK_MODEL_OVERRIDE.lower() in ["deepseek-chat", "deepseek-reasoner"]:
-                info(f"Using {RISK_MODEL_OVERRIDE} for analysis...")
-                response = self.deepseek_client.chat.completions.create(
-                    model=RISK_MODEL_OVERRIDE.lower(),
-                    messages=[
-                        {"role": "system", "content": "You are Anarcho Capital's Risk Management AI. Analyze the breach and decide whether to close positions."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=self.ai_max_tokens,
-                    temperature=self.ai_temperature,
-                    stream=False
-                )
-                response_text = response.choices[0].message.content.strip()
-            else:
-                # Use Claude as before
-                info("Using Claude for analysis...")
-                message = self.client.messages.create(
-                    model=self.ai_model,
-                    max_tokens=self.ai_max_tokens,
+            system_prompt = "You are Anarcho Capital's Risk Management AI. Analyze the breach and decide whether to close positions."
+            model_name = RISK_MODEL_OVERRIDE.lower() if self.use_deepseek else self.ai_model
+
+            def call_model():
+                if self.use_deepseek:
+                    info(f"Using {RISK_MODEL_OVERRIDE} for analysis...")
+                    model = self.model_factory.get_model("deepseek", model_name, base_url=RISK_DEEPSEEK_BASE_URL, agent="risk")
+                else:
+                    info(f"Using {model_name} for analysis...")
+                    model = self.model_factory.get_model_for(model_name, agent="risk")
+                if model is None:
+                    raise ValueError(f"No AI client available for model: {model_name}")
+                return model.generate_response(
+                    system_prompt,
+                    prompt,
                     temperature=self.ai_temperature,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
-                response_text = str(message.content)
+                    max_tokens=self.ai_max_tokens
+                ).content
+
+            response_text = llm_response_cache.get_or_call(
+                'risk', model_name, prompt, self.ai_temperature, call_model, system_prompt
+            )
             
             # Handle TextBlock format if using Claude
             if 'TextBlock' in response_text:
@@ -727,16 +769,19 @@ Then explain your reasoning.
             
             info("\nAI Risk Assessment:")
             debug("=" * 50, file_only=True)
-            debug(f"Using model: {'DeepSeek' if self.deepseek_client else 'Claude'}", file_only=True)
+            debug(f"Using model: {'DeepSeek' if self.use_deepseek else 'Claude'}", file_only=True)
             logger.debug(f"Full AI response:\n{response_text}", file_only=True)
             debug("=" * 50, file_only=True)
             
             # Parse decision
             decision = response_text.split('\n')[0].strip()
             
+            if decision not in ("CLOSE_ALL", "HOLD_POSITIONS"):
+                llm_metrics.record_parse_failure('risk', model_name, f"Unexpected breach decision: {decision[:80]}")
+
             if decision == "CLOSE_ALL":
                 warning("AI recommends closing all positions!")
-                self.close_all_positions()
+                self.close_all_positions(snapshot)
             else:
                 info("AI recommends holding positions despite breach")
                 
@@ -744,21 +789,23 @@ Then explain your reasoning.
             error(f"Error handling limit breach: {str(e)}")
             # Default to closing positions on error
             warning("Error in AI consultation - defaulting to close all positions")
-            self.close_all_positions()
+            self.close_all_positions(snapshot)
 
-    def get_current_pnl(self):
-        """Calculate current PnL based on start balance"""
+    def get_current_pnl(self, snapshot=None, baseline=None):
+        """Calculate current PnL against the lookback baseline (see get_lookback_baseline)"""
         try:
-            current_value = self.get_portfolio_value()
-            debug(f"\nStart Balance: ${self.start_balance:.2f}")
+            current_value = self.get_portfolio_value(snapshot)
+            if baseline is None:
+                baseline, _ = self.get_lookback_baseline()
+            debug(f"\nBaseline Balance ({config.MAX_LOSS_GAIN_CHECK_HOURS}h): ${baseline:.2f}")
             debug(f"Current Value: ${current_value:.2f}")
             
             # Calculate absolute PnL in USD
-            pnl = current_value - self.start_balance
+            pnl = current_value - baseline
             
             # Add percentage info if possible
-            if self.start_balance > 0:
-                pnl_pct = (pnl / self.start_balance) * 100
+            if baseline > 0:
+                pnl_pct = (pnl / baseline) * 100
                 debug(f"Current PnL: ${pnl:.2f} ({pnl_pct:.2f}%)")
             else:
                 debug(f"Current PnL: ${pnl:.2f} (N/A%)")
@@ -770,6 +817,22 @@ Then explain your reasoning.
             logger.error(f"Error: {str(e)}\n{traceback.format_exc()}", file_only=True)
             return 0.0
 
+    def _batch_spot_values(self, tokens):
+        """USD value of each token's spot balance from one wallet read and one price batch (None on failure)"""
+        balances = n.get_wallet_balances(address)
+        if balances is None:
+            return None
+        held = [token for token in tokens if balances.get(token, 0) > 0]
+        prices = n.batch_fetch_prices(held) if held else {}
+        values = {}
+        for token in held:
+            price = prices.get(token)
+            if not price:
+                debug(f"Could not get price for {token[:8]}", file_only=True)
+                continue
+            values[token] = balances[token] * price
+        return values
+
     def batch_check_token_balances(self, tokens_to_check):
         """Check multiple token balances in a batch to minimize API calls and reduce error messages"""
         total_value = 0.0
@@ -783,10 +846,29 @@ Then explain your reasoning.
             # Log start of batch check
             debug(f"Batch checking balances for {len(tokens_to_check)} tokens", file_only=True)
             
+            # All wallet balances in one RPC round trip and the held tokens' prices in one
+            # batch; per-token lookups remain the fallback if the wallet read fails
+            spot_values = self._batch_spot_values(tokens_to_check)
+            
+            def spot_value(token):
+                if spot_values is None:
+                    return n.get_token_balance_usd(token)
+                return spot_values.get(token, 0.0)
+            
+            # Leverage positions in one request per cycle rather than one per mapped token
+            leverage = None
+            if LEVERAGE_UTILS_AVAILABLE and config.TRADING_MODE.lower() == "leverage":
+                try:
+                    leverage = LeverageSnapshot.fetch(
+                        tokens_to_check, getattr(config, 'TOKEN_TO_HL_MAPPING', {}), get_hl_positions
+                    )
+                except Exception as e:
+                    debug(f"Error fetching leverage positions: {str(e)}", file_only=True)
+            
             # Get USDC balance first (handle separately as it's important)
             if config.USDC_ADDRESS in tokens_to_check:
                 try:
-                    usdc_value = n.get_token_balance_usd(config.USDC_ADDRESS)
+                    usdc_value = spot_value(config.USDC_ADDRESS)
                     if usdc_value > 0:
                         info(f"USDC Value: ${usdc_value:.2f}")
                         total_value += usdc_value
@@ -803,23 +885,16 @@ Then explain your reasoning.
             for token in tokens_to_check:
                 try:
                     # Check spot balances first
-                    token_value = n.get_token_balance_usd(token)
+                    token_value = spot_value(token)
                     token_has_value = token_value > 0
                     
                     # Check leverage positions if available
                     leverage_value = 0
-                    if LEVERAGE_UTILS_AVAILABLE and config.TRADING_MODE.lower() == "leverage":
-                        # Try to get Hyperliquid symbol for this token
-                        hl_symbol = get_hl_symbol(token)
-                        if hl_symbol:
-                            # Get leverage positions
-                            positions = get_hl_positions()
-                            if positions and hl_symbol in positions:
-                                pos = positions[hl_symbol]
-                                leverage_value = pos.get('size', 0) * pos.get('current_price', 0)
-                                if leverage_value > 0:
-                                    info(f"Found {hl_symbol} leverage position worth: ${leverage_value:.2f}")
-                                    token_has_value = True
+                    if leverage is not None:
+                        leverage_value = leverage.value(token)
+                        if leverage_value > 0:
+                            info(f"Found {leverage.hl_symbol(token)} leverage position worth: ${leverage_value:.2f}")
+                            token_has_value = True
                     
                     # Combine spot and leverage values
                     combined_value = token_value + leverage_value
@@ -852,35 +927,44 @@ Then explain your reasoning.
     def run(self):
         """Run the risk agent (implements BaseAgent interface)"""
         try:
-            # Get current PnL
-            current_pnl = self.get_current_pnl()
-            current_balance = self.get_portfolio_value()
+            # Value the portfolio once for the whole cycle
+            snapshot = self.take_snapshot()
+            baseline, peak = self.get_lookback_baseline()
+            current_pnl = self.get_current_pnl(snapshot, baseline)
+            current_balance = snapshot.total_value
             
             info(f"\nCurrent PnL: ${current_pnl:.2f}")
             info(f"Current Balance: ${current_balance:.2f}")
             info(f"Minimum Balance Limit: ${MINIMUM_BALANCE_USD:.2f}")
             
             # Skip checking limits if we have zero balance and using percentage-based limits
-            if USE_PERCENTAGE and self.start_balance == 0:
-                debug("Skipping percentage PnL check in run() - start balance is zero")
+            if USE_PERCENTAGE and baseline == 0:
+                debug("Skipping percentage PnL check in run() - baseline balance is zero")
                 return False
             
             # Check minimum balance limit
             if current_balance < MINIMUM_BALANCE_USD:
                 warning(f"ALERT: Current balance ${current_balance:.2f} is below minimum ${MINIMUM_BALANCE_USD:.2f}")
-                self.handle_limit_breach("MINIMUM_BALANCE", current_balance)
+                self.handle_limit_breach("MINIMUM_BALANCE", current_balance, snapshot)
+                return True
+            
+            # Check drawdown from the peak of the lookback window
+            breach = drawdown_breach(current_balance, peak)
+            if breach is not None:
+                warning(f"Drawdown limit reached: {breach[1]:.2f}% from peak ${peak:.2f}")
+                self.handle_limit_breach(*breach, snapshot)
                 return True
             
             # Check PnL limits
             if USE_PERCENTAGE:
                 if abs(current_pnl) >= MAX_LOSS_PERCENT:
                     warning(f"PnL limit reached: {current_pnl}%")
-                    self.handle_limit_breach("PNL_PERCENT", current_pnl)
+                    self.handle_limit_breach("PNL_PERCENT", current_pnl, snapshot)
                     return True
             else:
                 if abs(current_pnl) >= MAX_LOSS_USD:
                     warning(f"PnL limit reached: ${current_pnl:.2f}")
-                    self.handle_limit_breach("PNL_USD", current_pnl)
+                    self.handle_limit_breach("PNL_USD", current_pnl, snapshot)
                     return True
                     
             info("All risk limits OK")
@@ -899,11 +983,14 @@ def main():
     
     while True:
         try:
+            # Value the portfolio once per cycle
+            snapshot = agent.take_snapshot()
+            
             # Always try to log balance (function will check if 12 hours have passed)
-            agent.log_daily_balance()
+            agent.log_daily_balance(snapshot)
             
             # Always check PnL limits
-            agent.check_pnl_limits()
+            agent.check_pnl_limits(snapshot)
             
             # Sleep for 5 minutes before next check
             time.sleep(300)
@@ -31,6 +31,45 @@ AI_MODEL = "claude-3-haiku-20240307"
 AI_TEMPERATURE = 0.7
 AI_MAX_TOKENS = 1024
 
+# LLM Response Cache Settings 🧠
+LLM_CACHE_ENABLED = True  # Reuse responses for identical prompts (keyed by answering model, prompt hash, temperature)
+LLM_CACHE_SKIP_NONZERO_TEMPERATURE = True  # Never cache calls made with temperature > 0 (False = cache sampled answers too)
+LLM_CACHE_TTL_SECONDS = {  # Per-agent response lifetime (0 disables caching for that agent)
+    'copybot': 900,
+    'risk': 300,
+    'chartanalysis': 3600,
+    'dca': 21600,
+}
+
+# LLM Call Metrics Settings 📊
+LLM_MAX_RETRIES = 1  # Retries per model call on API errors (each call's retries are recorded in llm_metrics.db)
+LLM_RETRY_DELAY_SECONDS = 1.0  # Base delay between retries (grows linearly per attempt)
+
+# Hedged LLM Request Settings 🏁
+LLM_HEDGE_ENABLED = True  # Race a fallback model when the configured model is slow
+LLM_HEDGE_FALLBACK_MODEL = "deepseek-chat"  # Fast model used for hedge requests
+LLM_HEDGE_DELAY_SECONDS = {  # Per-agent wait on the configured model before hedging
+    'copybot': 20,
+    'risk': 10,
+}
+LLM_DECISION_DEADLINE_SECONDS = {  # Per-agent hard upper bound on one model decision
+    'copybot': 60,
+    'risk': 30,
+}
+
+# Streaming LLM Response Settings 📡
+LLM_STREAMING_ENABLED = {  # Per-agent: act on the decision as soon as it is parsed from the stream
+    'copybot': True,
+    'chartanalysis': True,
+}
+LLM_STREAM_EARLY_STOP = False  # True = close the stream once decided (no reasoning); False = read reasoning in the background for the Tracker tab
+
+# Local Simulation Model Settings 🧪 (set AI_MODEL = "local-sim" to run agents offline)
+LOCAL_MODEL_LATENCY_SECONDS = 0.5  # Simulated base latency per call
+LOCAL_MODEL_LATENCY_JITTER_SECONDS = 0.5  # Extra random latency added per call (0 to this value)
+LOCAL_MODEL_FAILURE_RATE = 0.0  # Fraction of calls that raise a simulated API error
+LOCAL_MODEL_SEED = 42  # Seed for simulated latency/failures (responses depend only on the prompt)
+
 # Agent Runtime Settings ⏱️
 SLEEP_BETWEEN_RUNS_MINUTES = 15  # General sleep time between agent runs 🕒
 
@@ -83,6 +122,26 @@ API_SLEEP_SECONDS = 1
 API_TIMEOUT_SECONDS = 15
 API_MAX_RETRIES = 5
 
+# Market Data Cache Settings 🗄️
+MARKET_DATA_CACHE_MAX_MB = 256  # LRU size cap for cached OHLCV DataFrames (in MB)
+MARKET_DATA_CACHE_TTL_SECONDS = {  # How long cached candles stay fresh, per candle timeframe
+    '1m': 30,
+    '5m': 120,
+    '15m': 300,
+    '1h': 900,
+    '4h': 1800,
+    '1d': 3600,
+}
+REFRESH_MARKET_DATA_EVERY_CYCLE = False  # Force fresh data for changed tokens each CopyBot cycle
+
+# Candle Store Settings 🕯️
+CANDLE_STORE_ENABLED = True  # Keep OHLCV history in src/data/candles (Parquet) and only fetch newer candles
+CANDLE_STORE_MAX_ROWS = 100000  # Candles kept per (source, symbol, timeframe)
+MTF_BASE_CACHE_SECONDS = 60  # Reuse a symbol's base-resolution candles for its coarser timeframes within this window
+HL_BACKFILL_WORKERS = 4  # Concurrent Hyperliquid window requests in src/scripts/hl_backfill.py
+HL_BACKFILL_REQUESTS_PER_SECOND = 1.0  # Shared request rate limit for backfills
+HL_BACKFILL_FLUSH_WINDOWS = 20  # 5000-candle windows buffered between store writes/checkpoints
+
 #CopyBot Settings
 FILTER_MODE = "Dynamic"
 PERCENTAGE_THRESHOLD = 0.01
@@ -91,6 +150,7 @@ ACTIVITY_WINDOW_HOURS = 1
 ENABLE_PERCENTAGE_FILTER = False
 ENABLE_AMOUNT_FILTER = False
 ENABLE_ACTIVITY_FILTER = False
+WALLET_ACTIVITY_MAX_PAGES = 10  # Max pages (100 txs each) fetched per wallet activity poll
 
 # Model override settings for CopyBot
 COPYBOT_MODEL_OVERRIDE = "deepseek-reasoner"
@@ -100,6 +160,12 @@ COPYBOT_AUTO_SELL_REMOVED_TOKENS = True  # Auto-sell removed tokens
 COPYBOT_WALLET_ACTION_WEIGHT = 0.6
 COPYBOT_MIN_CONFIDENCE = 75
 COPYBOT_MIRROR_EXACT_PERCENTAGE = True  # Mirror exact percentage changes from tracked wallets
+COPYBOT_BATCH_EXECUTION = True  # Prefetch Jupiter quotes for all pending trades and submit them in parallel
+COPYBOT_BATCH_MAX_WORKERS = 5  # Max concurrent quote/swap requests per batch
+COPYBOT_MAX_PRICE_IMPACT_PCT = 5.0  # Reject batched trades whose quoted price impact exceeds this %
+COPYBOT_MAX_SLIPPAGE_BPS = 300  # Reject batched orders whose worst-case fill is further below the quote (0 = the trade's own slippage)
+COPYBOT_BATCH_ANALYSIS = True  # Analyze changed tokens together in one JSON-schema LLM request
+COPYBOT_BATCH_ANALYSIS_SIZE = 5  # Max tokens per batched analysis request
 
 # CopyBot Portfolio Analysis Prompt - The AI prompt template for analysis
 PORTFOLIO_ANALYSIS_PROMPT = """
@@ -124,13 +190,13 @@ Analysis Criteria:
 
 Respond in this exact format:
 1. First line must be one of: BUY, SELL, or NOTHING (in caps)
-2. Then explain your reasoning, including:
+2. Second line must be "Confidence: X%" where X is 0-100
+3. Then explain your reasoning, including:
    - Position analysis
    - Technical analysis
    - Volume profile
    - Risk assessment
    - Market conditions
-   - Confidence level (as a percentage, e.g. 75%)
 
 Remember: 
 - Do not worry about the low position size of the copybot, but more so worry about the size vs the others in the portfolio. this copy bot acts as a scanner for you to see what type of opportunties are out there and trending. 
@@ -193,6 +259,9 @@ MAX_GAIN_USD = 25.0# Maximum gain in USD before stopping trading
 MAX_LOSS_PERCENT = 23# Maximum loss as percentage (e.g., 20 = 20% loss)
 MAX_GAIN_PERCENT = 500# Maximum gain as percentage (e.g., 50 = 50% gain)
 
+# Drawdown limit (percent drop from the peak daily balance log of the last MAX_LOSS_GAIN_CHECK_HOURS, 0 disables)
+MAX_DRAWDOWN_PERCENT = 0
+
 # USD MINIMUM BALANCE RISK CONTROL
 MINIMUM_BALANCE_USD = 108.0# account_balance * (1/3): If balance falls below this, risk agent will consider closing all positions
 
@@ -207,6 +276,7 @@ RISK_CHECK_INTERVAL_MINUTES = 10
 RISK_LOSS_CONFIDENCE_THRESHOLD = 77# Minimum confidence to override max loss limits (0-100)
 RISK_GAIN_CONFIDENCE_THRESHOLD = 70# Minimum confidence to override max gain limits (0-100)
 RISK_CONTINUOUS_MODE = False# When True, Risk Agent runs continuously instead of on interval
+RISK_STREAMING_ENABLED = True# Re-check limits on every fetched price of a held token between interval checks
 USE_AI_CONFIRMATION = True#risk agent ai confirmation
 
 # 🛡️ Risk Override Prompt - The Secret Sauce!
@@ -362,6 +432,14 @@ FIBONACCI_LOOKBACK_PERIODS = 60 # How far back to look for swing high/low points
 # Chart Analysis AI Settings
 CHART_MODEL_OVERRIDE = "deepseek-reasoner"
 CHART_DEEPSEEK_BASE_URL = "https://api.deepseek.com"  # Base URL for DeepSeek API
+CHART_BATCH_ANALYSIS = True  # Analyze several symbol/timeframe charts in one JSON-schema LLM request
+CHART_BATCH_ANALYSIS_SIZE = 5  # Max charts per batched analysis request
+CHART_PIPELINE_ENABLED = True  # Overlap fetch, indicator and LLM stages across all symbol/timeframe jobs
+CHART_PIPELINE_FETCH_WORKERS = 4  # Concurrent candle downloads (I/O bound)
+CHART_PIPELINE_INDICATOR_WORKERS = 2  # Concurrent indicator/prompt-context computations
+CHART_PIPELINE_LLM_WORKERS = 2  # Concurrent LLM analysis requests
+CHART_RENDER_WORKERS = 1  # Background processes rendering chart PNGs when the Charts tab asks for them
+CHART_ACCURACY_WINDOW = 20  # Recent evaluated recommendations behind the rolling accuracy
 ENABLE_CHART_ANALYSIS = True
 
 # Voice Announcement Settings for Chart Agent
@@ -403,6 +481,23 @@ For optimal entry price calculation:
 Make your own independent assessment but factor in the performance of previous recommendations.
 """
 
+# Shared instructions for batched chart analysis (JSON response format is appended automatically)
+CHART_BATCH_ANALYSIS_PROMPT = """
+Analyze the chart data for each symbol/timeframe below independently.
+
+Remember:
+- Look for confluence between multiple indicators
+- Volume should confirm price action
+- Longer timeframes (4h, 1d, 1w) are better for DCA/staking strategies; focus on the major trend and ignore short-term noise
+- Higher confidence is needed for longer timeframe signals
+- If a previous recommendation is provided, consider how price moved since and avoid flip-flopping between BUY/SELL without clear reason
+
+For entry_price:
+- For BUY: Look for support levels (EMAs, recent lows) and adjust using ATR
+- For SELL: Look for resistance levels (EMAs, recent highs) and adjust using ATR
+- Provide a specific price number, not a range
+"""
+
 
 # Future variables (not active yet) 🔮
 sell_at_multiple = 3
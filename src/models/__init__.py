@@ -3,13 +3,27 @@
 Built with love by Moon Dev 🚀
 """
 
+import importlib
+
 from .base_model import BaseModel, ModelResponse
-from .claude_model import ClaudeModel
-from .groq_model import GroqModel
-from .openai_model import OpenAIModel
-from .gemini_model import GeminiModel
-from .deepseek_model import DeepSeekModel
 from .model_factory import model_factory
+from .model_router import model_router
+
+# Provider implementations are imported on first access so importing the
+# package does not pull in every provider SDK
+_LAZY_EXPORTS = {
+    'ClaudeModel': '.claude_model',
+    'GroqModel': '.groq_model',
+    'OpenAIModel': '.openai_model',
+    'GeminiModel': '.gemini_model',
+    'DeepSeekModel': '.deepseek_model',
+    'LocalModel': '.local_model',
+}
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'BaseModel',
@@ -19,5 +33,7 @@ __all__ = [
     'OpenAIModel',
     'GeminiModel',
     'DeepSeekModel',
-    'model_factory'
-] 
\ No newline at end of file
+    'LocalModel',
+    'model_factory',
+    'model_router'
+]
@@ -7,8 +7,9 @@ This module defines the base interface for all AI models.
 
 from abc import ABC, abstractmethod
 import sys
-from typing import Dict, List, Optional, Any, TypeVar, Union
+from typing import Dict, Iterator, List, Optional, Any, TypeVar, Union
 from dataclasses import dataclass
+from concurrent.futures import Future
 
 # Handle Self type annotation in a version-compatible way
 if sys.version_info >= (3, 11):
@@ -24,6 +25,9 @@ class ModelResponse:
     raw_response: Any  # Original response object
     model_name: str
     usage: Optional[Dict] = None
+    # Set when content is only a streamed decision: resolves to the full text once
+    # the rest has streamed in (None if it never completes)
+    completion: Optional[Future] = None
     
 class BaseModel(ABC):
     """Base interface for all AI models"""
@@ -49,6 +53,17 @@ class BaseModel(ABC):
         """Generate a response from the model"""
         pass
     
+    def stream_response(self,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> Iterator[str]:
+        """Yield the response text in chunks (closing the iterator ends the request).
+        Models without native streaming yield the whole response as one chunk."""
+        yield self.generate_response(system_prompt, user_content, temperature=temperature, max_tokens=max_tokens, **kwargs).content
+    
     @abstractmethod
     def is_available(self) -> bool:
         """Check if the model is available and properly configured"""
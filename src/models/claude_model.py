@@ -4,6 +4,7 @@ Built with love by Anarcho Capital 🚀
 """
 
 from anthropic import Anthropic
+from typing import Iterator
 from termcolor import cprint
 from .base_model import BaseModel, ModelResponse
 
@@ -23,7 +24,7 @@ class ClaudeModel(BaseModel):
     def initialize_client(self, **kwargs) -> None:
         """Initialize the Anthropic client"""
         try:
-            self.client = Anthropic(api_key=self.api_key)
+            self.client = Anthropic(api_key=self.api_key, http_client=kwargs.get('http_client'))
             cprint(f"✨ Initialized Claude model: {self.model_name}", "green")
         except Exception as e:
             cprint(f"❌ Failed to initialize Claude model: {str(e)}", "red")
@@ -52,13 +53,40 @@ class ClaudeModel(BaseModel):
                 content=response.content[0].text.strip(),
                 raw_response=response,
                 model_name=self.model_name,
-                usage={"completion_tokens": response.usage.output_tokens}
+                usage={
+                    "prompt_tokens": response.usage.input_tokens,
+                    "completion_tokens": response.usage.output_tokens
+                }
             )
             
         except Exception as e:
             cprint(f"❌ Claude generation error: {str(e)}", "red")
             raise
     
+    def stream_response(self,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> Iterator[str]:
+        """Stream response text from Claude (closing the iterator ends the request)"""
+        try:
+            with self.client.messages.stream(
+                model=self.model_name,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_content}
+                ]
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            cprint(f"❌ Claude streaming error: {str(e)}", "red")
+            raise
+    
     def is_available(self) -> bool:
         """Check if Claude is available"""
         return self.client is not None
@@ -4,6 +4,7 @@ Built with love by Anarcho Capital 🚀
 """
 
 from openai import OpenAI
+from typing import Iterator
 from termcolor import cprint
 from .base_model import BaseModel, ModelResponse
 
@@ -26,7 +27,8 @@ class DeepSeekModel(BaseModel):
         try:
             self.client = OpenAI(
                 api_key=self.api_key,
-                base_url=self.base_url
+                base_url=self.base_url,
+                http_client=kwargs.get('http_client')
             )
             cprint(f"✨ Initialized DeepSeek model: {self.model_name}", "green")
         except Exception as e:
@@ -64,6 +66,35 @@ class DeepSeekModel(BaseModel):
             cprint(f"❌ DeepSeek generation error: {str(e)}", "red")
             raise
     
+    def stream_response(self,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> Iterator[str]:
+        """Stream response text from DeepSeek (closing the iterator ends the request)"""
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+        except Exception as e:
+            cprint(f"❌ DeepSeek streaming error: {str(e)}", "red")
+            raise
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+    
     def is_available(self) -> bool:
         """Check if DeepSeek is available"""
         return self.client is not None
@@ -0,0 +1,114 @@
+"""
+🌙 Anarcho Capital's Instrumented Model
+Built with love by Anarcho Capital 🚀
+
+Wraps a model so every call, plain or streamed, is retried on transient
+failures (LLM_MAX_RETRIES) and records latency, tokens, retries and errors
+for the calling agent.
+"""
+
+import time
+from typing import Iterator
+from .base_model import ModelResponse
+from src.scripts.llm_metrics import llm_metrics
+from src.scripts.logger import warning
+
+class InstrumentedModel:
+    """Per-agent view of a shared model that records call metrics"""
+
+    def __init__(self, model, agent: str, max_retries: int = 0, retry_delay: float = 1.0):
+        self._model = model
+        self.agent = agent
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def generate_response(self,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> ModelResponse:
+        """Generate a response, retrying transient failures and recording metrics"""
+        start = time.time()
+        retries = 0
+        while True:
+            try:
+                response = self._model.generate_response(
+                    system_prompt, user_content, temperature=temperature, max_tokens=max_tokens, **kwargs
+                )
+                break
+            except Exception as e:
+                if retries >= self.max_retries:
+                    llm_metrics.record_call(
+                        self.agent, self._model.model_name, time.time() - start,
+                        retries=retries, success=False, error=f"{type(e).__name__}: {str(e)}"
+                    )
+                    raise
+                retries += 1
+                warning(f"{self._model.model_name} call failed ({str(e)}), retry {retries}/{self.max_retries}")
+                time.sleep(self.retry_delay * retries)
+
+        usage = getattr(response, 'usage', None) or {}
+        prompt_tokens = usage.get('prompt_tokens') or usage.get('input_tokens')
+        completion_tokens = usage.get('completion_tokens') or usage.get('output_tokens')
+        if prompt_tokens is None:
+            prompt_tokens = (len(system_prompt or '') + len(user_content or '')) // 4
+        if completion_tokens is None:
+            completion_tokens = len(getattr(response, 'content', '') or '') // 4
+
+        llm_metrics.record_call(
+            self.agent, self._model.model_name, time.time() - start,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, retries=retries
+        )
+        return response
+
+    def stream_response(self,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Stream a response, retrying failures that happen before the first chunk and
+        recording metrics when the stream ends or is closed early
+
+        Once a chunk has been handed to the caller a failure is raised as is; the
+        caller may already have acted on the partial text.
+        """
+        start = time.time()
+        received = []
+        failure = None
+        retries = 0
+        try:
+            while True:
+                chunks = self._model.stream_response(
+                    system_prompt, user_content, temperature=temperature, max_tokens=max_tokens, **kwargs
+                )
+                try:
+                    for chunk in chunks:
+                        received.append(chunk)
+                        yield chunk
+                    break
+                except Exception as e:
+                    if received or retries >= self.max_retries:
+                        failure = f"{type(e).__name__}: {str(e)}"
+                        raise
+                    retries += 1
+                    warning(f"{self._model.model_name} stream failed ({str(e)}), retry {retries}/{self.max_retries}")
+                    time.sleep(self.retry_delay * retries)
+                finally:
+                    # Closing this generator closes the provider's stream with it
+                    if hasattr(chunks, 'close'):
+                        chunks.close()
+        finally:
+            llm_metrics.record_call(
+                self.agent, self._model.model_name, time.time() - start,
+                prompt_tokens=(len(system_prompt or '') + len(user_content or '')) // 4,
+                completion_tokens=len(''.join(received)) // 4,
+                retries=retries, success=failure is None, error=failure
+            )
@@ -0,0 +1,188 @@
+"""
+🌙 Anarcho Capital's Local Simulation Model
+Built with love by Anarcho Capital 🚀
+
+Offline stand-in for load-testing agent cycles. Responses are derived from a
+hash of the prompt and the numeric features it contains, so the same prompt
+always gets the same schema-valid answer. Latency and failures are simulated.
+"""
+
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Iterator
+from .base_model import BaseModel, ModelResponse
+
+# key=value features written by src.scripts.prompt_features
+FEATURE_PATTERN = re.compile(r"\b(rsi|ret5|ret20|z20|d_sma200|d_ema50|range_pos|close)=(-?\d+(?:\.\d+)?(?:e-?\d+)?)")
+BATCH_TOKEN_PATTERN = re.compile(r"^### TOKEN (\S+)", re.MULTILINE)
+DEFAULT_PROTOCOLS = ["marinade", "lido", "jito"]
+STREAM_CHUNK_CHARS = 16
+
+class LocalModel(BaseModel):
+    """Deterministic local model with simulated latency and failure rate"""
+
+    AVAILABLE_MODELS = {
+        "local-sim": "Deterministic offline stand-in for load tests"
+    }
+
+    def __init__(self, api_key: str = "local", model_name: str = "local-sim",
+                 latency_seconds: float = 0.0, latency_jitter_seconds: float = 0.0,
+                 failure_rate: float = 0.0, seed: int = 42, **kwargs):
+        self.model_name = model_name
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        super().__init__(api_key, **kwargs)
+
+    def initialize_client(self, **kwargs) -> None:
+        """No remote client; the model is always ready"""
+        self.client = True
+
+    def configure(self, latency_seconds=None, latency_jitter_seconds=None, failure_rate=None, seed=None):
+        """Change the simulated latency and failure settings"""
+        if latency_seconds is not None:
+            self.latency_seconds = latency_seconds
+        if latency_jitter_seconds is not None:
+            self.latency_jitter_seconds = latency_jitter_seconds
+        if failure_rate is not None:
+            self.failure_rate = failure_rate
+        if seed is not None:
+            with self._rng_lock:
+                self._rng.seed(seed)
+
+    def _simulate_call(self):
+        with self._rng_lock:
+            jitter = self._rng.uniform(0, self.latency_jitter_seconds) if self.latency_jitter_seconds > 0 else 0.0
+            fail = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+        delay = self.latency_seconds + jitter
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise RuntimeError("Simulated local model failure")
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.sha256(text.encode('utf-8')).digest()
+
+    @staticmethod
+    def _decide(text: str, digest: bytes):
+        """Pick an action and confidence from the prompt's features (hash breaks ties)"""
+        features = {name: float(value) for name, value in FEATURE_PATTERN.findall(text)}
+        score = 0.0
+        if 'rsi' in features:
+            score += 1 if features['rsi'] < 30 else -1 if features['rsi'] > 70 else 0
+        for name in ('ret5', 'ret20', 'd_sma200', 'd_ema50'):
+            if name in features:
+                score += 0.5 if features[name] > 0 else -0.5
+        upper = text.upper()
+        if 'HAS JUST BOUGHT' in upper:
+            score += 1
+        elif 'HAS SOLD' in upper:
+            score -= 1
+
+        if not features and score == 0:
+            action = ("BUY", "SELL", "NOTHING")[digest[0] % 3]
+        else:
+            action = "BUY" if score >= 1 else "SELL" if score <= -1 else "NOTHING"
+        confidence = min(95, 50 + int(abs(score) * 10) + digest[1] % 20)
+        entry_price = round(features['close'] * 0.99, 8) if 'close' in features and action == "BUY" else None
+        return action, confidence, entry_price
+
+    def _batch_response(self, prompt: str) -> str:
+        tokens = BATCH_TOKEN_PATTERN.findall(prompt)
+        blocks = re.split(r"^### TOKEN \S+", prompt, flags=re.MULTILINE)[1:]
+        items = []
+        for token, block in zip(tokens, blocks):
+            action, confidence, entry_price = self._decide(block, self._digest(token + block))
+            items.append({
+                "token": token,
+                "action": action,
+                "confidence": confidence,
+                "entry_price": entry_price,
+                "reasoning": f"Simulated {action.lower()} decision from prompt features.",
+            })
+        return json.dumps(items)
+
+    def _build_content(self, system_prompt: str, prompt: str) -> str:
+        digest = self._digest((system_prompt or '') + prompt)
+
+        if BATCH_TOKEN_PATTERN.search(prompt):
+            return self._batch_response(prompt)
+
+        if "RESPECT_LIMIT" in (system_prompt or '') + prompt:
+            action, confidence, _ = self._decide(prompt, digest)
+            decision = "OVERRIDE" if action == "BUY" else "RESPECT_LIMIT"
+            return f"{decision}\nSimulated risk assessment. {confidence}% confidence in this decision."
+
+        if "CLOSE_ALL" in prompt:
+            decision = "CLOSE_ALL" if digest[0] % 2 else "HOLD_POSITIONS"
+            return f"{decision}\nSimulated breach assessment."
+
+        if "PROTOCOL:" in prompt:
+            match = re.search(r"Current staking protocols:\s*(.+)", prompt)
+            protocols = [p.strip() for p in match.group(1).split(',')] if match else DEFAULT_PROTOCOLS
+            return "\n".join([
+                f"PROTOCOL: {protocols[digest[0] % len(protocols)]}",
+                f"ALLOCATION: {10 + digest[1] % 50}%",
+                f"CONVERT: {'YES' if digest[2] % 2 else 'NO'}",
+                f"COMPOUND: {('daily', 'weekly', 'monthly')[digest[3] % 3]}",
+                "REASONING: Simulated staking advice.",
+            ])
+
+        action, confidence, _ = self._decide(prompt, digest)
+        return f"{action}\nSimulated analysis from prompt features.\nConfidence: {confidence}%"
+
+    def generate_response(self,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> ModelResponse:
+        """Generate a deterministic response after the simulated latency"""
+        self._simulate_call()
+        content = self._build_content(system_prompt, user_content or '')
+        return ModelResponse(
+            content=content,
+            raw_response=None,
+            model_name=self.model_name,
+            usage={
+                "prompt_tokens": (len(system_prompt or '') + len(user_content or '')) // 4,
+                "completion_tokens": len(content) // 4,
+            }
+        )
+
+    def stream_response(self,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> Iterator[str]:
+        """Stream the deterministic response in small chunks, spreading the simulated latency"""
+        with self._rng_lock:
+            jitter = self._rng.uniform(0, self.latency_jitter_seconds) if self.latency_jitter_seconds > 0 else 0.0
+            fail = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+        if fail:
+            raise RuntimeError("Simulated local model failure")
+        content = self._build_content(system_prompt, user_content or '')
+        chunks = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)] or ['']
+        delay = (self.latency_seconds + jitter) / len(chunks)
+        for chunk in chunks:
+            if delay > 0:
+                time.sleep(delay)
+            yield chunk
+    
+    def is_available(self) -> bool:
+        """The local model is always available"""
+        return True
+
+    @property
+    def model_type(self) -> str:
+        return "local"
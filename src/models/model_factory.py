@@ -3,196 +3,209 @@
 Built with love by Moon Dev 🚀
 
 This module manages all available AI models and provides a unified interface.
+Models are created lazily on the first get_model call and cached for the life
+of the process; OpenAI-compatible and Anthropic clients share one pooled
+HTTP connection pool.
 """
 
 import os
-from typing import Dict, Optional, Type
-from termcolor import cprint
+import importlib
+import threading
+from typing import Dict, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 from .base_model import BaseModel
-from .claude_model import ClaudeModel
-from .groq_model import GroqModel
-from .openai_model import OpenAIModel
-from .gemini_model import GeminiModel
-from .deepseek_model import DeepSeekModel
+from .instrumented_model import InstrumentedModel
+from src import config
+from src.scripts.logger import debug, info, warning, error
 
 class ModelFactory:
     """Factory for creating and managing AI models"""
-    
-    # Map model types to their implementations
+
+    # Map model types to their implementations (module, class), imported on first use
     MODEL_IMPLEMENTATIONS = {
-        "claude": ClaudeModel,
-        "groq": GroqModel,
-        "openai": OpenAIModel,
-        "gemini": GeminiModel,
-        "deepseek": DeepSeekModel
+        "claude": (".claude_model", "ClaudeModel"),
+        "groq": (".groq_model", "GroqModel"),
+        "openai": (".openai_model", "OpenAIModel"),
+        "gemini": (".gemini_model", "GeminiModel"),
+        "deepseek": (".deepseek_model", "DeepSeekModel"),
+        "local": (".local_model", "LocalModel")
     }
-    
+
     # Default models for each type
     DEFAULT_MODELS = {
         "claude": "claude-3-5-haiku-latest",  # Latest fast Claude model
         "groq": "mixtral-8x7b-32768",        # Fast Mixtral model
         "openai": "gpt-4o",                  # Latest GPT-4 Optimized
         "gemini": "gemini-2.0-flash-exp",    # Latest Gemini model
-        "deepseek": "deepseek-chat"          # Fast chat model
+        "deepseek": "deepseek-chat",         # Fast chat model
+        "local": "local-sim"                 # Offline load-test stand-in
     }
-    
+
+    # Model types whose SDK clients accept a shared httpx client
+    POOLED_MODEL_TYPES = {"claude", "openai", "deepseek"}
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        # One factory per process so every agent shares the same clients
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+        return cls._instance
+
     def __init__(self):
-        cprint("\n🏗️ Creating new ModelFactory instance...", "cyan")
-        
+        if self._initialized:
+            return
+
         # Load environment variables first
         project_root = Path(__file__).parent.parent.parent
-        env_path = project_root / '.env'
-        cprint(f"\n🔍 Loading environment from: {env_path}", "cyan")
-        load_dotenv(dotenv_path=env_path)
-        cprint("✨ Environment loaded", "green")
-        
-        self._models: Dict[str, BaseModel] = {}
-        self._initialize_models()
-    
-    def _initialize_models(self):
-        """Initialize all available models"""
-        initialized = False
-        
-        cprint("\n🏭 Moon Dev's Model Factory Initialization", "cyan")
-        cprint("═" * 50, "cyan")
-        
-        # Debug current environment without exposing values
-        cprint("\n🔍 Environment Check:", "cyan")
-        for key in ["GROQ_API_KEY", "OPENAI_KEY", "ANTHROPIC_KEY", "GEMINI_KEY", "DEEPSEEK_KEY"]:
-            value = os.getenv(key)
-            if value and len(value.strip()) > 0:
-                cprint(f"  ├─ {key}: Found ({len(value)} chars)", "green")
-            else:
-                cprint(f"  ├─ {key}: Not found or empty", "red")
-        
-        # Try to initialize each model type
-        for model_type, key_name in self._get_api_key_mapping().items():
-            cprint(f"\n🔄 Initializing {model_type} model...", "cyan")
-            cprint(f"  ├─ Looking for {key_name}...", "cyan")
-            
-            if api_key := os.getenv(key_name):
-                try:
-                    cprint(f"  ├─ Found {key_name} ({len(api_key)} chars)", "green")
-                    cprint(f"  ├─ Getting model class for {model_type}...", "cyan")
-                    
-                    if model_type not in self.MODEL_IMPLEMENTATIONS:
-                        cprint(f"  ├─ ❌ Model type not found in implementations!", "red")
-                        cprint(f"  └─ Available implementations: {list(self.MODEL_IMPLEMENTATIONS.keys())}", "yellow")
-                        continue
-                    
-                    model_class = self.MODEL_IMPLEMENTATIONS[model_type]
-                    cprint(f"  ├─ Using model class: {model_class.__name__}", "cyan")
-                    cprint(f"  ├─ Model class methods: {dir(model_class)}", "cyan")
-                    
-                    # Create instance with more detailed error handling
-                    try:
-                        cprint(f"  ├─ Creating model instance...", "cyan")
-                        cprint(f"  ├─ Default model name: {self.DEFAULT_MODELS[model_type]}", "cyan")
-                        model_instance = model_class(api_key)
-                        cprint(f"  ├─ Model instance created", "green")
-                        
-                        # Test if instance is properly initialized
-                        cprint(f"  ├─ Testing model availability...", "cyan")
-                        if model_instance.is_available():
-                            self._models[model_type] = model_instance
-                            initialized = True
-                            cprint(f"  └─ ✨ Successfully initialized {model_type}", "green")
-                        else:
-                            cprint(f"  └─ ⚠️ Model instance created but not available", "yellow")
-                            cprint(f"  └─ Client status: {model_instance.client}", "yellow")
-                    except Exception as instance_error:
-                        cprint(f"  ├─ ⚠️ Error creating model instance", "yellow")
-                        cprint(f"  ├─ Error type: {type(instance_error).__name__}", "yellow")
-                        cprint(f"  ├─ Error message: {str(instance_error)}", "yellow")
-                        if hasattr(instance_error, '__traceback__'):
-                            import traceback
-                            cprint(f"  └─ Traceback:\n{traceback.format_exc()}", "yellow")
-                        
-                except Exception as e:
-                    cprint(f"  ├─ ⚠️ Failed to initialize {model_type} model", "yellow")
-                    cprint(f"  ├─ Error type: {type(e).__name__}", "yellow")
-                    cprint(f"  ├─ Error message: {str(e)}", "yellow")
-                    if hasattr(e, '__traceback__'):
-                        import traceback
-                        cprint(f"  └─ Traceback:\n{traceback.format_exc()}", "yellow")
-            else:
-                cprint(f"  └─ ℹ️ {key_name} not found", "blue")
-        
-        cprint("\n" + "═" * 50, "cyan")
-        cprint(f"📊 Initialization Summary:", "cyan")
-        cprint(f"  ├─ Models attempted: {len(self._get_api_key_mapping())}", "cyan")
-        cprint(f"  ├─ Models initialized: {len(self._models)}", "cyan")
-        cprint(f"  └─ Available models: {list(self._models.keys())}", "cyan")
-        
-        if not initialized:
-            cprint("\n⚠️ No AI models available - check API keys", "yellow")
-            cprint("Required environment variables:", "yellow")
-            for model_type, key_name in self._get_api_key_mapping().items():
-                cprint(f"  ├─ {key_name} (for {model_type})", "yellow")
-            cprint("  └─ Add these to your .env file 🌙", "yellow")
-        else:
-            # Print available models
-            cprint("\n🤖 Available AI Models:", "cyan")
-            for model_type, model in self._models.items():
-                cprint(f"  ├─ {model_type}: {model.model_name}", "green")
-            cprint("  └─ Moon Dev's Model Factory Ready! 🌙", "green")
-    
-    def get_model(self, model_type: str, model_name: Optional[str] = None) -> Optional[BaseModel]:
-        """Get a specific model instance"""
-        cprint(f"\n🔍 Requesting model: {model_type} ({model_name or 'default'})", "cyan")
-        
+        load_dotenv(dotenv_path=project_root / '.env')
+
+        self._models: Dict[tuple, BaseModel] = {}
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._initialized = True
+
+    def _get_http_client(self):
+        """Get the shared pooled HTTP client, creating it on first use"""
+        if self._http_client is None:
+            import httpx
+            self._http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                timeout=httpx.Timeout(120.0, connect=10.0)
+            )
+        return self._http_client
+
+    def _get_model_class(self, model_type: str):
+        """Import and return the implementation class for a model type"""
+        module_name, class_name = self.MODEL_IMPLEMENTATIONS[model_type]
+        module = importlib.import_module(module_name, package=__package__)
+        return getattr(module, class_name)
+
+    @staticmethod
+    def model_type_for(model_name: str) -> Optional[str]:
+        """Infer the model type from a model name (e.g. 'deepseek-reasoner' -> 'deepseek')"""
+        name = (model_name or "").lower()
+        if name.startswith("claude"):
+            return "claude"
+        if name.startswith("deepseek"):
+            return "deepseek"
+        if name.startswith(("gpt-", "o1")):
+            return "openai"
+        if name.startswith("gemini"):
+            return "gemini"
+        if name.startswith(("mixtral", "llama", "gemma")):
+            return "groq"
+        if name.startswith("local"):
+            return "local"
+        return None
+
+    def get_model(self, model_type: str, model_name: Optional[str] = None,
+                  base_url: Optional[str] = None, agent: Optional[str] = None):
+        """Get a model for an agent, creating its client on first request (calls are instrumented)"""
+        model = self._get_shared_model(model_type, model_name, base_url)
+        if model is None:
+            return None
+        return InstrumentedModel(
+            model, agent or "unknown",
+            max_retries=getattr(config, 'LLM_MAX_RETRIES', 0),
+            retry_delay=getattr(config, 'LLM_RETRY_DELAY_SECONDS', 1.0)
+        )
+
+    def _get_shared_model(self, model_type: str, model_name: Optional[str] = None,
+                          base_url: Optional[str] = None) -> Optional[BaseModel]:
+        """Get the shared model instance, creating its client on first request"""
         if model_type not in self.MODEL_IMPLEMENTATIONS:
-            cprint(f"❌ Invalid model type: '{model_type}'", "red")
-            cprint("Available types:", "yellow")
-            for available_type in self.MODEL_IMPLEMENTATIONS.keys():
-                cprint(f"  ├─ {available_type}", "yellow")
+            error(f"Invalid model type: '{model_type}' (available: {list(self.MODEL_IMPLEMENTATIONS.keys())})")
             return None
-            
-        if model_type not in self._models:
+
+        model_name = model_name or self.DEFAULT_MODELS[model_type]
+        key = (model_type, model_name, base_url)
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
             key_name = self._get_api_key_mapping()[model_type]
-            cprint(f"❌ Model type '{model_type}' not available - check {key_name} in .env", "red")
+            api_key = os.getenv(key_name) if key_name else model_type
+            if not api_key:
+                warning(f"Model type '{model_type}' not available - check {key_name} in .env")
+                return None
+
+            kwargs = {}
+            if model_type in self.POOLED_MODEL_TYPES:
+                kwargs['http_client'] = self._get_http_client()
+            if model_type == "local":
+                kwargs.update(
+                    latency_seconds=getattr(config, 'LOCAL_MODEL_LATENCY_SECONDS', 0.0),
+                    latency_jitter_seconds=getattr(config, 'LOCAL_MODEL_LATENCY_JITTER_SECONDS', 0.0),
+                    failure_rate=getattr(config, 'LOCAL_MODEL_FAILURE_RATE', 0.0),
+                    seed=getattr(config, 'LOCAL_MODEL_SEED', 42)
+                )
+            if base_url:
+                kwargs['base_url'] = base_url
+
+            try:
+                model = self._get_model_class(model_type)(api_key, model_name=model_name, **kwargs)
+            except Exception as e:
+                error(f"Failed to initialize {model_type} model {model_name}: {type(e).__name__}: {str(e)}")
+                return None
+
+            if not model.is_available():
+                warning(f"{model_type} model {model_name} created but not available")
+                return None
+
+            self._models[key] = model
+            debug(f"Initialized {model_type} model {model_name}", file_only=True)
+            return model
+
+    def get_model_for(self, model_name: str, base_url: Optional[str] = None, agent: Optional[str] = None):
+        """Get a model by model name, inferring its type"""
+        model_type = self.model_type_for(model_name)
+        if model_type is None:
+            error(f"Cannot determine provider for model: {model_name}")
             return None
-            
-        model = self._models[model_type]
-        if model_name and model.model_name != model_name:
-            cprint(f"🔄 Reinitializing {model_type} with model {model_name}...", "cyan")
-            # Create new instance with specified model name
-            if api_key := os.getenv(self._get_api_key_mapping()[model_type]):
-                try:
-                    model = self.MODEL_IMPLEMENTATIONS[model_type](api_key, model_name=model_name)
-                    self._models[model_type] = model
-                    cprint(f"✨ Successfully reinitialized with new model", "green")
-                except Exception as e:
-                    cprint(f"❌ Failed to initialize {model_type} with model {model_name}", "red")
-                    cprint(f"❌ Error type: {type(e).__name__}", "red")
-                    cprint(f"❌ Error: {str(e)}", "red")
-                    return None
-            
-        return model
-    
-    def _get_api_key_mapping(self) -> Dict[str, str]:
-        """Get mapping of model types to their API key environment variable names"""
+        return self.get_model(model_type, model_name, base_url, agent=agent)
+
+    def _get_api_key_mapping(self) -> Dict[str, Optional[str]]:
+        """Get mapping of model types to their API key environment variable names (None = no key needed)"""
         return {
             "claude": "ANTHROPIC_KEY",
             "groq": "GROQ_API_KEY",
             "openai": "OPENAI_KEY",
             "gemini": "GEMINI_KEY",
-            "deepseek": "DEEPSEEK_KEY"
+            "deepseek": "DEEPSEEK_KEY",
+            "local": None
         }
-    
+
     @property
     def available_models(self) -> Dict[str, list]:
-        """Get all available models and their configurations"""
+        """Get the known models for every model type with an API key configured"""
         return {
-            model_type: model.AVAILABLE_MODELS
-            for model_type, model in self._models.items()
+            model_type: self._get_model_class(model_type).AVAILABLE_MODELS
+            for model_type in self.MODEL_IMPLEMENTATIONS
+            if self.is_model_available(model_type)
         }
-    
+
     def is_model_available(self, model_type: str) -> bool:
-        """Check if a specific model type is available"""
-        return model_type in self._models and self._models[model_type].is_available()
+        """Check if a specific model type is configured (without creating its client)"""
+        if model_type not in self.MODEL_IMPLEMENTATIONS:
+            return False
+        key_name = self._get_api_key_mapping()[model_type]
+        if key_name is None:
+            return True
+        api_key = os.getenv(key_name)
+        return bool(api_key and api_key.strip())
+
+    def log_status(self):
+        """Log which providers are configured and which clients have been created"""
+        configured = [t for t in self.MODEL_IMPLEMENTATIONS if self.is_model_available(t)]
+        created = [f"{t}:{name}" for (t, name, _) in self._models]
+        info(f"Model factory: configured {configured or 'none'}, initialized {created or 'none'}")
 
 # Create a singleton instance
-model_factory = ModelFactory() 
\ No newline at end of file
+model_factory = ModelFactory()
@@ -0,0 +1,198 @@
+"""
+🌙 Anarcho Capital's Hedged Model Router
+Built with love by Anarcho Capital 🚀
+
+Sends a request to the configured model and, if it has not answered after a
+per-agent delay, races a hedge request to a faster fallback model. The first
+valid answer wins, the losing request is streamed so it can be closed, and
+every decision is bounded by a per-agent deadline.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Optional
+from .base_model import ModelResponse
+from .model_factory import model_factory
+from .streaming import stream_decision, collect_stream
+from src import config
+from src.scripts.llm_metrics import llm_metrics
+from src.scripts.logger import debug, info, warning
+
+class HedgedModelRouter:
+    """Deadline-aware router that hedges slow requests across providers"""
+
+    def __init__(self, factory=None, max_workers: int = 8):
+        self.factory = factory or model_factory
+        # A losing request holds its worker until its next streamed chunk (or, for models
+        # without native streaming, until the provider returns)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+
+    def _setting(self, name: str, agent: str, default):
+        value = getattr(config, name, default)
+        if isinstance(value, dict):
+            return value.get(agent, value.get('default', default))
+        return value
+
+    def hedge_delay(self, agent: str) -> Optional[float]:
+        """Seconds to wait on the primary model before hedging (None disables hedging)"""
+        if not getattr(config, 'LLM_HEDGE_ENABLED', False):
+            return None
+        return self._setting('LLM_HEDGE_DELAY_SECONDS', agent, None)
+
+    def deadline(self, agent: str) -> Optional[float]:
+        """Hard upper bound in seconds on one decision for the agent (None = no bound)"""
+        return self._setting('LLM_DECISION_DEADLINE_SECONDS', agent, None)
+
+    def fallback_model(self, agent: str) -> Optional[str]:
+        return self._setting('LLM_HEDGE_FALLBACK_MODEL', agent, None)
+
+    def streaming_enabled(self, agent: str) -> bool:
+        """Whether the agent's decisions are streamed and parsed incrementally"""
+        return bool(self._setting('LLM_STREAMING_ENABLED', agent, False))
+
+    def _get_model(self, model_name: str, base_url: Optional[str], agent: str):
+        if self.factory.model_type_for(model_name) == "deepseek" and base_url:
+            return self.factory.get_model("deepseek", model_name, base_url=base_url, agent=agent)
+        return self.factory.get_model_for(model_name, agent=agent)
+
+    def generate_response(self,
+        agent: str,
+        model_name: str,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        base_url: Optional[str] = None,
+        validate: Optional[Callable[[str], bool]] = None,
+        parser_factory: Optional[Callable] = None,
+        on_complete: Optional[Callable[[str], None]] = None
+    ) -> ModelResponse:
+        """
+        Get the first valid response from the primary model or its hedge
+
+        Args:
+            agent (str): Calling agent, used for per-agent settings and metrics
+            model_name (str): Primary model
+            base_url (str): Base URL for the primary model (OpenAI-compatible providers)
+            validate (callable): Returns True if a response's content is usable;
+                an invalid answer does not win the race
+            parser_factory (callable): Returns a DecisionStreamParser; when given and streaming
+                is enabled for the agent, each request returns as soon as its decision is parsed
+            on_complete (callable): Receives the winner's full text if its reasoning is still
+                streaming after the decision was returned
+
+        Returns:
+            ModelResponse: The winning response (model_name tells which model answered)
+
+        Raises:
+            TimeoutError: No valid answer arrived before the agent's deadline
+        """
+        primary = self._get_model(model_name, base_url, agent)
+        fallback_name = self.fallback_model(agent)
+        delay = self.hedge_delay(agent)
+        deadline = self.deadline(agent)
+
+        fallback = None
+        if delay is not None and fallback_name and fallback_name != model_name:
+            fallback = self._get_model(fallback_name, None, agent)
+        if primary is None:
+            if fallback is None:
+                raise ValueError(f"No AI client available for model: {model_name}")
+            warning(f"{model_name} unavailable, using hedge model {fallback_name}")
+            primary, fallback = fallback, None
+
+        winner = {}
+        winner_chosen = threading.Event()
+
+        def completion_for(name):
+            if on_complete is None:
+                return None
+            def forward(text):
+                # Only the winning request's reasoning reaches the agent
+                winner_chosen.wait(timeout=deadline or 300)
+                if winner.get('name') == name:
+                    on_complete(text)
+            return forward
+
+        # Set for every request that does not win, so its stream is closed at the next
+        # chunk instead of holding an executor worker until the provider finishes
+        cancel_events = {}
+
+        def call(model):
+            cancelled = cancel_events[model.model_name]
+            if parser_factory is not None and self.streaming_enabled(agent):
+                return stream_decision(
+                    model, system_prompt, user_content, parser_factory(),
+                    temperature=temperature, max_tokens=max_tokens,
+                    stop_early=getattr(config, 'LLM_STREAM_EARLY_STOP', False),
+                    on_complete=completion_for(model.model_name),
+                    cancelled=cancelled
+                )
+            if fallback is not None:
+                # A hedged request may lose, so read it as a stream that can be closed
+                return collect_stream(model, system_prompt, user_content, temperature=temperature,
+                                      max_tokens=max_tokens, cancelled=cancelled)
+            return model.generate_response(system_prompt, user_content, temperature=temperature, max_tokens=max_tokens)
+
+        for model in (primary, fallback):
+            if model is not None:
+                cancel_events[model.model_name] = threading.Event()
+
+        start = time.time()
+        futures = {self._executor.submit(call, primary): primary.model_name}
+        hedged = fallback is None
+        last_error = None
+
+        try:
+            while futures or not hedged:
+                elapsed = time.time() - start
+                if not hedged and (elapsed >= delay or not futures):
+                    info(f"{primary.model_name} has not answered after {elapsed:.1f}s, hedging with {fallback.model_name}")
+                    futures[self._executor.submit(call, fallback)] = fallback.model_name
+                    hedged = True
+                    continue
+
+                timeouts = []
+                if deadline is not None:
+                    timeouts.append(deadline - elapsed)
+                if not hedged:
+                    timeouts.append(delay - elapsed)
+                timeout = max(0.0, min(timeouts)) if timeouts else None
+                if deadline is not None and elapsed >= deadline:
+                    break
+
+                done, _ = wait(list(futures), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        last_error = e
+                        warning(f"{name} failed: {str(e)}")
+                        continue
+                    if validate is not None and not validate(response.content):
+                        last_error = ValueError(f"Invalid response from {name}")
+                        llm_metrics.record_parse_failure(agent, name, "Rejected by hedge validator")
+                        continue
+                    if name != primary.model_name:
+                        llm_metrics.record_event(agent, name, 'hedge_win', f"primary {primary.model_name}")
+                    debug(f"{agent}: {name} answered first after {time.time() - start:.1f}s", file_only=True)
+                    winner['name'] = name
+                    return response
+        finally:
+            winner_chosen.set()
+            # Drop queued requests and close the streams of those already in flight
+            for future in futures:
+                future.cancel()
+            for name, cancelled in cancel_events.items():
+                if name != winner.get('name'):
+                    cancelled.set()
+
+        if futures or (deadline is not None and time.time() - start >= deadline):
+            llm_metrics.record_event(agent, model_name, 'deadline', f"{deadline}s")
+            raise TimeoutError(f"No valid {agent} model response within {deadline}s")
+        raise last_error or RuntimeError(f"No valid {agent} model response")
+
+# Create a singleton instance
+model_router = HedgedModelRouter()
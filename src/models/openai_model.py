@@ -4,6 +4,7 @@ Built with love by Moon Dev 🚀
 """
 
 from openai import OpenAI
+from typing import Iterator
 from termcolor import cprint
 from .base_model import BaseModel, ModelResponse
 
@@ -33,15 +34,24 @@ class OpenAIModel(BaseModel):
     def initialize_client(self, **kwargs) -> None:
         """Initialize the OpenAI client"""
         try:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = OpenAI(api_key=self.api_key, http_client=kwargs.get('http_client'))
             cprint(f"✨ Initialized OpenAI model: {self.model_name}", "green")
         except Exception as e:
             cprint(f"❌ Failed to initialize OpenAI model: {str(e)}", "red")
             self.client = None
     
-    def generate_response(self, system_prompt, user_content, **kwargs):
+    def generate_response(self, 
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> ModelResponse:
         """Generate a response using the OpenAI model"""
         try:
+            kwargs['temperature'] = temperature
+            kwargs['max_tokens'] = max_tokens
+
             # Special handling for O1 models
             if self.model_name.startswith('o1'):
                 # Remove unsupported parameters for O1
@@ -76,12 +86,50 @@ class OpenAIModel(BaseModel):
                 **kwargs
             )
             
-            return response.choices[0].message
+            return ModelResponse(
+                content=response.choices[0].message.content.strip(),
+                raw_response=response,
+                model_name=self.model_name,
+                usage=response.usage.model_dump() if getattr(response, 'usage', None) else None
+            )
 
         except Exception as e:
             cprint(f"❌ OpenAI generation error: {str(e)}", "red")
             raise
     
+    def stream_response(self,
+        system_prompt: str,
+        user_content: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> Iterator[str]:
+        """Stream response text from OpenAI (closing the iterator ends the request)"""
+        # O1 models use different parameters; serve them as a single chunk
+        if self.model_name.startswith('o1'):
+            yield from super().stream_response(system_prompt, user_content, temperature, max_tokens, **kwargs)
+            return
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+        except Exception as e:
+            cprint(f"❌ OpenAI streaming error: {str(e)}", "red")
+            raise
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+    
     def is_available(self) -> bool:
         """Check if OpenAI is available"""
         return self.client is not None
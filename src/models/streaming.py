@@ -0,0 +1,176 @@
+"""
+🌙 Anarcho Capital's Streaming Decisions
+Built with love by Anarcho Capital 🚀
+
+Incrementally parses a streamed model response so agents can act on the
+decision (action + confidence) as soon as it is unambiguous, then either stop
+the stream or keep reading the reasoning in the background.
+"""
+
+import re
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+from .base_model import ModelResponse
+from src.scripts.logger import debug, warning
+
+DECISION_ACTIONS = ("BUY", "SELL", "NOTHING")
+CONFIDENCE_PATTERN = re.compile(r'confidence:?\s*(\d{1,3})\s*%|(\d{1,3})\s*%\s*confidence', re.IGNORECASE)
+
+
+class StreamCancelled(Exception):
+    """Raised when a stream is abandoned (e.g. it lost a hedge race)"""
+
+
+def collect_stream(model,
+    system_prompt: str,
+    user_content: str,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    cancelled: Optional[threading.Event] = None
+) -> ModelResponse:
+    """
+    Read a whole streamed response, closing the request as soon as `cancelled` is set
+
+    Raises:
+        StreamCancelled: The event was set before the response finished
+    """
+    chunks = model.stream_response(system_prompt, user_content, temperature=temperature, max_tokens=max_tokens)
+    received = []
+    try:
+        for chunk in chunks:
+            if cancelled is not None and cancelled.is_set():
+                raise StreamCancelled(f"{model.model_name} request cancelled")
+            received.append(chunk)
+    finally:
+        chunks.close()
+    return ModelResponse(content="".join(received).strip(), raw_response=None, model_name=model.model_name)
+
+class DecisionStreamParser:
+    """Parses streamed text until the action line (and optionally confidence) is complete"""
+
+    def __init__(self, actions=DECISION_ACTIONS, require_confidence: bool = True,
+                 min_lines: int = 1, max_decision_lines: int = 3):
+        """
+        Args:
+            actions (tuple): Valid values for the first non-empty line
+            require_confidence (bool): Wait for a "Confidence: X%" line before deciding
+            min_lines (int): Complete lines required before deciding (e.g. 4 for the chart format)
+            max_decision_lines (int): Give up waiting for confidence after this many lines
+        """
+        self.actions = actions
+        self.require_confidence = require_confidence
+        self.min_lines = min_lines
+        self.max_decision_lines = max_decision_lines
+        self._chunks = []
+        self._buffer = ""
+        self.lines = []
+        self.action = None
+        self.confidence = None
+        self.decided = False
+        self.invalid = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk; return True once the decision is unambiguous"""
+        self._chunks.append(chunk)
+        if self.decided or self.invalid:
+            return self.decided
+        self._buffer += chunk
+        *complete, self._buffer = self._buffer.split('\n')
+        for line in complete:
+            self._add_line(line)
+        return self.decided
+
+    def _add_line(self, line: str):
+        line = line.strip()
+        if not line and not self.lines:
+            return
+        self.lines.append(line)
+        if self.action is None:
+            action = line.strip('*# ').upper()
+            if action not in self.actions:
+                # Not the expected format; the caller needs the full response
+                self.invalid = True
+                return
+            self.action = action
+        if self.confidence is None:
+            match = CONFIDENCE_PATTERN.search(line)
+            if match:
+                self.confidence = int(match.group(1) or match.group(2))
+        if len(self.lines) >= self.min_lines and (
+                not self.require_confidence or self.confidence is not None
+                or len(self.lines) >= self.max_decision_lines):
+            self.decided = True
+
+
+def stream_decision(model,
+    system_prompt: str,
+    user_content: str,
+    parser: DecisionStreamParser,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    stop_early: bool = False,
+    on_complete: Optional[Callable[[str], None]] = None,
+    cancelled: Optional[threading.Event] = None
+) -> ModelResponse:
+    """
+    Stream a response and return as soon as the parser has a decision
+
+    Args:
+        stop_early (bool): Close the stream once decided (remaining reasoning is never generated)
+        on_complete (callable): Called from a background thread with the full text when the
+            stream is still being read after the decision was returned
+        cancelled (threading.Event): Once set, the stream is closed at the next chunk,
+            before or after the decision (raises StreamCancelled before it)
+
+    Returns:
+        ModelResponse: Content is the text received up to the decision (or the whole
+            response if no decision could be parsed early); in the first case
+            `completion` resolves to the full text, or None if it is never read
+    """
+    chunks = model.stream_response(system_prompt, user_content, temperature=temperature, max_tokens=max_tokens)
+    for chunk in chunks:
+        if cancelled is not None and cancelled.is_set():
+            chunks.close()
+            raise StreamCancelled(f"{model.model_name} request cancelled")
+        if parser.feed(chunk):
+            break
+    else:
+        return ModelResponse(content=parser.text.strip(), raw_response=None, model_name=model.model_name)
+
+    # Only complete lines; a partial reasoning line would be misleading
+    decided_text = "\n".join(parser.lines).strip()
+    debug(f"{model.model_name} decision {parser.action} ({parser.confidence}%) after {len(decided_text)} chars", file_only=True)
+
+    completion = Future()
+    if stop_early:
+        chunks.close()
+        completion.set_result(None)
+    else:
+        def read_reasoning():
+            try:
+                for chunk in chunks:
+                    if cancelled is not None and cancelled.is_set():
+                        completion.set_result(None)
+                        return
+                    parser.feed(chunk)
+            except Exception as e:
+                warning(f"Reasoning stream from {model.model_name} ended early: {str(e)}")
+                completion.set_result(None)
+                return
+            finally:
+                chunks.close()
+            completion.set_result(parser.text.strip())
+            if on_complete is not None:
+                try:
+                    on_complete(parser.text.strip())
+                except Exception as e:
+                    warning(f"Error handling streamed reasoning: {str(e)}")
+
+        threading.Thread(target=read_reasoning, name="llm-reasoning", daemon=True).start()
+
+    return ModelResponse(content=decided_text, raw_response=None, model_name=model.model_name, completion=completion)
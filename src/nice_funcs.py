@@ -31,7 +31,6 @@ import time
 import json
 import numpy as np
 import datetime
-import pandas_ta as ta
 from datetime import datetime, timedelta
 from termcolor import colored, cprint
 import solders
@@ -42,6 +41,11 @@ import atexit
 from src.scripts.fetch_historical_data import fetch_coingecko_data
 import base58
 import csv
+from src.scripts.indicator_engine import IndicatorEngine, SMA, RSI
+from src.scripts.candle_store import candle_store, timeframe_seconds
+from src.scripts.candle_decoder import BIRDEYE_FIELDS, decode_candles, filter_candles, candles_to_frame
+from src.scripts.candle_resampler import base_timeframe, resample_candles, base_candle_cache
+from src.scripts.price_feed import PriceCache, price_feed
 
 # Create cache directory
 os.makedirs("src/data/cache", exist_ok=True)
@@ -55,8 +59,15 @@ sample_address = "2yXTyarttn2pTZ6cwt4DqmrRuBw1G7pmFv9oT6MStdKP"
 
 BASE_URL = "https://public-api.birdeye.so/defi"
 
-# Add this price cache dictionary
-_price_cache = {}
+# MA20/RSI/MA40 for Birdeye candles, updated incrementally per (address, timeframe)
+INDICATOR_ENGINE = IndicatorEngine([
+    SMA('MA20', 20, source='Close'),
+    RSI('RSI', 14, smoothing='wilder', source='Close'),
+    SMA('MA40', 40, source='Close'),
+], time_column='Datetime (UTC)', close_column='Close')
+
+# Add this price cache dictionary (new prices are published to price_feed subscribers)
+_price_cache = PriceCache(price_feed)
 _price_cache_expiry = {}
 CACHE_EXPIRY_SECONDS = 60  # Cache prices for 60 seconds
 
@@ -108,7 +119,7 @@ def batch_fetch_prices(token_addresses, force_refresh=False):
                         continue
             except:
                 # Default SOL price if API fails
-                _price_cache[address] = 150.0
+                _price_cache.set_quiet(address, 150.0)
                 _price_cache_expiry[address] = current_time + 60  # 1 minute
                 results[address] = 150.0
                 continue
@@ -850,46 +861,84 @@ def get_time_range(days_back):
 
     return time_from, time_to
 
-def get_data(address, days_back_4_data, timeframe):
+def _fetch_birdeye_candles(address, days_back_4_data, timeframe):
+    """
+    Birdeye OHLCV candles (CANDLE_COLUMNS) merged with the candle store
+
+    Returns:
+        DataFrame or None: None when the request failed
+    """
     time_from, time_to = get_time_range(days_back_4_data)
 
+    # Only request candles after the locally stored history
+    window_start = datetime.utcfromtimestamp(time_from)
+    fetch_from = candle_store.fetch_start('birdeye', address, timeframe, window_start)
+    fetch_from_ts = int(pd.Timestamp(fetch_from).tz_localize('UTC').timestamp())
+
+    url = f"https://public-api.birdeye.so/defi/ohlcv?address={address}&type={timeframe}&time_from={fetch_from_ts}&time_to={time_to}"
+    headers = {"X-API-KEY": BIRDEYE_API_KEY}
+    response = requests.get(url, headers=headers)
+
+    if response.status_code != 200:
+        error(f"Failed to fetch data for address {address}. Status code: {response.status_code}")
+        if response.status_code == 401:
+            warning("Check your BIRDEYE_API_KEY in .env file!")
+        return None
+
+    json_response = response.json()
+    items = json_response.get('data', {}).get('items', [])
+
+    # Typed columns straight from the payload; timestamps stay int64 epoch ms
+    candles = decode_candles(items, BIRDEYE_FIELDS, time_scale=1000)
+    # Remove any rows with dates far in the future
+    now_ms = int(time.time() * 1000)
+    candles = filter_candles(candles, candles['timestamp'] <= now_ms)
+    candles = candles_to_frame(candles)
+    if candle_store.enabled:
+        candle_store.append('birdeye', address, timeframe, candles)
+        stored = candle_store.read('birdeye', address, timeframe, start=window_start)
+        if not stored.empty:
+            candles = stored
+    return candles
+
+def _birdeye_frame(candles):
+    """Candles in the 'Datetime (UTC)'/Open/High/Low/Close/Volume layout, padded to 40 rows"""
+    df = pd.DataFrame({
+        'Datetime (UTC)': candles['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'Open': candles['open'],
+        'High': candles['high'],
+        'Low': candles['low'],
+        'Close': candles['close'],
+        'Volume': candles['volume'],
+    }).reset_index(drop=True)
+
+    # Pad if needed
+    if len(df) < 40:
+        warning(f"Padding data to ensure minimum 40 rows for analysis")
+        rows_to_add = 40 - len(df)
+        first_row_replicated = pd.concat([df.iloc[0:1]] * rows_to_add, ignore_index=True)
+        df = pd.concat([first_row_replicated, df], ignore_index=True)
+    return df
+
+def _add_birdeye_indicators(df, key):
+    """MA20/RSI/MA40 and the MA crossover flags"""
+    df = INDICATOR_ENGINE.apply(df, key=key)
+
+    df['Price_above_MA20'] = df['Close'] > df['MA20']
+    df['Price_above_MA40'] = df['Close'] > df['MA40']
+    df['MA20_above_MA40'] = df['MA20'] > df['MA40']
+    return df
+
+def get_data(address, days_back_4_data, timeframe):
     # Check temp data first
     temp_file = f"temp_data/{address}_latest.csv"
     if os.path.exists(temp_file):
         debug(f"Found cached data for {address[:4]}")
         return pd.read_csv(temp_file)
 
-    url = f"https://public-api.birdeye.so/defi/ohlcv?address={address}&type={timeframe}&time_from={time_from}&time_to={time_to}"
-    headers = {"X-API-KEY": BIRDEYE_API_KEY}
-    response = requests.get(url, headers=headers)
-    
-    if response.status_code == 200:
-        json_response = response.json()
-        items = json_response.get('data', {}).get('items', [])
-
-        processed_data = [{
-            'Datetime (UTC)': datetime.utcfromtimestamp(item['unixTime']).strftime('%Y-%m-%d %H:%M:%S'),
-            'Open': item['o'],
-            'High': item['h'],
-            'Low': item['l'],
-            'Close': item['c'],
-            'Volume': item['v']
-        } for item in items]
-
-        df = pd.DataFrame(processed_data)
-
-        # Remove any rows with dates far in the future
-        current_date = datetime.now()
-        df['datetime_obj'] = pd.to_datetime(df['Datetime (UTC)'])
-        df = df[df['datetime_obj'] <= current_date]
-        df = df.drop('datetime_obj', axis=1)
-
-        # Pad if needed
-        if len(df) < 40:
-            warning(f"Padding data to ensure minimum 40 rows for analysis")
-            rows_to_add = 40 - len(df)
-            first_row_replicated = pd.concat([df.iloc[0:1]] * rows_to_add, ignore_index=True)
-            df = pd.concat([first_row_replicated, df], ignore_index=True)
+    candles = _fetch_birdeye_candles(address, days_back_4_data, timeframe)
+    if candles is not None:
+        df = _birdeye_frame(candles)
 
         info(f"Data Analysis Ready! Processing {len(df)} candles")
 
@@ -898,20 +947,8 @@ def get_data(address, days_back_4_data, timeframe):
         debug(f"Cached data for {address[:4]}")
 
         # Calculate indicators
-        df['MA20'] = ta.sma(df['Close'], length=20)
-        df['RSI'] = ta.rsi(df['Close'], length=14)
-        df['MA40'] = ta.sma(df['Close'], length=40)
-
-        df['Price_above_MA20'] = df['Close'] > df['MA20']
-        df['Price_above_MA40'] = df['Close'] > df['MA40']
-        df['MA20_above_MA40'] = df['MA20'] > df['MA40']
-
-        return df
+        return _add_birdeye_indicators(df, key=(address, timeframe))
     else:
-        error(f"Failed to fetch data for address {address}. Status code: {response.status_code}")
-        if response.status_code == 401:
-            warning("Check your BIRDEYE_API_KEY in .env file!")
-        
         # Fallback to CoinGecko
         info(f"Falling back to CoinGecko for {address}...")
         prices = fetch_coingecko_data(address, days_back_4_data)
@@ -925,6 +962,47 @@ def get_data(address, days_back_4_data, timeframe):
         else:
             return pd.DataFrame()
 
+def get_multi_timeframe_data(address, windows):
+    """
+    Birdeye data for several timeframes from one base-resolution fetch
+
+    The finest timeframe is fetched once for the longest window (cached per
+    address, see MTF_BASE_CACHE_SECONDS) and the coarser candles are aggregated
+    locally. Falls back to one get_data call per timeframe when the timeframes do
+    not share a base or the Birdeye request fails.
+
+    Args:
+        address (str): Token mint address
+        windows (dict): Timeframe -> days of history, e.g. {'15m': 0.33, '5m': 0.083}
+
+    Returns:
+        dict: Timeframe -> DataFrame in the get_data layout
+    """
+    base = base_timeframe(list(windows))
+    if base is None:
+        return {tf: get_data(address, days, tf) for tf, days in windows.items()}
+
+    days_back = max(windows.values())
+    base_bars = int(days_back * 86400 // timeframe_seconds(base))
+    candles = base_candle_cache.get(
+        'birdeye', address, base, base_bars,
+        lambda count: _fetch_birdeye_candles(address, days_back, base)
+    )
+    if candles is None or candles.empty:
+        return {tf: get_data(address, days, tf) for tf, days in windows.items()}
+
+    frames = {}
+    for tf, days in windows.items():
+        tf_candles = candles if tf == base else resample_candles(candles, tf)
+        start = pd.Timestamp(datetime.utcnow()) - pd.Timedelta(days=days)
+        tf_candles = tf_candles[tf_candles['timestamp'] >= start]
+        if tf_candles.empty:
+            frames[tf] = pd.DataFrame()
+            continue
+        frames[tf] = _add_birdeye_indicators(_birdeye_frame(tf_candles), key=(address, tf))
+    debug(f"Built {', '.join(windows)} data for {address[:4]} from one {base} fetch", file_only=True)
+    return frames
+
 
 
 def fetch_wallet_holdings_og(address, min_value=0.01):
@@ -2377,7 +2455,7 @@ def get_token_price(token_address, force_refresh=False):
                 pass
                 
             # Default SOL price if all else fails
-            _price_cache[token_address] = 150.0
+            _price_cache.set_quiet(token_address, 150.0)
             _price_cache_expiry[token_address] = current_time + 60  # Cache for 1 minute
             return 150.0
 
@@ -2774,6 +2852,56 @@ def get_wallet_tokens(wallet_address):
         print(f"Error in get_wallet_tokens: {str(e)}")
         return []
 
+def get_wallet_balances(wallet_address):
+    """
+    Every token balance of a wallet in one pass: SOL plus all SPL and Token-2022 accounts
+
+    Args:
+        wallet_address (str): Wallet to read
+
+    Returns:
+        dict: Mint address -> balance in whole tokens, or None if the RPC calls failed
+    """
+    rpc_endpoint = os.getenv("RPC_ENDPOINT", "https://api.mainnet-beta.solana.com")
+    token_programs = [
+        "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",  # SPL Token
+        "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb",  # Token-2022
+    ]
+    payload = [{"jsonrpc": "2.0", "id": 0, "method": "getBalance", "params": [wallet_address]}]
+    payload += [
+        {
+            "jsonrpc": "2.0",
+            "id": i + 1,
+            "method": "getTokenAccountsByOwner",
+            "params": [wallet_address, {"programId": program}, {"encoding": "jsonParsed"}]
+        }
+        for i, program in enumerate(token_programs)
+    ]
+    try:
+        # JSON-RPC batch: one HTTP round trip for all three calls
+        response = requests.post(rpc_endpoint, json=payload, timeout=15)
+        response.raise_for_status()
+        results = {item.get("id"): item.get("result") for item in response.json()}
+    except Exception as e:
+        warning(f"Error fetching wallet balances: {str(e)}")
+        return None
+
+    if results.get(0) is None or results.get(1) is None:
+        warning("Wallet balance RPC returned no result")
+        return None
+
+    balances = {"So11111111111111111111111111111111111111112": results[0].get("value", 0) / 1_000_000_000}
+    for program_id in range(1, len(token_programs) + 1):
+        for account in (results.get(program_id) or {}).get("value", []):
+            try:
+                parsed = account["account"]["data"]["parsed"]["info"]
+                amount = float(parsed["tokenAmount"]["uiAmount"] or 0)
+            except (KeyError, TypeError, ValueError):
+                continue
+            # A wallet can hold several accounts for the same mint
+            balances[parsed["mint"]] = balances.get(parsed["mint"], 0.0) + amount
+    return balances
+
 def get_wallet_tokens_with_value(wallet_address):
     """
     Enhanced function to get tokens from a wallet with full details including price and USD value
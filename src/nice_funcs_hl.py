@@ -10,9 +10,12 @@ import requests
 from datetime import datetime, timedelta
 import numpy as np
 import time
-import pandas_ta as ta  # For technical indicators
 import traceback
 from src.scripts.logger import debug, info, warning, error, critical
+from src.scripts.indicator_engine import IndicatorEngine, SMA, RSI, MACD, Bollinger
+from src.scripts.candle_store import candle_store
+from src.scripts.candle_decoder import HYPERLIQUID_FIELDS, decode_candles, candles_to_frame
+from src.scripts.candle_resampler import base_timeframe, base_bars_needed, resample_candles, base_candle_cache
 
 # Constants
 BATCH_SIZE = 5000  # MAX IS 5000 FOR HYPERLIQUID
@@ -20,7 +23,15 @@ MAX_RETRIES = 3
 MAX_ROWS = 5000
 BASE_URL = 'https://api.hyperliquid.xyz/info'
 
-# Global variable to store timestamp offset
+INDICATOR_ENGINE = IndicatorEngine([
+    SMA('sma_20', 20), SMA('sma_50', 50),
+    RSI('rsi', 14, smoothing='wilder'),
+    MACD('MACD_12_26_9', 'MACDs_12_26_9', 'MACDh_12_26_9'),
+    Bollinger(5, 2.0),
+], time_column='timestamp')
+
+# Global variable to store timestamp offset (applied to returned frames only;
+# fetched and stored candles keep the exchange's open times)
 timestamp_offset = None
 
 def adjust_timestamp(dt):
@@ -31,7 +42,13 @@ def adjust_timestamp(dt):
     return dt
 
 def _get_ohlcv(symbol, interval, start_time, end_time, batch_size=BATCH_SIZE):
-    """Internal function to fetch OHLCV data from Hyperliquid"""
+    """
+    Internal function to fetch OHLCV data from Hyperliquid
+
+    Returns:
+        dict: Decoded candle columns (see candle_decoder.decode_candles) with the
+            exchange's candle open times, or None
+    """
     global timestamp_offset
     info(f'Requesting data for {symbol}:')
     debug(f'Batch Size: {batch_size}')
@@ -62,26 +79,18 @@ def _get_ohlcv(symbol, interval, start_time, end_time, batch_size=BATCH_SIZE):
             if response.status_code == 200:
                 snapshot_data = response.json()
                 if snapshot_data:
+                    candles = decode_candles(snapshot_data, HYPERLIQUID_FIELDS)
+                    
                     # Handle timestamp offset
                     if timestamp_offset is None:
-                        latest_api_timestamp = datetime.utcfromtimestamp(snapshot_data[-1]['t'] / 1000)
-                        system_current_date = datetime.utcnow()
-                        expected_latest_timestamp = system_current_date
-                        timestamp_offset = latest_api_timestamp - expected_latest_timestamp
+                        now_ms = int((datetime.utcnow() - datetime(1970, 1, 1)).total_seconds() * 1000)
+                        timestamp_offset = timedelta(milliseconds=int(candles['timestamp'][-1]) - now_ms)
                         debug(f"Calculated timestamp offset: {timestamp_offset}")
 
-                    # Adjust timestamps
-                    for candle in snapshot_data:
-                        dt = datetime.utcfromtimestamp(candle['t'] / 1000)
-                        adjusted_dt = adjust_timestamp(dt)
-                        candle['t'] = int(adjusted_dt.timestamp() * 1000)
-
-                    first_time = datetime.utcfromtimestamp(snapshot_data[0]['t'] / 1000)
-                    last_time = datetime.utcfromtimestamp(snapshot_data[-1]['t'] / 1000)
                     info(f'Received {len(snapshot_data)} candles')
-                    debug(f'First: {first_time}')
-                    debug(f'Last: {last_time}')
-                    return snapshot_data
+                    debug(f"First: {pd.to_datetime(candles['timestamp'][0], unit='ms')}")
+                    debug(f"Last: {pd.to_datetime(candles['timestamp'][-1], unit='ms')}")
+                    return candles
                 warning('No data returned by API')
                 return None
             error(f'HTTP Error {response.status_code}: {response.text}')
@@ -90,27 +99,10 @@ def _get_ohlcv(symbol, interval, start_time, end_time, batch_size=BATCH_SIZE):
             time.sleep(1)
     return None
 
-def _process_data_to_df(snapshot_data):
-    """Convert raw API data to DataFrame"""
-    if snapshot_data:
-        columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
-        data = []
-        for snapshot in snapshot_data:
-            timestamp = datetime.utcfromtimestamp(snapshot['t'] / 1000)
-            # Convert all numeric values to float
-            data.append([
-                timestamp,
-                float(snapshot['o']),
-                float(snapshot['h']),
-                float(snapshot['l']),
-                float(snapshot['c']),
-                float(snapshot['v'])
-            ])
-        df = pd.DataFrame(data, columns=columns)
-        
-        # Ensure numeric columns are float64
-        numeric_cols = ['open', 'high', 'low', 'close', 'volume']
-        df[numeric_cols] = df[numeric_cols].astype('float64')
+def _process_data_to_df(candles):
+    """Convert decoded candle columns to a DataFrame"""
+    if candles and len(candles['timestamp']):
+        df = candles_to_frame(candles)
         
         debug("OHLCV Data Types:", file_only=True)
         debug(df.dtypes, file_only=True)
@@ -118,8 +110,21 @@ def _process_data_to_df(snapshot_data):
         return df
     return pd.DataFrame()
 
-def add_technical_indicators(df):
-    """Add technical indicators to the dataframe"""
+def _apply_timestamp_offset(df):
+    """Shift a frame's candle times by the timestamp offset, leaving stored data untouched"""
+    if timestamp_offset is None or df.empty:
+        return df
+    df = df.copy()
+    df['timestamp'] = adjust_timestamp(df['timestamp'])
+    return df
+
+def add_technical_indicators(df, key=None):
+    """
+    Add technical indicators to the dataframe
+
+    Args:
+        key (tuple): (symbol, timeframe) to update the indicators incrementally between fetches
+    """
     if df.empty:
         return df
         
@@ -130,18 +135,8 @@ def add_technical_indicators(df):
         numeric_cols = ['open', 'high', 'low', 'close', 'volume']
         df[numeric_cols] = df[numeric_cols].astype('float64')
         
-        # Add basic indicators
-        df['sma_20'] = ta.sma(df['close'], length=20)
-        df['sma_50'] = ta.sma(df['close'], length=50)
-        df['rsi'] = ta.rsi(df['close'], length=14)
-        
-        # Add MACD
-        macd = ta.macd(df['close'])
-        df = pd.concat([df, macd], axis=1)
-        
-        # Add Bollinger Bands
-        bbands = ta.bbands(df['close'])
-        df = pd.concat([df, bbands], axis=1)
+        # SMA 20/50, RSI 14, MACD 12/26/9 and Bollinger 5/2 (pandas_ta column names)
+        df = INDICATOR_ENGINE.apply(df, key=key)
         
         info("Technical indicators added successfully")
         return df
@@ -151,9 +146,13 @@ def add_technical_indicators(df):
         traceback.print_exc()
         return df
 
-def get_data(address=None, symbol=None, timeframe="1h", bars=100, add_indicators=True):
+def get_data(address=None, symbol=None, timeframe="1h", bars=100, add_indicators=True, adjust_timestamps=True):
     """
     Fetch price data for a token using either address or symbol
+
+    Args:
+        adjust_timestamps (bool): Shift the returned candles by the timestamp offset;
+            False returns the exchange's open times, as stored in the candle store
     """
     info("Fetching Hyperliquid data")
     
@@ -172,8 +171,10 @@ def get_data(address=None, symbol=None, timeframe="1h", bars=100, add_indicators
     end_time = datetime.utcnow()
     # Add extra time to ensure we get enough bars
     start_time = end_time - timedelta(days=60)
+    # Only request candles after the locally stored history
+    fetch_start = candle_store.fetch_start('hyperliquid', identifier, timeframe, start_time, min_rows=bars)
 
-    data = _get_ohlcv(identifier, timeframe, start_time, end_time, batch_size=bars)
+    data = _get_ohlcv(identifier, timeframe, fetch_start, end_time, batch_size=bars)
     
     if not data:
         warning("No data available.")
@@ -181,14 +182,20 @@ def get_data(address=None, symbol=None, timeframe="1h", bars=100, add_indicators
 
     df = _process_data_to_df(data)
 
+    if not df.empty and candle_store.enabled:
+        candle_store.append('hyperliquid', identifier, timeframe, df)
+        df = candle_store.read('hyperliquid', identifier, timeframe, start=start_time, bars=bars)
+
     if not df.empty:
         # Get the most recent bars
         df = df.sort_values('timestamp', ascending=False).head(bars).sort_values('timestamp')
         df = df.reset_index(drop=True)
+        if adjust_timestamps:
+            df = _apply_timestamp_offset(df)
         
         # Add technical indicators if requested
         if add_indicators:
-            df = add_technical_indicators(df)
+            df = add_technical_indicators(df, key=(identifier, timeframe))
 
         debug("Data summary:", file_only=True)
         debug(f"Total candles: {len(df)}", file_only=True)
@@ -197,6 +204,46 @@ def get_data(address=None, symbol=None, timeframe="1h", bars=100, add_indicators
 
     return df
 
+def get_resampled_data(symbol, timeframe, timeframes, bars=100, add_indicators=True):
+    """
+    Candles for one of several timeframes, all derived from a single fetch
+
+    The finest of `timeframes` is fetched once per symbol (cached, see
+    MTF_BASE_CACHE_SECONDS) and the coarser bars are aggregated locally. Falls back
+    to a direct get_data call when the timeframes do not share a base or the base
+    history would exceed MAX_ROWS.
+
+    Args:
+        timeframe (str): The timeframe to return; must be one of timeframes
+        timeframes (list): Every timeframe the caller needs for this symbol
+    """
+    base = base_timeframe(timeframes)
+    base_bars = base_bars_needed({tf: bars for tf in timeframes}, base) if base else None
+    if base is None or base_bars > MAX_ROWS:
+        debug(f"Fetching {symbol} {timeframe} directly (no shared base for {timeframes})", file_only=True)
+        return get_data(symbol=symbol, timeframe=timeframe, bars=bars, add_indicators=add_indicators)
+
+    candles = base_candle_cache.get(
+        'hyperliquid', symbol, base, base_bars,
+        lambda count: get_data(symbol=symbol, timeframe=base, bars=count, add_indicators=False,
+                               adjust_timestamps=False)
+    )
+    if candles is None or candles.empty:
+        return pd.DataFrame()
+
+    # Resample on the exchange's open times so buckets stay epoch-aligned
+    df = candles.copy() if timeframe == base else resample_candles(candles, timeframe)
+    df = _apply_timestamp_offset(df.tail(bars).reset_index(drop=True))
+    if add_indicators and not df.empty:
+        df = add_technical_indicators(df, key=(symbol, timeframe))
+    debug(f"{symbol} {timeframe}: {len(df)} candles from {len(candles)} {base} candles", file_only=True)
+    return df
+
+def get_multi_timeframe_data(symbol, timeframes, bars=100, add_indicators=True):
+    """Candles for every timeframe in `timeframes` from one base-resolution fetch"""
+    return {tf: get_resampled_data(symbol, tf, timeframes, bars=bars, add_indicators=add_indicators)
+            for tf in timeframes}
+
 def get_market_info():
     """Get current market info for all coins on Hyperliquid"""
     try:
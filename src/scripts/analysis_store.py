@@ -0,0 +1,237 @@
+"""
+Anarcho Capital's Analysis Store
+Append-only SQLite log of chart analysis results. Each save is one INSERT,
+and a latest-per-symbol table keeps the current recommendation one primary
+key lookup away. Existing chart_analysis_<SYMBOL>.csv files are imported once
+Built with love by Anarcho Capital
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from src.scripts.logger import debug, info, warning
+
+DEFAULT_DB_PATH = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'data' / 'charts' / 'chart_analysis.db'
+
+# Bump and add a step to MIGRATIONS when the schema changes
+SCHEMA_VERSION = 1
+ANALYSIS_COLUMNS = [
+    'symbol', 'timeframe', 'signal', 'confidence', 'price', 'entry_price', 'reasoning', 'timestamp',
+    'market_regime', 'direction', 'volume_trend', 'historical_accuracy', 'recommendation_performance',
+]
+# Defaults for rows written before a column existed (same as the old CSV patching)
+COLUMN_DEFAULTS = {'market_regime': 'NEUTRAL', 'direction': 'SIDEWAYS', 'volume_trend': 'Unknown'}
+
+MIGRATIONS = {
+    1: [
+        '''
+        CREATE TABLE IF NOT EXISTS analyses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            timeframe TEXT,
+            signal TEXT,
+            confidence REAL,
+            price REAL,
+            entry_price REAL,
+            reasoning TEXT,
+            timestamp REAL NOT NULL,
+            market_regime TEXT,
+            direction TEXT,
+            volume_trend TEXT,
+            historical_accuracy REAL,
+            recommendation_performance REAL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_analyses_symbol_timestamp ON analyses (symbol, timestamp)',
+        '''
+        CREATE TABLE IF NOT EXISTS latest_analysis (
+            symbol TEXT PRIMARY KEY,
+            analysis_id INTEGER NOT NULL REFERENCES analyses(id)
+        )
+        ''',
+    ],
+}
+
+
+class AnalysisStore:
+    """Chart analyses per symbol, appended as they are produced"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, legacy_dir=None):
+        self.db_path = Path(db_path)
+        self.legacy_dir = Path(legacy_dir) if legacy_dir else self.db_path.parent
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_schema(self):
+        """Create/migrate the schema on first use and import legacy CSV files"""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                # WAL lets the UI read while an agent process appends
+                conn.execute('PRAGMA journal_mode=WAL')
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                for target in range(version + 1, SCHEMA_VERSION + 1):
+                    with conn:
+                        for statement in MIGRATIONS[target]:
+                            conn.execute(statement)
+                        conn.execute(f'PRAGMA user_version = {target}')
+                    debug(f"Analysis store schema migrated to version {target}", file_only=True)
+                if version == 0:
+                    self._import_legacy_csv(conn)
+            finally:
+                conn.close()
+            self._ready = True
+
+    def _import_legacy_csv(self, conn):
+        """One-time import of chart_analysis_<SYMBOL>.csv files (left in place)"""
+        imported = 0
+        for csv_file in sorted(self.legacy_dir.glob('chart_analysis_*.csv')):
+            try:
+                df = pd.read_csv(csv_file)
+            except Exception as e:
+                warning(f"Could not import {csv_file.name}: {str(e)}")
+                continue
+            if df.empty or 'timestamp' not in df:
+                continue
+            if 'symbol' not in df:
+                df['symbol'] = csv_file.stem[len('chart_analysis_'):]
+            if 'entry_price' not in df and 'price' in df:
+                df['entry_price'] = df['price']
+            for column, default in COLUMN_DEFAULTS.items():
+                if column not in df:
+                    df[column] = default
+            df = df.reindex(columns=ANALYSIS_COLUMNS).sort_values('timestamp', kind='stable')
+            rows = [tuple(None if pd.isna(v) else v for v in row) for row in df.itertuples(index=False)]
+            with conn:
+                for row in rows:
+                    self._insert(conn, dict(zip(ANALYSIS_COLUMNS, row)))
+            imported += len(rows)
+        if imported:
+            info(f"Imported {imported} chart analyses from CSV into {self.db_path.name}")
+
+    def _insert(self, conn, record):
+        values = [record.get(column) for column in ANALYSIS_COLUMNS]
+        cursor = conn.execute(
+            f"INSERT INTO analyses ({', '.join(ANALYSIS_COLUMNS)}) VALUES ({', '.join('?' * len(ANALYSIS_COLUMNS))})",
+            values
+        )
+        # Rows arrive in time order, but never let an older timestamp replace the latest
+        conn.execute(
+            '''
+            INSERT INTO latest_analysis (symbol, analysis_id) VALUES (?, ?)
+            ON CONFLICT(symbol) DO UPDATE SET analysis_id = excluded.analysis_id
+            WHERE (SELECT timestamp FROM analyses WHERE id = latest_analysis.analysis_id) <= ?
+            ''',
+            (record['symbol'], cursor.lastrowid, record['timestamp'])
+        )
+        return cursor.lastrowid
+
+    def append(self, record):
+        """
+        Append one analysis
+
+        Args:
+            record (dict): ANALYSIS_COLUMNS values; 'symbol' and 'timestamp' are required
+
+        Returns:
+            int: Row id
+        """
+        self._ensure_schema()
+        record = {**COLUMN_DEFAULTS, **record}
+        if record.get('entry_price') is None:
+            record['entry_price'] = record.get('price')
+        conn = self._connect()
+        try:
+            with conn:
+                return self._insert(conn, record)
+        finally:
+            conn.close()
+
+    def latest(self, symbol):
+        """Most recent analysis for a symbol as a dict, or None"""
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT a.* FROM latest_analysis l JOIN analyses a ON a.id = l.analysis_id WHERE l.symbol = ?',
+                (symbol,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    def latest_all(self):
+        """Most recent analysis of every symbol: {symbol: dict}"""
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT a.* FROM latest_analysis l JOIN analyses a ON a.id = l.analysis_id ORDER BY l.symbol'
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row['symbol']: dict(row) for row in rows}
+
+    def latest_per_signal(self, symbol, limit=3):
+        """Newest analysis of each distinct signal, most recent first (up to limit signals)"""
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            # SQLite returns the other bare columns from the row holding MAX(timestamp)
+            rows = conn.execute(
+                '''
+                SELECT signal, price, confidence, MAX(timestamp) AS timestamp FROM analyses
+                WHERE symbol = ? GROUP BY signal ORDER BY timestamp DESC LIMIT ?
+                ''',
+                (symbol, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def signal_streak(self, symbol):
+        """(signal, count) of the latest run of identical consecutive signals, or (None, 0)"""
+        latest = self.latest(symbol)
+        if latest is None:
+            return None, 0
+        conn = self._connect()
+        try:
+            count = conn.execute(
+                '''
+                SELECT COUNT(*) FROM analyses WHERE symbol = ? AND timestamp > COALESCE(
+                    (SELECT MAX(timestamp) FROM analyses WHERE symbol = ? AND signal IS NOT ?), -1)
+                ''',
+                (symbol, symbol, latest['signal'])
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        return latest['signal'], count
+
+    def history(self, symbol):
+        """All analyses for a symbol in time order as a DataFrame"""
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(
+                f"SELECT {', '.join(ANALYSIS_COLUMNS)} FROM analyses WHERE symbol = ? ORDER BY timestamp, id",
+                conn, params=(symbol,)
+            )
+        finally:
+            conn.close()
+
+# Create a singleton instance
+analysis_store = AnalysisStore()
@@ -0,0 +1,262 @@
+"""
+Anarcho Capital's Balance Store
+Append-only SQLite time series of portfolio value and per-token exposure.
+Samples are indexed by time so range queries are B-tree lookups, and every
+append updates 1m/1h/1d OHLC rollups in place. The old portfolio_balance.csv
+is imported once
+Built with love by Anarcho Capital
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.scripts.logger import debug, info, warning
+
+DATA_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'data'
+DEFAULT_DB_PATH = DATA_DIR / 'portfolio_balance.db'
+LEGACY_CSV_PATH = DATA_DIR / 'portfolio_balance.csv'
+
+# Rollup resolutions: name -> bucket width in seconds
+ROLLUPS = {'1m': 60, '1h': 3600, '1d': 86400}
+
+# Bump and add a step to MIGRATIONS when the schema changes
+SCHEMA_VERSION = 1
+MIGRATIONS = {
+    1: [
+        '''
+        CREATE TABLE IF NOT EXISTS balances (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp REAL NOT NULL,
+            total_value REAL NOT NULL,
+            source TEXT,
+            checkpoint INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_balances_timestamp ON balances (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_balances_checkpoint ON balances (checkpoint, timestamp)',
+        '''
+        CREATE TABLE IF NOT EXISTS exposures (
+            timestamp REAL NOT NULL,
+            token TEXT NOT NULL,
+            value_usd REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_exposures_token_timestamp ON exposures (token, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_exposures_timestamp ON exposures (timestamp)',
+        '''
+        CREATE TABLE IF NOT EXISTS balance_rollups (
+            resolution TEXT NOT NULL,
+            bucket REAL NOT NULL,
+            open REAL, high REAL, low REAL, close REAL,
+            samples INTEGER NOT NULL,
+            PRIMARY KEY (resolution, bucket)
+        )
+        ''',
+    ],
+}
+
+
+class BalanceStore:
+    """Portfolio value history, appended once per valuation"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, legacy_csv=LEGACY_CSV_PATH):
+        self.db_path = Path(db_path)
+        self.legacy_csv = Path(legacy_csv) if legacy_csv else None
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_schema(self):
+        """Create/migrate the schema on first use and import the legacy CSV"""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                # WAL lets the UI read while the risk agent appends
+                conn.execute('PRAGMA journal_mode=WAL')
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                for target in range(version + 1, SCHEMA_VERSION + 1):
+                    with conn:
+                        for statement in MIGRATIONS[target]:
+                            conn.execute(statement)
+                        conn.execute(f'PRAGMA user_version = {target}')
+                    debug(f"Balance store schema migrated to version {target}", file_only=True)
+                if version == 0:
+                    self._import_legacy_csv(conn)
+            finally:
+                conn.close()
+            self._ready = True
+
+    def _import_legacy_csv(self, conn):
+        """One-time import of portfolio_balance.csv (left in place) as checkpoints"""
+        if self.legacy_csv is None or not self.legacy_csv.exists():
+            return
+        try:
+            df = pd.read_csv(self.legacy_csv)
+            # Logged with datetime.now(), so the timestamps are local time
+            stamps = [t.timestamp() for t in pd.to_datetime(df['timestamp']).dt.to_pydatetime()]
+        except Exception as e:
+            warning(f"Could not import {self.legacy_csv.name}: {str(e)}")
+            return
+        with conn:
+            for timestamp, balance in sorted(zip(stamps, df['balance'])):
+                if pd.notna(balance):
+                    self._insert(conn, timestamp, float(balance), None, 'csv', True)
+        if len(df):
+            info(f"Imported {len(df)} balance records from {self.legacy_csv.name} into {self.db_path.name}")
+
+    def _insert(self, conn, timestamp, total_value, exposures, source, checkpoint):
+        cursor = conn.execute(
+            'INSERT INTO balances (timestamp, total_value, source, checkpoint) VALUES (?, ?, ?, ?)',
+            (timestamp, total_value, source, int(checkpoint))
+        )
+        if exposures:
+            conn.executemany(
+                'INSERT INTO exposures (timestamp, token, value_usd) VALUES (?, ?, ?)',
+                [(timestamp, token, float(value)) for token, value in exposures.items() if value]
+            )
+        # open stays the bucket's first value; close follows the latest by time
+        for resolution, width in ROLLUPS.items():
+            conn.execute(
+                '''
+                INSERT INTO balance_rollups (resolution, bucket, open, high, low, close, samples)
+                VALUES (?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT(resolution, bucket) DO UPDATE SET
+                    high = MAX(high, excluded.high),
+                    low = MIN(low, excluded.low),
+                    close = excluded.close,
+                    samples = samples + 1
+                ''',
+                (resolution, timestamp - timestamp % width, total_value, total_value, total_value, total_value)
+            )
+        return cursor.lastrowid
+
+    def append(self, total_value, exposures=None, source='wallet', timestamp=None, checkpoint=False):
+        """
+        Append one valuation
+
+        Args:
+            total_value (float): Portfolio value in USD
+            exposures (dict): Token address -> USD value
+            source (str): Where the value came from ('wallet', 'paper', ...)
+            timestamp (float): Unix time, now by default
+            checkpoint (bool): Mark as a periodic balance log entry
+
+        Returns:
+            int: Row id
+        """
+        self._ensure_schema()
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        conn = self._connect()
+        try:
+            with conn:
+                return self._insert(conn, timestamp, float(total_value), exposures, source, checkpoint)
+        finally:
+            conn.close()
+
+    def mark_checkpoint(self, row_id):
+        """Mark an already appended valuation as a periodic balance log entry"""
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('UPDATE balances SET checkpoint = 1 WHERE id = ?', (row_id,))
+        finally:
+            conn.close()
+
+    def _query(self, sql, params=()):
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+    def _scalar(self, sql, params=()):
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def last_checkpoint(self):
+        """Unix time of the latest checkpoint, or None"""
+        return self._scalar('SELECT MAX(timestamp) FROM balances WHERE checkpoint = 1')
+
+    def latest(self):
+        """Latest valuation as a dict, or None"""
+        df = self._query('SELECT timestamp, total_value, source FROM balances ORDER BY timestamp DESC LIMIT 1')
+        return df.iloc[0].to_dict() if not df.empty else None
+
+    def history(self, start=None, end=None):
+        """Valuations with start <= timestamp <= end (Unix time) as a DataFrame"""
+        return self._query(
+            'SELECT timestamp, total_value, source, checkpoint FROM balances '
+            'WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp',
+            (start or 0.0, end or time.time())
+        )
+
+    def exposure(self, start=None, end=None, token=None):
+        """Per-token USD exposure with start <= timestamp <= end, optionally for one token"""
+        params = (start or 0.0, end or time.time())
+        where = 'timestamp BETWEEN ? AND ?'
+        if token is not None:
+            where = 'token = ? AND ' + where
+            params = (token,) + params
+        return self._query(f'SELECT timestamp, token, value_usd FROM exposures WHERE {where} ORDER BY timestamp', params)
+
+    def rollup(self, resolution='1h', start=None, end=None):
+        """OHLC of portfolio value per resolution bucket ('1m', '1h' or '1d')"""
+        if resolution not in ROLLUPS:
+            raise ValueError(f"Unknown rollup resolution {resolution}; expected one of {list(ROLLUPS)}")
+        # Include the bucket that start falls in
+        start = start or 0.0
+        start -= start % ROLLUPS[resolution]
+        return self._query(
+            'SELECT bucket AS timestamp, open, high, low, close, samples FROM balance_rollups '
+            'WHERE resolution = ? AND bucket BETWEEN ? AND ? ORDER BY bucket',
+            (resolution, start, end or time.time())
+        )
+
+    def lookback(self, hours, now=None):
+        """
+        Baseline and peak portfolio value over the last `hours`
+
+        The baseline is the earliest valuation in the window. The peak only counts
+        checkpoints, so one bad intra-cycle valuation (a UI refresh, a fallback
+        price) cannot raise it.
+
+        Returns:
+            tuple: (baseline, peak), each None when nothing qualifying is recorded
+        """
+        self._ensure_schema()
+        since = (time.time() if now is None else now) - hours * 3600
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                '''
+                SELECT (SELECT total_value FROM balances WHERE timestamp >= ? ORDER BY timestamp LIMIT 1),
+                       (SELECT MAX(total_value) FROM balances WHERE checkpoint = 1 AND timestamp >= ?)
+                ''',
+                (since, since)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0], row[1]
+
+# Create a singleton instance
+balance_store = BalanceStore()
@@ -0,0 +1,146 @@
+"""
+Anarcho Capital's Batched LLM Analysis
+Packs several tokens into one request with a strict JSON response schema
+and parses the reply item by item so one bad entry never sinks the batch
+Built with love by Anarcho Capital
+"""
+
+import re
+import json
+
+from src.scripts.logger import debug, warning
+
+VALID_ACTIONS = ("BUY", "SELL", "NOTHING")
+
+BATCH_RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["token", "action", "confidence", "entry_price", "reasoning"],
+        "properties": {
+            "token": {"type": "string"},
+            "action": {"enum": list(VALID_ACTIONS)},
+            "confidence": {"type": "integer", "minimum": 0, "maximum": 100},
+            "entry_price": {"type": ["number", "null"]},
+            "reasoning": {"type": "string"},
+        },
+    },
+}
+
+BATCH_SYSTEM_PROMPT = "You are Anarcho Capital's trading analyst. Analyze every token independently and respond with JSON only."
+
+BATCH_RESPONSE_INSTRUCTIONS = """Respond with ONLY a JSON array containing exactly one object per token above, matching this schema:
+{schema}
+Use each token identifier exactly as written after "TOKEN". action must be BUY, SELL or NOTHING.
+confidence is an integer from 0 to 100. entry_price is a number, or null if you have no entry price.
+Keep reasoning to one or two sentences. Do not wrap the JSON in markdown."""
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most size items"""
+    size = max(1, int(size))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def build_batch_prompt(items, task_prompt=""):
+    """
+    Build one prompt covering several tokens
+
+    Args:
+        items (list): (token_id, context_text) pairs
+        task_prompt (str): Shared instructions placed once before the token blocks
+
+    Returns:
+        str: Prompt asking for a JSON array matching BATCH_RESPONSE_SCHEMA
+    """
+    blocks = [f"### TOKEN {token}\n{context.strip()}" for token, context in items]
+    return "\n\n".join([
+        task_prompt.strip(),
+        "\n\n".join(blocks),
+        BATCH_RESPONSE_INSTRUCTIONS.format(schema=json.dumps(BATCH_RESPONSE_SCHEMA, separators=(',', ':'))),
+    ]).strip()
+
+
+def _normalize_item(obj):
+    """Validate one parsed object against the schema, or return None"""
+    if not isinstance(obj, dict):
+        return None
+
+    token = obj.get("token")
+    action = str(obj.get("action", "")).strip().upper()
+    if not token or action not in VALID_ACTIONS:
+        return None
+
+    try:
+        confidence = int(round(float(str(obj.get("confidence", "")).rstrip('%'))))
+    except (TypeError, ValueError):
+        return None
+    confidence = max(0, min(confidence, 100))
+
+    entry_price = obj.get("entry_price")
+    if entry_price is not None:
+        try:
+            entry_price = float(str(entry_price).lstrip('$'))
+        except (TypeError, ValueError):
+            entry_price = None
+
+    return {
+        "token": str(token).strip(),
+        "action": action,
+        "confidence": confidence,
+        "entry_price": entry_price,
+        "reasoning": str(obj.get("reasoning") or "").strip(),
+    }
+
+
+def _extract_objects(text):
+    """Pull candidate JSON objects out of a model reply"""
+    text = re.sub(r"```(?:json)?", "", text or "").strip()
+
+    # Happy path: the whole reply (or the outermost array in it) is valid JSON
+    start, end = text.find('['), text.rfind(']')
+    if start != -1 and end > start:
+        try:
+            parsed = json.loads(text[start:end + 1])
+            if isinstance(parsed, list):
+                return parsed
+        except ValueError:
+            pass
+
+    # Fallback: parse each flat object on its own so one malformed item is skipped
+    objects = []
+    for match in re.finditer(r"\{[^{}]*\}", text):
+        try:
+            objects.append(json.loads(match.group(0)))
+        except ValueError:
+            debug(f"Skipping unparseable batch item: {match.group(0)[:120]}", file_only=True)
+    return objects
+
+
+def parse_batch_response(text, tokens):
+    """
+    Parse a batched reply into per-token results
+
+    Args:
+        text (str): Raw model reply
+        tokens (list): Token identifiers that were requested
+
+    Returns:
+        dict: token -> normalized result for every item that parsed and validated.
+            Tokens missing from the dict need a per-item fallback.
+    """
+    wanted = {str(t).lower(): t for t in tokens}
+    results = {}
+    for obj in _extract_objects(text):
+        item = _normalize_item(obj)
+        if item is None:
+            continue
+        token = wanted.get(item["token"].lower())
+        if token is not None and token not in results:
+            item["token"] = token
+            results[token] = item
+
+    missing = [t for t in tokens if t not in results]
+    if missing:
+        warning(f"Batched analysis returned no valid result for {len(missing)}/{len(tokens)} items")
+    return results
@@ -0,0 +1,52 @@
+"""
+Anarcho Capital's Candle Decoder
+Turns exchange JSON candle payloads into typed NumPy columns in one pass per
+field. Timestamps stay int64 epoch milliseconds until a DataFrame is built
+Built with love by Anarcho Capital
+"""
+
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+# Output column -> payload key
+HYPERLIQUID_FIELDS = {'timestamp': 't', 'open': 'o', 'high': 'h', 'low': 'l', 'close': 'c', 'volume': 'v'}
+BIRDEYE_FIELDS = {'timestamp': 'unixTime', 'open': 'o', 'high': 'h', 'low': 'l', 'close': 'c', 'volume': 'v'}
+
+
+def decode_candles(payload, fields=HYPERLIQUID_FIELDS, time_scale=1):
+    """
+    Decode a list of candle dicts into typed columns
+
+    Args:
+        payload (list): Candle dicts as returned by the API
+        fields (dict): Output column -> payload key ('timestamp' is required)
+        time_scale (int): Multiplier from the payload's time unit to milliseconds
+            (1 for Hyperliquid ms, 1000 for Birdeye seconds)
+
+    Returns:
+        dict: 'timestamp' as int64 epoch ms, every other field as float64
+            (numeric strings are parsed by NumPy, not per value in Python)
+    """
+    count = len(payload or [])
+    columns = {}
+    for name, key in fields.items():
+        values = map(itemgetter(key), payload or [])
+        if name == 'timestamp':
+            columns[name] = np.fromiter(values, dtype=np.int64, count=count) * time_scale
+        else:
+            columns[name] = np.array(list(values), dtype=np.float64)
+    return columns
+
+
+def filter_candles(columns, mask):
+    """Keep the candles where mask is True"""
+    return {name: values[mask] for name, values in columns.items()}
+
+
+def candles_to_frame(columns):
+    """DataFrame with a datetime64 'timestamp' column (naive UTC) and float64 OHLCV"""
+    frame = pd.DataFrame(columns)
+    frame['timestamp'] = pd.to_datetime(columns['timestamp'], unit='ms')
+    return frame
@@ -0,0 +1,159 @@
+"""
+Anarcho Capital's Candle Resampler
+Derives coarser OHLCV bars from one base-resolution fetch. Callers that need
+several timeframes for a symbol fetch the finest one once (cached per symbol
+and base timeframe) and aggregate the rest locally
+Built with love by Anarcho Capital
+"""
+
+import time
+import threading
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from src import config
+from src.scripts.logger import debug
+from src.scripts.candle_store import CANDLE_COLUMNS, timeframe_seconds
+
+NS_PER_SECOND = 1_000_000_000
+# Weekly candles open on Monday; the epoch (1970-01-01) was a Thursday
+WEEK_ORIGIN_NS = 4 * 86400 * NS_PER_SECOND
+
+
+def base_timeframe(timeframes):
+    """
+    Finest of timeframes if every other one is a whole multiple of it, else None
+
+    >>> base_timeframe(['1h', '15m', '4h'])
+    '15m'
+    """
+    seconds = {tf: timeframe_seconds(tf) for tf in timeframes}
+    if not seconds or None in seconds.values():
+        return None
+    base = min(seconds, key=seconds.get)
+    if any(value % seconds[base] for value in seconds.values()):
+        return None
+    return base
+
+
+def base_bars_needed(timeframe_bars, base):
+    """
+    Base candles needed to build `bars` candles of every timeframe
+
+    Args:
+        timeframe_bars (dict): Timeframe -> bars wanted
+        base (str): Base timeframe from base_timeframe()
+
+    Returns:
+        int: One extra coarse candle per timeframe covers a partial leading bucket
+    """
+    base_seconds = timeframe_seconds(base)
+    return max((bars + (tf != base)) * (timeframe_seconds(tf) // base_seconds)
+               for tf, bars in timeframe_bars.items())
+
+
+def resample_candles(candles, timeframe):
+    """
+    Aggregate time-sorted OHLCV candles into `timeframe` buckets
+
+    Buckets are aligned to the epoch (Monday for weekly candles) like exchange
+    candles. A leading bucket that the base history only partly covers is dropped;
+    the last bucket is kept even if it is still forming, as an exchange would.
+
+    Args:
+        candles (DataFrame): CANDLE_COLUMNS at a finer resolution
+
+    Returns:
+        DataFrame: CANDLE_COLUMNS at `timeframe`
+    """
+    step_seconds = timeframe_seconds(timeframe)
+    if step_seconds is None:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    if candles is None or candles.empty:
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+
+    timestamps = candles['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    step = step_seconds * NS_PER_SECOND
+    origin = WEEK_ORIGIN_NS if timeframe.strip().lower().endswith('w') else 0
+    buckets = (timestamps - origin) // step * step + origin
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    if timestamps[0] != buckets[0]:
+        starts, ends = starts[1:], ends[1:]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+
+    high = candles['high'].to_numpy(dtype=np.float64)
+    low = candles['low'].to_numpy(dtype=np.float64)
+    volume = candles['volume'].to_numpy(dtype=np.float64)
+    # reduceat runs each bucket up to the next start, the last one to the end of the window
+    offsets = starts - starts[0]
+    window = slice(starts[0], ends[-1] + 1)
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(buckets[starts], unit='ns'),
+        'open': candles['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(high[window], offsets),
+        'low': np.minimum.reduceat(low[window], offsets),
+        'close': candles['close'].to_numpy(dtype=np.float64)[ends],
+        'volume': np.add.reduceat(volume[window], offsets),
+    })
+
+
+class BaseCandleCache:
+    """Recently fetched base-resolution candles per (source, symbol, base timeframe)"""
+
+    def __init__(self, max_age_seconds=None):
+        self.max_age = max_age_seconds if max_age_seconds is not None else getattr(config, 'MTF_BASE_CACHE_SECONDS', 60)
+        self._entries = {}
+        self._locks = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks[key]
+
+    def get(self, source, symbol, timeframe, bars, fetch):
+        """
+        Cached candles from a fetch of at least `bars` candles, otherwise fetch(bars)
+
+        A short result (young market, gaps) still satisfies later requests of the
+        same size; asking again would not return more history. Concurrent callers
+        for the same key wait for a single fetch instead of each downloading the
+        same candles.
+
+        Args:
+            fetch (callable): bars -> DataFrame of CANDLE_COLUMNS (None or empty on failure)
+
+        Returns:
+            DataFrame or None: Failed fetches are not cached
+        """
+        key = (source, symbol, timeframe)
+        with self._lock(key):
+            entry = self._entries.get(key)
+            if entry is not None:
+                fetched_at, requested, candles = entry
+                if time.monotonic() - fetched_at <= self.max_age and requested >= bars:
+                    debug(f"Reusing {len(candles)} cached {symbol} {timeframe} candles from {source}", file_only=True)
+                    return candles
+            candles = fetch(bars)
+            if candles is None or candles.empty:
+                self._entries.pop(key, None)
+                return candles
+            self._entries[key] = (time.monotonic(), bars, candles)
+            self._evict_expired()
+            return candles
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key, (fetched_at, _, _) in list(self._entries.items()):
+            if now - fetched_at > self.max_age:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+# Create a singleton instance
+base_candle_cache = BaseCandleCache()
@@ -0,0 +1,155 @@
+"""
+Anarcho Capital's Candle Store
+On-disk columnar OHLCV history partitioned by (source, symbol, timeframe).
+Reads are memory-mapped Parquet; fetchers ask the store where their history
+ends and only download the candles after it
+Built with love by Anarcho Capital
+"""
+
+import os
+import re
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from src import config
+from src.scripts.logger import debug, warning
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    warning("pyarrow not available. Candle store disabled, OHLCV history will be re-downloaded each fetch.")
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+DEFAULT_ROOT = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'data' / 'candles'
+DEFAULT_MAX_ROWS = 100000
+TIMEFRAME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def timeframe_seconds(timeframe):
+    """Seconds per candle for timeframes like '15m', '1h', '1d' (None if unknown)"""
+    match = re.fullmatch(r'(\d+)([mhdw])', str(timeframe).strip().lower())
+    if not match:
+        return None
+    return int(match.group(1)) * TIMEFRAME_UNITS[match.group(2)]
+
+
+class CandleStore:
+    """Parquet candle files at <root>/source=<source>/symbol=<symbol>/timeframe=<tf>/candles.parquet"""
+
+    def __init__(self, root=DEFAULT_ROOT, max_rows=None):
+        self.root = Path(root)
+        self.max_rows = max_rows or getattr(config, 'CANDLE_STORE_MAX_ROWS', DEFAULT_MAX_ROWS)
+        self.enabled = PYARROW_AVAILABLE and getattr(config, 'CANDLE_STORE_ENABLED', True)
+        self._locks = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def path(self, source, symbol, timeframe):
+        safe_symbol = re.sub(r'[^A-Za-z0-9._-]', '_', str(symbol))
+        return self.root / f"source={source}" / f"symbol={safe_symbol}" / f"timeframe={timeframe}" / "candles.parquet"
+
+    def _lock(self, path):
+        with self._locks_guard:
+            return self._locks[path]
+
+    def read(self, source, symbol, timeframe, start=None, bars=None):
+        """
+        Stored candles (memory-mapped), optionally from start and/or only the last `bars`
+
+        Returns:
+            DataFrame: CANDLE_COLUMNS in time order (empty if nothing is stored)
+        """
+        path = self.path(source, symbol, timeframe)
+        if not self.enabled or not path.exists():
+            return pd.DataFrame(columns=CANDLE_COLUMNS)
+        filters = [('timestamp', '>=', pd.Timestamp(start))] if start is not None else None
+        try:
+            df = pq.read_table(path, memory_map=True, filters=filters).to_pandas()
+        except Exception as e:
+            warning(f"Could not read stored candles {path}: {str(e)}")
+            return pd.DataFrame(columns=CANDLE_COLUMNS)
+        if bars:
+            df = df.tail(bars)
+        return df.reset_index(drop=True)
+
+    def span(self, source, symbol, timeframe):
+        """(rows, first timestamp, last timestamp) of the stored history, or (0, None, None)"""
+        path = self.path(source, symbol, timeframe)
+        if not self.enabled or not path.exists():
+            return 0, None, None
+        try:
+            timestamps = pq.read_table(path, columns=['timestamp'], memory_map=True).column('timestamp')
+        except Exception as e:
+            warning(f"Could not read stored candles {path}: {str(e)}")
+            return 0, None, None
+        if len(timestamps) == 0:
+            return 0, None, None
+        return len(timestamps), pd.Timestamp(timestamps[0].as_py()), pd.Timestamp(timestamps[-1].as_py())
+
+    def fetch_start(self, source, symbol, timeframe, default_start, min_rows=None):
+        """
+        Where a fetch should begin: just before the last stored candle (it may have
+        still been forming), or default_start for a full download when the store
+        does not hold enough history yet
+
+        Args:
+            default_start (datetime): Start of the window the caller needs
+            min_rows (int): Candles the caller needs; without it the stored history
+                must reach back to default_start
+        """
+        rows, first, last = self.span(source, symbol, timeframe)
+        default_start = pd.Timestamp(default_start)
+        step = timedelta(seconds=timeframe_seconds(timeframe) or 0)
+        if rows == 0 or last < default_start:
+            return default_start.to_pydatetime()
+        enough_history = rows >= min_rows if min_rows else first <= default_start + step
+        if not enough_history:
+            return default_start.to_pydatetime()
+        start = max(last - step, default_start)
+        debug(f"Candle store has {rows} {symbol} {timeframe} candles up to {last}, fetching from {start}", file_only=True)
+        return start.to_pydatetime()
+
+    def append(self, source, symbol, timeframe, candles, max_rows=None):
+        """
+        Merge fetched candles into the store (newer values win for the same timestamp)
+
+        Args:
+            candles (DataFrame): Must have CANDLE_COLUMNS; other columns are ignored
+            max_rows (int): Candles to keep (default CANDLE_STORE_MAX_ROWS, 0 keeps everything)
+
+        Returns:
+            int: Number of candles that were not stored before
+        """
+        if not self.enabled or candles is None or candles.empty:
+            return 0
+        new = candles[CANDLE_COLUMNS].copy()
+        new['timestamp'] = pd.to_datetime(new['timestamp'])
+        new[CANDLE_COLUMNS[1:]] = new[CANDLE_COLUMNS[1:]].astype('float64')
+
+        path = self.path(source, symbol, timeframe)
+        with self._lock(path):
+            existing = self.read(source, symbol, timeframe)
+            before = set(existing['timestamp']) if not existing.empty else set()
+            combined = pd.concat([existing, new], ignore_index=True) if not existing.empty else new
+            combined = combined.drop_duplicates('timestamp', keep='last').sort_values('timestamp')
+            limit = self.max_rows if max_rows is None else max_rows
+            if limit:
+                combined = combined.tail(limit)
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.parquet.tmp')
+            pq.write_table(pa.Table.from_pandas(combined, preserve_index=False), tmp_path)
+            os.replace(tmp_path, path)
+
+        added = int((~new['timestamp'].isin(before)).sum())
+        debug(f"Stored {added} new {symbol} {timeframe} candles from {source} ({len(combined)} total)", file_only=True)
+        return added
+
+# Create a singleton instance
+candle_store = CandleStore()
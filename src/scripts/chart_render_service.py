@@ -0,0 +1,166 @@
+"""
+Anarcho Capital's Chart Render Service
+Analysis cycles persist only the numeric candle/indicator series; PNGs are
+rendered on demand in a background process when the UI asks for them and
+cached by a hash of the data, so an unchanged series is never drawn twice
+Built with love by Anarcho Capital
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from src import config
+from src.scripts.logger import debug, info, warning, error
+from src.scripts.chart_renderer import init_render_worker, render_series_file
+
+DEFAULT_CHARTS_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'data' / 'charts'
+
+
+class ChartRenderService:
+    """Persists chart series and renders cached PNGs on request"""
+
+    def __init__(self, charts_dir=DEFAULT_CHARTS_DIR, max_workers=None):
+        self.series_dir = Path(charts_dir) / 'series'
+        self.rendered_dir = Path(charts_dir) / 'rendered'
+        self.max_workers = max_workers or getattr(config, 'CHART_RENDER_WORKERS', 1)
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _series_paths(self, symbol, timeframe):
+        stem = f"{symbol}_{timeframe}"
+        return self.series_dir / f"{stem}.csv", self.series_dir / f"{stem}.json"
+
+    def save_series(self, symbol, timeframe, df, fib_levels=None):
+        """
+        Persist the candles and indicator columns a chart needs
+
+        Returns:
+            str: Hash of the series, which keys the rendered PNG
+        """
+        indicators = list(getattr(config, 'CHART_INDICATORS', []))
+        columns = [c for c in ['open', 'high', 'low', 'close', 'volume'] + indicators + ['MACD_Signal'] if c in df.columns]
+        frame = df.set_index('timestamp') if 'timestamp' in df.columns else df
+        csv_text = frame[columns].to_csv()
+
+        meta = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'indicators': indicators,
+            'fib_levels': fib_levels or {},
+            'style': getattr(config, 'CHART_STYLE', 'yahoo'),
+            'volume': getattr(config, 'CHART_VOLUME_PANEL', True),
+        }
+        digest = hashlib.sha256(csv_text.encode('utf-8'))
+        digest.update(json.dumps(meta, sort_keys=True, default=str).encode('utf-8'))
+        meta['data_hash'] = digest.hexdigest()[:16]
+        meta['updated'] = time.time()
+
+        series_path, meta_path = self._series_paths(symbol, timeframe)
+        self.series_dir.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a reader never sees a half-written series
+        for path, text in ((series_path, csv_text), (meta_path, json.dumps(meta, default=str))):
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            tmp_path.write_text(text)
+            os.replace(tmp_path, path)
+        debug(f"Saved chart series {symbol} {timeframe} ({len(frame)} candles, hash {meta['data_hash']})", file_only=True)
+        return meta['data_hash']
+
+    def load_meta(self, symbol, timeframe):
+        """Metadata for the latest persisted series, or None"""
+        _, meta_path = self._series_paths(symbol, timeframe)
+        try:
+            return json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _chart_path(self, meta):
+        return self.rendered_dir / f"{meta['symbol']}_{meta['timeframe']}_{meta['data_hash']}.png"
+
+    def cached_chart(self, symbol, timeframe):
+        """Path of the PNG for the latest series if it has been rendered"""
+        meta = self.load_meta(symbol, timeframe)
+        if meta is None:
+            return None
+        chart_path = self._chart_path(meta)
+        return chart_path if chart_path.exists() else None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Spawned (not forked) workers so rendering never inherits UI or agent threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_render_worker
+            )
+        return self._executor
+
+    def request_chart(self, symbol, timeframe, on_ready=None):
+        """
+        Get the chart for the latest series, rendering it in the background if needed
+
+        Args:
+            on_ready (callable): Called with the PNG path from a background thread once a
+                render requested here finishes (not called when the chart was already cached)
+
+        Returns:
+            Path: The cached PNG, or None if there is no series yet or it is still rendering
+        """
+        meta = self.load_meta(symbol, timeframe)
+        if meta is None:
+            return None
+        chart_path = self._chart_path(meta)
+        if chart_path.exists():
+            return chart_path
+
+        with self._lock:
+            future = self._pending.get(chart_path)
+            if future is None:
+                series_path, _ = self._series_paths(symbol, timeframe)
+                try:
+                    self.rendered_dir.mkdir(parents=True, exist_ok=True)
+                    future = self._get_executor().submit(
+                        render_series_file, str(series_path), str(chart_path), symbol, timeframe,
+                        meta['indicators'], meta['fib_levels'], meta['style'], meta['volume']
+                    )
+                except Exception as e:
+                    error(f"Could not start chart render for {symbol} {timeframe}: {str(e)}")
+                    return None
+                self._pending[chart_path] = future
+                future.add_done_callback(lambda f, path=chart_path: self._render_done(path, f))
+                info(f"Rendering {symbol} {timeframe} chart in the background")
+        if on_ready is not None:
+            future.add_done_callback(lambda f: f.exception() is None and on_ready(chart_path))
+        return None
+
+    def _render_done(self, chart_path, future):
+        with self._lock:
+            self._pending.pop(chart_path, None)
+        try:
+            _, seconds = future.result()
+        except Exception as e:
+            warning(f"Chart render failed for {chart_path.name}: {str(e)}")
+            return
+        debug(f"Rendered {chart_path.name} in {seconds:.2f}s", file_only=True)
+        # Older renders of the same symbol/timeframe are superseded
+        prefix = chart_path.name.rsplit('_', 1)[0] + '_'
+        for old in self.rendered_dir.glob(f"{prefix}*.png"):
+            if old != chart_path and old.name.rsplit('_', 1)[0] + '_' == prefix:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Create a singleton instance
+chart_render_service = ChartRenderService()
@@ -0,0 +1,82 @@
+"""
+Anarcho Capital's Chart Renderer
+Renders candlestick charts with indicators and Fibonacci levels to PNG.
+Kept free of agent imports so it can run in a separate worker process
+(matplotlib is CPU-bound and not thread-safe)
+Built with love by Anarcho Capital
+"""
+
+import time
+
+import pandas as pd
+
+MOVING_AVERAGE_COLORS = {'20EMA': 'blue', '50EMA': 'orange', '100EMA': 'purple', '200SMA': 'green'}
+
+
+def init_render_worker():
+    """Process pool initializer: use the non-interactive backend in worker processes"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def render_chart(chart_path, symbol, timeframe, df, indicators, fib_levels=None, style='yahoo', volume=True):
+    """
+    Render one chart to chart_path
+
+    Args:
+        df (DataFrame): OHLCV candles with indicator columns already calculated
+        indicators (list): Indicator names to draw (e.g. config.CHART_INDICATORS)
+        fib_levels (dict): Fibonacci level -> price, or None
+
+    Returns:
+        tuple: (chart_path as str, render seconds)
+    """
+    import mplfinance as mpf
+    import matplotlib.pyplot as plt
+
+    start = time.time()
+    df = df.copy()
+    df.index = pd.to_datetime(df.index)
+
+    ap = []
+    for indicator, color in MOVING_AVERAGE_COLORS.items():
+        if indicator in indicators and indicator in df.columns and not df[indicator].isna().all():
+            ap.append(mpf.make_addplot(df[indicator], color=color))
+
+    if 'MACD' in indicators and 'MACD' in df.columns:
+        ap.append(mpf.make_addplot(df['MACD'], panel=1, color='blue', secondary_y=False))
+        ap.append(mpf.make_addplot(df['MACD_Signal'], panel=1, color='orange', secondary_y=False))
+
+    if 'RSI' in indicators and 'RSI' in df.columns:
+        ap.append(mpf.make_addplot(df['RSI'], panel=2, color='purple', ylim=(0, 100), secondary_y=False))
+
+    # Fibonacci levels are horizontal lines, not full-length series
+    fib_prices, fib_colors = [], []
+    for level, price in (fib_levels or {}).items():
+        if level in [0.0, 1.0]:  # Skip the extremes (0% and 100%)
+            continue
+        fib_prices.append(price)
+        # 50% is often most important, 61.8% is the golden ratio
+        fib_colors.append('red' if level == 0.5 else 'goldenrod' if level == 0.618 else 'gray')
+    extra = {}
+    if fib_prices:
+        extra['hlines'] = dict(hlines=fib_prices, colors=fib_colors, linestyle='--', linewidths=1, alpha=0.6)
+
+    mpf.plot(df,
+             type='candle',
+             style=style,
+             volume=volume,
+             addplot=ap if ap else None,
+             title=f"\n{symbol} {timeframe} Chart Analysis",
+             savefig=str(chart_path),
+             **extra)
+    plt.close('all')
+
+    return str(chart_path), time.time() - start
+
+
+def render_series_file(series_path, chart_path, symbol, timeframe, indicators, fib_levels=None, style='yahoo', volume=True):
+    """Load a persisted candle/indicator series and render it (worker process entry point)"""
+    df = pd.read_csv(series_path, index_col=0, parse_dates=True)
+    fib_levels = {float(level): price for level, price in (fib_levels or {}).items()}
+    return render_chart(chart_path, symbol, timeframe, df, indicators, fib_levels, style, volume)
@@ -0,0 +1,234 @@
+"""
+Anarcho Capital's Hyperliquid Candle Backfill
+Downloads long candle histories by splitting the range into non-overlapping
+5000-candle windows, fetching them concurrently under a request rate limit and
+writing them into the candle store. Windows that returned candles are
+checkpointed so an interrupted backfill resumes where it stopped; empty windows
+are retried on the next run
+Built with love by Anarcho Capital
+
+candleSnapshot only serves roughly the most recent 5000 candles per timeframe,
+so older windows (most of a multi-year 1m range) come back empty; the coverage
+line logged at the end shows how much of the requested range was stored.
+
+Backfilled candles go to the 'hyperliquid_history' source, which nothing reads
+yet: nice_funcs_hl.get_data only reads its own 'hyperliquid' store. Load them
+with candle_store.read('hyperliquid_history', symbol, timeframe).
+
+Usage:
+    python -m src.scripts.hl_backfill --symbols BTC ETH --timeframe 1m --start 2023-01-01
+"""
+
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+
+from src import config
+from src.nice_funcs_hl import BASE_URL, BATCH_SIZE, MAX_RETRIES
+from src.scripts.candle_store import candle_store, timeframe_seconds
+from src.scripts.candle_decoder import decode_candles, filter_candles, candles_to_frame
+from src.scripts.logger import debug, info, warning, error
+
+# Kept apart from get_data's 'hyperliquid' store, which trims to CANDLE_STORE_MAX_ROWS
+BACKFILL_SOURCE = 'hyperliquid_history'
+
+
+class RateLimiter:
+    """Spaces requests evenly across threads to at most `rate` per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def backfill_windows(start_ms, end_ms, interval_ms, window_candles=BATCH_SIZE):
+    """
+    Split [start_ms, end_ms) into non-overlapping windows of window_candles candles
+
+    Windows are aligned to multiples of the window length so the same window always
+    gets the same start, which is what checkpoints are keyed by.
+    """
+    window_ms = window_candles * interval_ms
+    window_start = (start_ms // window_ms) * window_ms
+    windows = []
+    while window_start < end_ms:
+        windows.append((window_start, window_start + window_ms))
+        window_start += window_ms
+    return windows
+
+
+def _fetch_window(symbol, timeframe, window_start, window_end, limiter):
+    """Fetch one window's candles (exchange open times)"""
+    for attempt in range(MAX_RETRIES):
+        limiter.wait()
+        try:
+            response = requests.post(
+                BASE_URL,
+                headers={'Content-Type': 'application/json'},
+                json={
+                    "type": "candleSnapshot",
+                    "req": {
+                        "coin": symbol,
+                        "interval": timeframe,
+                        "startTime": window_start,
+                        "endTime": window_end - 1,
+                        "limit": BATCH_SIZE
+                    }
+                },
+                timeout=30
+            )
+            if response.status_code == 200:
+                candles = decode_candles(response.json() or [])
+                # Windows are half-open, so a candle on the seam belongs to exactly one of them
+                in_window = (candles['timestamp'] >= window_start) & (candles['timestamp'] < window_end)
+                return candles_to_frame(filter_candles(candles, in_window))
+            warning(f"HTTP {response.status_code} for {symbol} {timeframe} window (attempt {attempt + 1})")
+        except requests.exceptions.RequestException as e:
+            warning(f"Backfill request failed for {symbol} {timeframe} (attempt {attempt + 1}): {str(e)}")
+        time.sleep(2 ** attempt)
+    raise RuntimeError(f"Could not fetch {symbol} {timeframe} window starting {pd.to_datetime(window_start, unit='ms')}")
+
+
+class BackfillCheckpoint:
+    """Window starts that returned candles per (symbol, timeframe), stored next to the candles"""
+
+    def __init__(self, symbol, timeframe):
+        self.path = candle_store.path(BACKFILL_SOURCE, symbol, timeframe).with_name('backfill_checkpoint.json')
+        try:
+            self.done = set(json.loads(self.path.read_text()).get('completed_windows', []))
+        except (OSError, ValueError):
+            self.done = set()
+
+    def save(self, window_starts):
+        self.done.update(window_starts)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps({'completed_windows': sorted(self.done), 'updated': time.time()}))
+        tmp_path.replace(self.path)
+
+
+def backfill_candles(symbol, timeframe, start, end=None, workers=None, requests_per_second=None, flush_windows=None):
+    """
+    Backfill candles for one symbol into the candle store
+
+    Args:
+        start, end (datetime): UTC range to cover (end defaults to now)
+        workers (int): Concurrent window requests
+        requests_per_second (float): Request rate limit shared by the workers
+        flush_windows (int): Windows buffered between store writes and checkpoints
+
+    Returns:
+        int: Candles added to the store
+    """
+    interval_seconds = timeframe_seconds(timeframe)
+    if interval_seconds is None:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    workers = workers or getattr(config, 'HL_BACKFILL_WORKERS', 4)
+    limiter = RateLimiter(requests_per_second or getattr(config, 'HL_BACKFILL_REQUESTS_PER_SECOND', 1.0))
+    flush_windows = flush_windows or getattr(config, 'HL_BACKFILL_FLUSH_WINDOWS', 20)
+
+    end = end or datetime.utcnow()
+    start_ms = int(pd.Timestamp(start).timestamp() * 1000)
+    end_ms = int(pd.Timestamp(end).timestamp() * 1000)
+    now_ms = int(pd.Timestamp(datetime.utcnow()).timestamp() * 1000)
+    windows = backfill_windows(start_ms, end_ms, interval_seconds * 1000)
+
+    checkpoint = BackfillCheckpoint(symbol, timeframe)
+    todo = [w for w in windows if w[0] not in checkpoint.done]
+    info(f"Backfilling {symbol} {timeframe}: {len(windows)} windows, {len(windows) - len(todo)} already done")
+
+    added = 0
+    empty_windows = 0
+    buffer, finished = [], []
+
+    def flush():
+        nonlocal added
+        if buffer:
+            added += candle_store.append(BACKFILL_SOURCE, symbol, timeframe, pd.concat(buffer, ignore_index=True), max_rows=0)
+        # A window that still reaches into the future is refetched next time.
+        # Empty windows never get here: candleSnapshot returns nothing for history
+        # it no longer serves, so an empty window is not proof there was no trading
+        checkpoint.save([w_start for w_start, w_end in finished if w_end <= now_ms])
+        buffer.clear()
+        finished.clear()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hl-backfill") as executor:
+        futures = {executor.submit(_fetch_window, symbol, timeframe, w_start, w_end, limiter): (w_start, w_end)
+                   for w_start, w_end in todo}
+        try:
+            for future in as_completed(futures):
+                window = futures[future]
+                try:
+                    candles = future.result()
+                except Exception as e:
+                    error(str(e))
+                    continue
+                if candles.empty:
+                    empty_windows += 1
+                else:
+                    buffer.append(candles)
+                    finished.append(window)
+                debug(f"{symbol} {timeframe}: window {pd.to_datetime(window[0], unit='ms')} -> {len(candles)} candles", file_only=True)
+                if len(finished) >= flush_windows:
+                    flush()
+        finally:
+            # Keep what was downloaded even when interrupted
+            for pending in futures:
+                pending.cancel()
+            flush()
+
+    info(f"Backfilled {symbol} {timeframe}: {added} new candles")
+    if empty_windows:
+        warning(f"{symbol} {timeframe}: {empty_windows} windows returned no candles and were not checkpointed "
+                f"(outside the history candleSnapshot serves, or before listing)")
+    _report_coverage(symbol, timeframe, start_ms, end_ms, interval_seconds * 1000)
+    return added
+
+
+def _report_coverage(symbol, timeframe, start_ms, end_ms, interval_ms):
+    """Log how much of [start_ms, end_ms) the stored backfill actually covers"""
+    stored = candle_store.read(BACKFILL_SOURCE, symbol, timeframe, start=pd.to_datetime(start_ms, unit='ms'))
+    stored = stored[stored['timestamp'] < pd.to_datetime(end_ms, unit='ms')]
+    expected = max(1, -(-(end_ms - start_ms) // interval_ms))
+    if stored.empty:
+        warning(f"{symbol} {timeframe}: no stored candles cover the requested range")
+        return
+    info(f"{symbol} {timeframe} coverage: {len(stored)}/{expected} candles ({len(stored) / expected:.1%}), "
+         f"{stored['timestamp'].iloc[0]} to {stored['timestamp'].iloc[-1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Hyperliquid candles into the local candle store")
+    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument("--start", required=True, help="UTC start date, e.g. 2023-01-01")
+    parser.add_argument("--end", help="UTC end date (default: now)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--rate", type=float, help="Max requests per second")
+    args = parser.parse_args()
+
+    if not candle_store.enabled:
+        warning("Candle store is disabled (pyarrow missing or CANDLE_STORE_ENABLED=False)")
+        return
+    for symbol in args.symbols:
+        backfill_candles(symbol, args.timeframe, pd.Timestamp(args.start), pd.Timestamp(args.end) if args.end else None,
+                         workers=args.workers, requests_per_second=args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Anarcho Capital's Indicator Engine
+Stateful EMA/SMA/MACD/RSI/ATR/Bollinger indicators shared by the chart agent
+and the data helpers. The first call for a (symbol, timeframe) warms up with
+vectorized pandas over the full history; later calls only feed the candles
+that arrived since, updating the rolling state in O(1) per candle
+Built with love by Anarcho Capital
+"""
+
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+NAN = float('nan')
+
+
+def _is_nan(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class _Window:
+    """Fixed-length window with a running sum (and optional sum of squares)"""
+
+    def __init__(self, length, values=(), squares=False):
+        self.length = length
+        self.values = deque(values, maxlen=length)
+        self.total = float(sum(self.values))
+        self.squares = float(sum(v * v for v in self.values)) if squares else None
+
+    def step(self, x, commit):
+        """Return (sum, sum of squares, full) with x appended"""
+        dropped = self.values[0] if len(self.values) == self.length else 0.0
+        total = self.total + x - dropped
+        squares = None if self.squares is None else self.squares + x * x - dropped * dropped
+        full = len(self.values) + (0 if len(self.values) == self.length else 1) == self.length
+        if commit:
+            self.values.append(x)
+            self.total, self.squares = total, squares
+        return total, squares, full
+
+
+class EMA:
+    """Exponential moving average (pandas ewm(span, adjust=False) semantics)"""
+
+    def __init__(self, column, span, source='close'):
+        self.columns = [column]
+        self.span = span
+        self.source = source
+        self.alpha = 2 / (span + 1)
+
+    def warm_up(self, df):
+        series = df[self.source].astype('float64').ewm(span=self.span, adjust=False).mean()
+        return {self.columns[0]: series}, {'value': float(series.iloc[-1])}
+
+    def step(self, state, candle, commit=True):
+        x = candle[self.source]
+        prev = state['value']
+        value = x if _is_nan(prev) else self.alpha * x + (1 - self.alpha) * prev
+        if commit:
+            state['value'] = value
+        return {self.columns[0]: value}
+
+
+class SMA:
+    """Simple moving average over a fixed window"""
+
+    def __init__(self, column, length, source='close'):
+        self.columns = [column]
+        self.length = length
+        self.source = source
+
+    def warm_up(self, df):
+        close = df[self.source].astype('float64')
+        series = close.rolling(window=self.length).mean()
+        return {self.columns[0]: series}, {'window': _Window(self.length, close.iloc[-self.length:])}
+
+    def step(self, state, candle, commit=True):
+        total, _, full = state['window'].step(candle[self.source], commit)
+        return {self.columns[0]: total / self.length if full else NAN}
+
+
+class MACD:
+    """MACD line, signal line and (optionally) histogram from adjust=False EMAs"""
+
+    def __init__(self, macd_column, signal_column, hist_column=None, fast=12, slow=26, signal=9, source='close'):
+        self.columns = [c for c in (macd_column, hist_column, signal_column) if c]
+        self.macd_column, self.signal_column, self.hist_column = macd_column, signal_column, hist_column
+        self.source = source
+        self.alphas = (2 / (fast + 1), 2 / (slow + 1), 2 / (signal + 1))
+        self.spans = (fast, slow, signal)
+
+    def warm_up(self, df):
+        close = df[self.source].astype('float64')
+        fast = close.ewm(span=self.spans[0], adjust=False).mean()
+        slow = close.ewm(span=self.spans[1], adjust=False).mean()
+        macd = fast - slow
+        signal = macd.ewm(span=self.spans[2], adjust=False).mean()
+        columns = {self.macd_column: macd, self.signal_column: signal}
+        if self.hist_column:
+            columns[self.hist_column] = macd - signal
+        state = {'fast': float(fast.iloc[-1]), 'slow': float(slow.iloc[-1]), 'signal': float(signal.iloc[-1])}
+        return columns, state
+
+    def step(self, state, candle, commit=True):
+        x = candle[self.source]
+        values = {}
+        for name, alpha, source in (('fast', self.alphas[0], x), ('slow', self.alphas[1], x)):
+            prev = state[name]
+            values[name] = source if _is_nan(prev) else alpha * source + (1 - alpha) * prev
+        macd = values['fast'] - values['slow']
+        prev = state['signal']
+        signal = macd if _is_nan(prev) else self.alphas[2] * macd + (1 - self.alphas[2]) * prev
+        if commit:
+            state.update(fast=values['fast'], slow=values['slow'], signal=signal)
+        result = {self.macd_column: macd, self.signal_column: signal}
+        if self.hist_column:
+            result[self.hist_column] = macd - signal
+        return result
+
+
+class RSI:
+    """
+    Relative strength index
+
+    smoothing='sma' averages gains/losses over a rolling window (the chart agent's RSI),
+    smoothing='wilder' uses Wilder's running average (the pandas_ta RSI)
+    """
+
+    def __init__(self, column, length=14, smoothing='sma', source='close'):
+        self.columns = [column]
+        self.length = length
+        self.smoothing = smoothing
+        self.source = source
+
+    @staticmethod
+    def _rsi(gain, loss):
+        if loss == 0:
+            return 100.0 if gain > 0 else NAN
+        return 100 - 100 / (1 + gain / loss)
+
+    def warm_up(self, df):
+        close = df[self.source].astype('float64')
+        delta = close.diff()
+        gains = delta.where(delta > 0, 0)
+        losses = -delta.where(delta < 0, 0)
+        if self.smoothing == 'wilder':
+            alpha = 1 / self.length
+            avg_gain = gains.ewm(alpha=alpha, adjust=False, min_periods=self.length).mean()
+            avg_loss = losses.ewm(alpha=alpha, adjust=False, min_periods=self.length).mean()
+            state = {
+                'avg_gain': float(gains.ewm(alpha=alpha, adjust=False).mean().iloc[-1]),
+                'avg_loss': float(losses.ewm(alpha=alpha, adjust=False).mean().iloc[-1]),
+                'count': len(close),
+            }
+        else:
+            avg_gain = gains.rolling(window=self.length).mean()
+            avg_loss = losses.rolling(window=self.length).mean()
+            state = {
+                'gains': _Window(self.length, gains.iloc[-self.length:]),
+                'losses': _Window(self.length, losses.iloc[-self.length:]),
+            }
+        state['prev_close'] = float(close.iloc[-1])
+        return {self.columns[0]: 100 - (100 / (1 + avg_gain / avg_loss))}, state
+
+    def step(self, state, candle, commit=True):
+        x = candle[self.source]
+        delta = x - state['prev_close']
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if self.smoothing == 'wilder':
+            alpha = 1 / self.length
+            avg_gain = alpha * gain + (1 - alpha) * state['avg_gain']
+            avg_loss = alpha * loss + (1 - alpha) * state['avg_loss']
+            count = state['count'] + 1
+            value = self._rsi(avg_gain, avg_loss) if count >= self.length else NAN
+            if commit:
+                state.update(avg_gain=avg_gain, avg_loss=avg_loss, count=count)
+        else:
+            gain_total, _, full = state['gains'].step(gain, commit)
+            loss_total, _, _ = state['losses'].step(loss, commit)
+            value = self._rsi(gain_total, loss_total) if full else NAN
+        if commit:
+            state['prev_close'] = x
+        return {self.columns[0]: value}
+
+
+class ATR:
+    """Average true range as a rolling mean of the true range"""
+
+    def __init__(self, column, length=14, high='high', low='low', close='close'):
+        self.columns = [column]
+        self.length = length
+        self.high, self.low, self.close = high, low, close
+
+    def warm_up(self, df):
+        high, low, close = (df[c].astype('float64') for c in (self.high, self.low, self.close))
+        true_range = pd.concat(
+            [high - low, np.abs(high - close.shift()), np.abs(low - close.shift())], axis=1
+        ).max(axis=1)
+        state = {'window': _Window(self.length, true_range.iloc[-self.length:]), 'prev_close': float(close.iloc[-1])}
+        return {self.columns[0]: true_range.rolling(window=self.length).mean()}, state
+
+    def step(self, state, candle, commit=True):
+        high, low, prev_close = candle[self.high], candle[self.low], state['prev_close']
+        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        total, _, full = state['window'].step(true_range, commit)
+        if commit:
+            state['prev_close'] = candle[self.close]
+        return {self.columns[0]: total / self.length if full else NAN}
+
+
+class Bollinger:
+    """Bollinger bands with pandas_ta column names (BBL/BBM/BBU/BBB/BBP_<length>_<std>)"""
+
+    def __init__(self, length=5, std=2.0, source='close'):
+        self.length = length
+        self.std = float(std)
+        self.source = source
+        suffix = f"_{length}_{self.std}"
+        self.lower, self.mid, self.upper, self.bandwidth, self.percent = (
+            f"{name}{suffix}" for name in ('BBL', 'BBM', 'BBU', 'BBB', 'BBP')
+        )
+        self.columns = [self.lower, self.mid, self.upper, self.bandwidth, self.percent]
+
+    def _bands(self, close, mid, deviation):
+        lower, upper = mid - self.std * deviation, mid + self.std * deviation
+        return {
+            self.lower: lower,
+            self.mid: mid,
+            self.upper: upper,
+            self.bandwidth: 100 * (upper - lower) / mid,
+            self.percent: (close - lower) / (upper - lower),
+        }
+
+    def warm_up(self, df):
+        close = df[self.source].astype('float64')
+        rolling = close.rolling(window=self.length)
+        columns = self._bands(close, rolling.mean(), rolling.std(ddof=0))
+        return columns, {'window': _Window(self.length, close.iloc[-self.length:], squares=True)}
+
+    def step(self, state, candle, commit=True):
+        x = candle[self.source]
+        total, squares, full = state['window'].step(x, commit)
+        if not full:
+            return {column: NAN for column in self.columns}
+        mid = total / self.length
+        deviation = math.sqrt(max(squares / self.length - mid * mid, 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {k: float(v) for k, v in self._bands(np.float64(x), np.float64(mid), np.float64(deviation)).items()}
+
+
+class _SeriesState:
+    """Rolling indicator state and committed output for one (symbol, timeframe)"""
+
+    def __init__(self, states, history, last_time, last_close):
+        self.states = states
+        self.history = history
+        self.last_time = last_time
+        self.last_close = last_close
+
+
+class IndicatorEngine:
+    """
+    Computes a fixed set of indicators for candle frames, keeping state per key
+
+    The newest candle of a fetch is usually still forming, so it is treated as
+    provisional: its values are computed from the committed state without
+    updating it, and it is fed for real once a later candle has arrived.
+    """
+
+    def __init__(self, indicators, time_column=None, close_column='close', max_history=5000):
+        """
+        Args:
+            indicators (list): Indicator specs (EMA, SMA, MACD, RSI, ATR, Bollinger)
+            time_column (str): Column holding candle times (the index is used if absent)
+            close_column (str): Column used to check that cached history still matches
+            max_history (int): Committed indicator rows kept per key
+        """
+        self.indicators = indicators
+        self.time_column = time_column
+        self.close_column = close_column
+        self.max_history = max_history
+        self.columns = [column for indicator in indicators for column in indicator.columns]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _times(self, df):
+        if self.time_column and self.time_column in df.columns:
+            return pd.Index(df[self.time_column])
+        return df.index
+
+    def reset(self, key=None):
+        """Forget the rolling state for one key (or all keys)"""
+        with self._lock:
+            if key is None:
+                self._series.clear()
+            else:
+                self._series.pop(key, None)
+
+    def apply(self, df, key=None):
+        """
+        Add the indicator columns to df (in place) and return it
+
+        Args:
+            df (DataFrame): Candles in time order
+            key (hashable): e.g. (symbol, timeframe); without a key every call is a full warm-up
+        """
+        if df is None or df.empty:
+            return df
+        times = self._times(df)
+
+        with self._lock:
+            series = self._series.get(key) if key is not None else None
+
+        if len(df) < 2:
+            # Nothing to commit yet; compute directly and keep no state
+            for indicator in self.indicators:
+                for column, values in indicator.warm_up(df)[0].items():
+                    df[column] = values
+            return df
+
+        new_rows = self._rows_after(series, df, times) if series is not None else None
+        if new_rows is None:
+            series = self._warm_up(df, times)
+        else:
+            self._advance(series, df, times, new_rows)
+
+        if key is not None:
+            with self._lock:
+                self._series[key] = series
+        return df
+
+    def _rows_after(self, series, df, times):
+        """Positions of candles after the committed one, or None if the cached history no longer matches"""
+        if not times.is_unique:
+            return None
+        if len(series.history) and times[0] < series.history.index[0]:
+            return None  # Asked for older candles than the cached output covers
+        position = times.get_indexer([series.last_time])[0]
+        if position < 0 or position == len(df) - 1:
+            return None
+        if float(df[self.close_column].iloc[position]) != series.last_close:
+            return None
+        return range(position + 1, len(df))
+
+    def _warm_up(self, df, times):
+        columns, states = {}, []
+        committed = df.iloc[:-1]
+        for indicator in self.indicators:
+            values, state = indicator.warm_up(committed)
+            columns.update((column, np.asarray(series, dtype='float64')) for column, series in values.items())
+            states.append(state)
+
+        history = pd.DataFrame(columns, index=times[:-1])
+        series = _SeriesState(states, history.iloc[-self.max_history:], times[-2], float(committed[self.close_column].iloc[-1]))
+        last = self._step(series, df.iloc[-1], commit=False)
+
+        for column in self.columns:
+            df[column] = np.append(history[column].to_numpy(dtype='float64'), last[column])
+        return series
+
+    def _step(self, series, row, commit):
+        candle = {name: float(value) for name, value in row.items() if isinstance(value, (int, float, np.number))}
+        values = {}
+        for indicator, state in zip(self.indicators, series.states):
+            values.update(indicator.step(state, candle, commit))
+        return values
+
+    def _advance(self, series, df, times, new_rows):
+        committed_rows = list(new_rows)[:-1]
+        if committed_rows:
+            added = [self._step(series, df.iloc[position], commit=True) for position in committed_rows]
+            added = pd.DataFrame(added, index=times[committed_rows[0]:committed_rows[-1] + 1], columns=self.columns)
+            series.history = pd.concat([series.history, added]).iloc[-self.max_history:]
+            series.last_time = times[committed_rows[-1]]
+            series.last_close = float(df[self.close_column].iloc[committed_rows[-1]])
+
+        last = self._step(series, df.iloc[-1], commit=False)
+        known = series.history.reindex(times[:-1])
+        for column in self.columns:
+            df[column] = np.append(known[column].to_numpy(dtype='float64'), last[column])
@@ -0,0 +1,282 @@
+"""
+Anarcho Capital's Jupiter Batch Executor
+Prefetches Jupiter quotes for a batch of trades concurrently, validates them
+up front and submits the signed swaps with bounded parallelism. Each trade is
+split into orders of at most max_usd_order_size, like the legacy entry/exit
+helpers; every order after the first is re-quoted just before it is sent
+Built with love by Anarcho Capital
+"""
+
+import os
+import base64
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src import config
+from src import nice_funcs as n
+from src.scripts.logger import debug, info, warning, error
+
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+USDC_DECIMALS = 6
+JUPITER_API_URL = getattr(config, 'JUPITER_API_URL', "https://quote-api.jup.ag/v6")
+
+# Jupiter floors otherAmountThreshold, so the worst case sits just past the requested slippage
+SLIPPAGE_ROUNDING_BPS = 1
+
+# Pooled HTTP session shared by all batch workers
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+_decimals_cache = {USDC_MINT: USDC_DECIMALS}
+_decimals_lock = threading.Lock()
+
+
+def _get_decimals(mint):
+    """Get token decimals, cached for the life of the process"""
+    with _decimals_lock:
+        if mint in _decimals_cache:
+            return _decimals_cache[mint]
+    decimals = n.get_decimals(mint)
+    with _decimals_lock:
+        _decimals_cache[mint] = decimals
+    return decimals
+
+
+def _max_workers(max_workers=None):
+    return max_workers or getattr(config, 'COPYBOT_BATCH_MAX_WORKERS', 5)
+
+
+def fetch_quote(input_mint, output_mint, amount, slippage_bps):
+    """Fetch a single Jupiter quote for an amount in native units"""
+    response = _session.get(
+        f"{JUPITER_API_URL}/quote",
+        params={
+            'inputMint': input_mint,
+            'outputMint': output_mint,
+            'amount': str(int(amount)),
+            'slippageBps': int(slippage_bps),
+        },
+        timeout=getattr(config, 'API_TIMEOUT_SECONDS', 15)
+    )
+    if response.status_code != 200:
+        raise ValueError(f"Quote failed: HTTP {response.status_code} {response.text[:200]}")
+    return response.json()
+
+
+def validate_quote(quote, max_price_impact_pct=None, max_slippage_bps=None):
+    """
+    Check a Jupiter quote before committing to it
+
+    The worst-case fill is otherAmountThreshold (the minimum output the swap
+    accepts); its shortfall from outAmount must stay within max_slippage_bps,
+    which defaults to COPYBOT_MAX_SLIPPAGE_BPS or else the slippage the quote
+    was requested with.
+
+    Returns:
+        str: Reason the quote was rejected, or None if it is acceptable
+    """
+    if max_price_impact_pct is None:
+        max_price_impact_pct = getattr(config, 'COPYBOT_MAX_PRICE_IMPACT_PCT', 5.0)
+    if max_slippage_bps is None:
+        max_slippage_bps = getattr(config, 'COPYBOT_MAX_SLIPPAGE_BPS', None) or quote.get('slippageBps') or config.slippage
+
+    if not quote or not quote.get('outAmount') or not quote.get('routePlan'):
+        return "no route found"
+    out_amount = int(quote['outAmount'])
+    if out_amount <= 0:
+        return "quote returns nothing"
+
+    # Jupiter reports price impact as a fraction (0.01 = 1%)
+    price_impact_pct = float(quote.get('priceImpactPct') or 0) * 100
+    if price_impact_pct > max_price_impact_pct:
+        return f"price impact {price_impact_pct:.2f}% exceeds {max_price_impact_pct:.2f}%"
+
+    # Allow for the floor: one native unit plus SLIPPAGE_ROUNDING_BPS
+    min_out = int(quote.get('otherAmountThreshold') or 0)
+    worst_case_bps = (out_amount - min_out - 1) / out_amount * 10000
+    if worst_case_bps > float(max_slippage_bps) + SLIPPAGE_ROUNDING_BPS:
+        return f"worst-case fill {worst_case_bps:.0f} bps below quote exceeds {max_slippage_bps} bps"
+
+    return None
+
+
+def _split_amount(amount, chunks):
+    """Split a native amount into `chunks` near-equal integer orders"""
+    size, remainder = divmod(int(amount), chunks)
+    return [size + (1 if i < remainder else 0) for i in range(chunks)]
+
+
+def _prepare_trade(trade):
+    """
+    Resolve mints and native amount for a trade, split it into orders of at most
+    max_usd_order_size, then fetch and validate the first order's quote
+
+    Later orders are quoted in _submit_trade, after the earlier ones have moved the pool.
+    """
+    slippage_bps = trade.get('slippage', config.slippage)
+    max_order_usd = trade.get('max_order_usd', config.max_usd_order_size)
+    try:
+        if trade['side'] == "BUY":
+            input_mint, output_mint = USDC_MINT, trade['token_mint']
+            amount = trade['usd_amount'] * (10 ** USDC_DECIMALS)
+        else:
+            input_mint, output_mint = trade['token_mint'], USDC_MINT
+            amount = trade['token_amount'] * (10 ** _get_decimals(trade['token_mint']))
+
+        if int(amount) <= 0:
+            trade['status'] = "rejected"
+            trade['error'] = "amount too small"
+            return trade
+
+        # The USD size of a sell is only known from a quote of the whole amount
+        full_quote = None
+        if trade['side'] == "BUY":
+            usd_value = trade['usd_amount']
+        else:
+            full_quote = fetch_quote(input_mint, output_mint, amount, slippage_bps)
+            usd_value = int(full_quote.get('outAmount') or 0) / (10 ** USDC_DECIMALS)
+        chunks = max(1, math.ceil(usd_value / max_order_usd)) if max_order_usd > 0 else 1
+
+        orders = _split_amount(amount, chunks)
+        if chunks == 1 and full_quote is not None:
+            quote = full_quote
+        else:
+            quote = fetch_quote(input_mint, output_mint, orders[0], slippage_bps)
+        reason = validate_quote(quote)
+        if reason:
+            trade['status'] = "rejected"
+            trade['error'] = reason if chunks == 1 else f"order 1/{chunks}: {reason}"
+            return trade
+
+        trade['route'] = (input_mint, output_mint, slippage_bps)
+        trade['orders'] = orders
+        trade['quote'] = quote
+        trade['status'] = "quoted"
+    except Exception as e:
+        trade['status'] = "failed"
+        trade['error'] = f"quote error: {str(e)}"
+    return trade
+
+
+def prefetch_quotes(trades, max_workers=None):
+    """Fetch and validate quotes for every trade concurrently (trades are updated in place)"""
+    if not trades:
+        return trades
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=_max_workers(max_workers)) as executor:
+        list(executor.map(_prepare_trade, trades))
+
+    quoted = sum(1 for t in trades if t.get('status') == "quoted")
+    info(f"Prefetched {quoted}/{len(trades)} Jupiter quotes in {time.time() - start:.2f}s")
+    for trade in trades:
+        if trade.get('status') != "quoted":
+            warning(f"Skipping {trade['side']} {trade.get('symbol', trade['token_mint'][:8])}: {trade.get('error')}")
+    return trades
+
+
+def _submit_order(quote, key, http_client):
+    """Build, sign and send one swap transaction; returns the transaction id"""
+    from solders.transaction import VersionedTransaction
+    from solana.rpc.types import TxOpts
+
+    response = _session.post(
+        f"{JUPITER_API_URL}/swap",
+        json={
+            "quoteResponse": quote,
+            "userPublicKey": str(key.pubkey()),
+            "prioritizationFeeLamports": config.PRIORITY_FEE
+        },
+        timeout=getattr(config, 'API_TIMEOUT_SECONDS', 15)
+    )
+    if response.status_code != 200:
+        raise ValueError(f"swap failed: HTTP {response.status_code} {response.text[:200]}")
+
+    tx_data = response.json()
+    if "swapTransaction" not in tx_data:
+        raise ValueError("swap response missing transaction")
+
+    raw_tx = VersionedTransaction.from_bytes(base64.b64decode(tx_data['swapTransaction']))
+    signed_tx = VersionedTransaction(raw_tx.message, [key])
+    return str(http_client.send_raw_transaction(bytes(signed_tx), TxOpts(skip_preflight=True)).value)
+
+
+def _submit_trade(trade, key, http_client):
+    """
+    Send a quoted trade's orders in sequence, stopping at the first failure
+
+    The first order uses the prefetched quote; each later one is re-quoted and
+    re-validated right before sending so its minimum output reflects the pool
+    after the earlier orders.
+    """
+    symbol = trade.get('symbol', trade['token_mint'][:8])
+    input_mint, output_mint, slippage_bps = trade['route']
+    orders = trade['orders']
+    trade['tx_ids'] = []
+    try:
+        for i, order_amount in enumerate(orders):
+            if i:
+                time.sleep(config.API_SLEEP_SECONDS)
+                quote = fetch_quote(input_mint, output_mint, order_amount, slippage_bps)
+                reason = validate_quote(quote)
+                if reason:
+                    raise ValueError(f"order {i + 1} quote rejected: {reason}")
+            else:
+                quote = trade['quote']
+            tx_id = _submit_order(quote, key, http_client)
+            trade['tx_ids'].append(tx_id)
+            info(f"{trade['side']} {symbol} order {i + 1}/{len(orders)} sent: https://solscan.io/tx/{tx_id}")
+        trade['tx_id'] = trade['tx_ids'][-1]
+        trade['status'] = "sent"
+    except Exception as e:
+        trade['status'] = "failed"
+        trade['error'] = f"{len(trade['tx_ids'])}/{len(orders)} orders sent, then: {str(e)}"
+        error(f"Error submitting {trade['side']} for {symbol}: {trade['error']}")
+    return trade
+
+
+def submit_trades(trades, max_workers=None):
+    """Sign and send all quoted trades with bounded parallelism"""
+    from solders.keypair import Keypair
+    from solana.rpc.api import Client
+
+    quoted = [t for t in trades if t.get('status') == "quoted"]
+    if not quoted:
+        return trades
+
+    key = Keypair.from_base58_string(os.getenv("SOLANA_PRIVATE_KEY"))
+    http_client = Client(os.getenv("RPC_ENDPOINT", "https://api.mainnet-beta.solana.com"))
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=_max_workers(max_workers)) as executor:
+        list(executor.map(lambda t: _submit_trade(t, key, http_client), quoted))
+
+    sent = sum(1 for t in quoted if t['status'] == "sent")
+    info(f"Submitted {sent}/{len(quoted)} swaps in {time.time() - start:.2f}s")
+    return trades
+
+
+def execute_trade_batch(trades, max_workers=None):
+    """
+    Quote, validate and submit a batch of trades
+
+    Args:
+        trades (list): Trade dicts with 'side' ('BUY'/'SELL') and 'token_mint', plus
+            'usd_amount' for buys or 'token_amount' (UI units) for sells.
+            Optional 'slippage' (bps), 'max_order_usd' (defaults to
+            config.max_usd_order_size) and 'symbol' for logging.
+
+    Returns:
+        list: The same trades, each with 'status' ('sent', 'rejected' or 'failed'),
+            and 'tx_ids' (one per order) or 'error'
+    """
+    start = time.time()
+    prefetch_quotes(trades, max_workers)
+    submit_trades(trades, max_workers)
+    debug(f"Trade batch of {len(trades)} finished in {time.time() - start:.2f}s", file_only=True)
+    return trades
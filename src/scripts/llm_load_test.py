@@ -0,0 +1,181 @@
+"""
+Anarcho Capital's LLM Pipeline Load Test
+Runs the chart, CopyBot and DCA analysis stages against the local simulation
+model at 10x/100x/1000x the configured token counts and reports cycle throughput
+Built with love by Anarcho Capital
+
+Usage:
+    python -m src.scripts.llm_load_test --multipliers 10 100 1000 --latency 0.05 --failure-rate 0.02
+"""
+
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src import config
+from src.models.model_factory import model_factory
+from src.scripts.logger import info, warning
+from src.scripts.prompt_features import FEATURE_LEGEND, count_tokens, encode_market_data
+from src.scripts.batch_analysis import BATCH_SYSTEM_PROMPT, build_batch_prompt, chunked, parse_batch_response
+
+PIPELINES = ("chart", "copybot", "dca")
+DEFAULT_MULTIPLIERS = (10, 100, 1000)
+
+
+def synthetic_ohlcv(seed, bars):
+    """Seeded random-walk candles with the indicator columns the agents send"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars)) * close
+    df = pd.DataFrame({
+        'open': np.roll(close, 1),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.lognormal(10, 1, bars),
+    })
+    df['20EMA'] = df['close'].ewm(span=20, adjust=False).mean()
+    df['50EMA'] = df['close'].ewm(span=50, adjust=False).mean()
+    delta = df['close'].diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    df['RSI'] = 100 - 100 / (1 + gain / loss.replace(0, np.nan))
+    return df
+
+
+def base_token_count(pipeline):
+    """Tokens (or symbol/timeframe jobs) one normal cycle of the pipeline analyzes"""
+    if pipeline == "chart":
+        return max(1, len(config.TOKEN_MAP) * len(config.TIMEFRAMES))
+    if pipeline == "dca":
+        return max(1, len(config.DCA_MONITORED_TOKENS))
+    return max(1, len(config.MONITORED_TOKENS))
+
+
+def build_requests(pipeline, tokens, bars):
+    """Build the (system_prompt, prompt, expected_tokens) requests for one cycle"""
+    contexts = [(f"TOKEN{i}", encode_market_data(synthetic_ohlcv(i, bars))) for i in range(tokens)]
+
+    if pipeline == "dca":
+        token_list = "Tokens:\n" + "\n".join(f"- {token}: {features}" for token, features in contexts)
+        prompt = config.DCA_AI_PROMPT.format(
+            token_list=token_list,
+            staking_rewards="Staking rewards: simulated",
+            apy_data="APY data: marinade 7.0%, lido 6.5%, jito 7.5%",
+            market_conditions="Market conditions: simulated"
+        )
+        return [("You are Anarcho Capital Staking Bot.", prompt, [])]
+
+    batching = getattr(config, 'CHART_BATCH_ANALYSIS' if pipeline == "chart" else 'COPYBOT_BATCH_ANALYSIS', True)
+    batch_size = getattr(config, 'CHART_BATCH_ANALYSIS_SIZE' if pipeline == "chart" else 'COPYBOT_BATCH_ANALYSIS_SIZE', 5)
+    if batching and batch_size > 1 and tokens > 1:
+        task = config.CHART_BATCH_ANALYSIS_PROMPT if pipeline == "chart" else "Confirm or reject each wallet signal."
+        return [
+            (BATCH_SYSTEM_PROMPT, build_batch_prompt(chunk, f"{task}\n{FEATURE_LEGEND}"), [token for token, _ in chunk])
+            for chunk in chunked(contexts, batch_size)
+        ]
+
+    requests = []
+    for token, features in contexts:
+        if pipeline == "chart":
+            prompt = config.CHART_ANALYSIS_PROMPT.format(
+                symbol=token, timeframe=config.TIMEFRAMES[0], chart_data=f"{FEATURE_LEGEND}\n{features}"
+            )
+        else:
+            prompt = config.PORTFOLIO_ANALYSIS_PROMPT.format(
+                portfolio_data=f"{token} position", market_data=f"{FEATURE_LEGEND}\n{features}"
+            )
+        requests.append(("You are Anarcho Capital's analysis agent.", prompt, [token]))
+    return requests
+
+
+def is_valid(pipeline, content, expected_tokens):
+    """Return how many requested tokens got a schema-valid decision"""
+    if pipeline == "dca":
+        return 1 if "PROTOCOL:" in content else 0
+    if len(expected_tokens) > 1:
+        return len(parse_batch_response(content, expected_tokens))
+    first_line = content.strip().split('\n')[0].strip().upper() if content else ""
+    return 1 if first_line in ("BUY", "SELL", "NOTHING") else 0
+
+
+def run_cycle(pipeline, tokens, bars, workers):
+    """Run one simulated cycle and return its measurements"""
+    model = model_factory.get_model("local", agent=f"loadtest:{pipeline}")
+    build_start = time.time()
+    requests = build_requests(pipeline, tokens, bars)
+    build_seconds = time.time() - build_start
+
+    def call(request):
+        system_prompt, prompt, expected = request
+        start = time.time()
+        try:
+            content = model.generate_response(system_prompt, prompt, temperature=0, max_tokens=config.AI_MAX_TOKENS).content
+            return time.time() - start, is_valid(pipeline, content, expected), None
+        except Exception as e:
+            return time.time() - start, 0, str(e)
+
+    call_start = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(call, requests))
+    call_seconds = time.time() - call_start
+
+    latencies = sorted(r[0] for r in results)
+    expected_decisions = 1 if pipeline == "dca" else tokens
+    total_seconds = build_seconds + call_seconds
+    return {
+        'pipeline': pipeline,
+        'tokens': tokens,
+        'calls': len(requests),
+        'failures': sum(1 for r in results if r[2]),
+        'decisions': sum(r[1] for r in results),
+        'expected_decisions': expected_decisions,
+        'prompt_tokens': sum(count_tokens(p) for _, p, _ in requests),
+        'build_seconds': build_seconds,
+        'cycle_seconds': total_seconds,
+        'tokens_per_second': tokens / total_seconds if total_seconds else 0.0,
+        'p95_latency': latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+    }
+
+
+def report(row):
+    info(
+        f"{row['pipeline']:<8} {row['tokens']:>7} tokens | {row['calls']:>5} calls "
+        f"({row['failures']} failed) | {row['decisions']}/{row['expected_decisions']} decisions | "
+        f"{row['prompt_tokens']:>9} prompt tok | build {row['build_seconds']:.2f}s | "
+        f"cycle {row['cycle_seconds']:.2f}s | {row['tokens_per_second']:.1f} tokens/s | "
+        f"p95 call {row['p95_latency']:.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test agent LLM pipelines with the local simulation model")
+    parser.add_argument("--multipliers", type=int, nargs="+", default=list(DEFAULT_MULTIPLIERS))
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES))
+    parser.add_argument("--bars", type=int, default=getattr(config, 'LOOKBACK_BARS', 104))
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent model calls per cycle")
+    parser.add_argument("--latency", type=float, help="Simulated base latency per call (seconds)")
+    parser.add_argument("--jitter", type=float, help="Simulated extra random latency per call (seconds)")
+    parser.add_argument("--failure-rate", type=float, help="Fraction of simulated calls that fail")
+    args = parser.parse_args()
+
+    model = model_factory.get_model("local", agent="loadtest")
+    if model is None:
+        warning("Local simulation model unavailable")
+        return
+    model.configure(latency_seconds=args.latency, latency_jitter_seconds=args.jitter, failure_rate=args.failure_rate)
+    info(f"Local model: {model.latency_seconds}s + up to {model.latency_jitter_seconds}s latency, "
+         f"{model.failure_rate:.0%} failure rate, {args.workers} worker(s)")
+
+    for pipeline in args.pipelines:
+        base = base_token_count(pipeline)
+        info(f"\n{pipeline}: {base} tokens per normal cycle")
+        for multiplier in args.multipliers:
+            report(run_cycle(pipeline, base * multiplier, args.bars, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Anarcho Capital's LLM Call Metrics
+Local SQLite store for per-agent, per-model latency, token, retry, error and
+parse-failure metrics
+Built with love by Anarcho Capital
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+
+from src.scripts.logger import debug
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = [0.5, 1, 2, 5, 10, 20, 30, 60]
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'llm_metrics.db')
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_histogram(latencies):
+    """Count latencies per bucket, keyed by bucket label"""
+    labels = [f"<{b}s" for b in LATENCY_BUCKETS] + [f">={LATENCY_BUCKETS[-1]}s"]
+    counts = dict.fromkeys(labels, 0)
+    for latency in latencies:
+        for bound, label in zip(LATENCY_BUCKETS, labels):
+            if latency < bound:
+                counts[label] += 1
+                break
+        else:
+            counts[labels[-1]] += 1
+    return counts
+
+
+class LLMMetricsStore:
+    """Records every model call and parse outcome for cost/latency comparisons"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self._lock = threading.Lock()
+        self._ready = False  # Tables are created on first use, not at import
+
+    def init_db(self):
+        """Initialize the database with the calls and events tables"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp REAL,
+            agent TEXT,
+            model TEXT,
+            latency_seconds REAL,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            retries INTEGER,
+            success INTEGER,
+            error TEXT
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp REAL,
+            agent TEXT,
+            model TEXT,
+            event TEXT,
+            detail TEXT
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_llm_calls_time ON llm_calls (timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_llm_events_time ON llm_events (timestamp)')
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        """Open a connection, creating the database on first use (callers hold self._lock)"""
+        if not self._ready:
+            self.init_db()
+            self._ready = True
+        return sqlite3.connect(self.db_path)
+
+    def record_call(self, agent, model, latency_seconds, prompt_tokens=0, completion_tokens=0,
+                    retries=0, success=True, error=None):
+        """Record one model call (including all of its retries)"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute('''
+                INSERT INTO llm_calls
+                (timestamp, agent, model, latency_seconds, prompt_tokens, completion_tokens, retries, success, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (time.time(), agent, model, float(latency_seconds), int(prompt_tokens or 0),
+                      int(completion_tokens or 0), int(retries), 1 if success else 0,
+                      (error or '')[:500] or None))
+                conn.commit()
+                conn.close()
+        except Exception as e:
+            debug(f"Could not record LLM call metrics: {str(e)}", file_only=True)
+
+    def record_event(self, agent, model, event, detail=""):
+        """Record a non-call outcome such as 'parse_failure' or 'fallback'"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    'INSERT INTO llm_events (timestamp, agent, model, event, detail) VALUES (?, ?, ?, ?, ?)',
+                    (time.time(), agent, model, event, (detail or '')[:500])
+                )
+                conn.commit()
+                conn.close()
+        except Exception as e:
+            debug(f"Could not record LLM event: {str(e)}", file_only=True)
+
+    def record_parse_failure(self, agent, model, detail=""):
+        """Record a response that could not be parsed into a decision"""
+        self.record_event(agent, model, 'parse_failure', detail)
+
+    def record_fallback(self, agent, model, detail=""):
+        """Record a call path that fell back to a default decision (e.g. NOTHING)"""
+        self.record_event(agent, model, 'fallback', detail)
+
+    def summary(self, since_hours=24):
+        """
+        Aggregate metrics per (agent, model) over a recent window
+
+        Returns:
+            list: One dict per (agent, model) with calls, errors, retries, parse_failures,
+                fallbacks, token totals, p50/p95/avg latency and a latency histogram
+        """
+        since = time.time() - since_hours * 3600
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT agent, model, latency_seconds, prompt_tokens, completion_tokens, retries, success
+            FROM llm_calls WHERE timestamp >= ?
+            ''', (since,))
+            calls = cursor.fetchall()
+            cursor.execute('''
+            SELECT agent, model, event, COUNT(*) FROM llm_events WHERE timestamp >= ?
+            GROUP BY agent, model, event
+            ''', (since,))
+            events = cursor.fetchall()
+            conn.close()
+
+        groups = defaultdict(lambda: {
+            'calls': 0, 'errors': 0, 'retries': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+            'latencies': [], 'parse_failures': 0, 'fallbacks': 0,
+        })
+        for agent, model, latency, prompt_tokens, completion_tokens, retries, success in calls:
+            g = groups[(agent, model)]
+            g['calls'] += 1
+            g['errors'] += 0 if success else 1
+            g['retries'] += retries or 0
+            g['prompt_tokens'] += prompt_tokens or 0
+            g['completion_tokens'] += completion_tokens or 0
+            g['latencies'].append(latency or 0.0)
+        for agent, model, event, count in events:
+            g = groups[(agent, model)]
+            if event == 'parse_failure':
+                g['parse_failures'] += count
+            elif event == 'fallback':
+                g['fallbacks'] += count
+
+        rows = []
+        for (agent, model), g in sorted(groups.items(), key=lambda item: (item[0][0] or '', item[0][1] or '')):
+            latencies = sorted(g.pop('latencies'))
+            rows.append({
+                'agent': agent,
+                'model': model,
+                **g,
+                'avg_latency': (sum(latencies) / len(latencies)) if latencies else 0.0,
+                'p50_latency': _percentile(latencies, 50),
+                'p95_latency': _percentile(latencies, 95),
+                'histogram': latency_histogram(latencies),
+            })
+        return rows
+
+
+# Process-wide shared instance
+llm_metrics = LLMMetricsStore()
@@ -0,0 +1,264 @@
+"""
+Anarcho Capital's LLM Response Cache
+Persistent prompt-hash cache for AI responses shared by all agents
+Built with love by Anarcho Capital
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+
+from src import config
+from src.scripts.logger import debug, info
+
+# Fallback TTLs (seconds) per agent, overridable from config
+DEFAULT_TTL_SECONDS = {
+    'copybot': 900,
+    'risk': 300,
+    'chartanalysis': 3600,
+    'dca': 6 * 3600,
+}
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'llm_response_cache.db')
+
+
+def normalize_prompt(text):
+    """Collapse whitespace so cosmetic prompt differences hash identically"""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) used when usage is not reported"""
+    return max(1, len(text or '') // 4)
+
+
+def prompt_key(model, prompt, temperature, system_prompt=""):
+    """Build the cache key for (model, normalized prompt hash, temperature)"""
+    prompt_hash = hashlib.sha256(
+        f"{normalize_prompt(system_prompt)}\n{normalize_prompt(prompt)}".encode('utf-8')
+    ).hexdigest()
+    return f"{model}|{prompt_hash}|{float(temperature or 0):.2f}"
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with per-agent TTL and savings accounting"""
+
+    def __init__(self, db_path=None, ttl_seconds=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.enabled = getattr(config, 'LLM_CACHE_ENABLED', True)
+        self.skip_nonzero_temperature = getattr(config, 'LLM_CACHE_SKIP_NONZERO_TEMPERATURE', True)
+        self.ttl_seconds = dict(DEFAULT_TTL_SECONDS)
+        self.ttl_seconds.update(ttl_seconds or getattr(config, 'LLM_CACHE_TTL_SECONDS', {}))
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self.saved_seconds = 0.0
+        self._ready = False  # Tables are created on first use, not at import
+
+    def init_db(self):
+        """Initialize the database with the responses table"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_responses (
+            cache_key TEXT PRIMARY KEY,
+            agent TEXT,
+            model TEXT,
+            temperature REAL,
+            response TEXT,
+            tokens INTEGER,
+            latency_seconds REAL,
+            created_at REAL,
+            expires_at REAL,
+            hit_count INTEGER DEFAULT 0
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_cache_savings (
+            agent TEXT PRIMARY KEY,
+            hits INTEGER DEFAULT 0,
+            saved_tokens INTEGER DEFAULT 0,
+            saved_seconds REAL DEFAULT 0
+        )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        """Open a connection, creating the database on first use (callers hold self._lock)"""
+        if not self._ready:
+            self.init_db()
+            self._ready = True
+        return sqlite3.connect(self.db_path)
+
+    def ttl_for(self, agent):
+        """Get the TTL in seconds for an agent"""
+        return self.ttl_seconds.get(agent, 0)
+
+    def is_cacheable(self, agent, temperature):
+        """Whether a call from this agent at this temperature may use the cache"""
+        if not self.enabled or self.ttl_for(agent) <= 0:
+            return False
+        if self.skip_nonzero_temperature and float(temperature or 0) > 0:
+            return False
+        return True
+
+    def get(self, agent, model, prompt, temperature, system_prompt=""):
+        """Return a cached response, or None on a miss or expired entry"""
+        if not self.is_cacheable(agent, temperature):
+            return None
+
+        key = prompt_key(model, prompt, temperature, system_prompt)
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT response, tokens, latency_seconds, expires_at FROM llm_responses WHERE cache_key = ?',
+                (key,)
+            )
+            row = cursor.fetchone()
+            if row is None or time.time() >= row[3]:
+                if row is not None:
+                    cursor.execute('DELETE FROM llm_responses WHERE cache_key = ?', (key,))
+                    conn.commit()
+                conn.close()
+                self.misses += 1
+                return None
+
+            response, tokens, latency = row[0], row[1] or 0, row[2] or 0.0
+            cursor.execute('UPDATE llm_responses SET hit_count = hit_count + 1 WHERE cache_key = ?', (key,))
+            cursor.execute('''
+            INSERT INTO llm_cache_savings (agent, hits, saved_tokens, saved_seconds) VALUES (?, 1, ?, ?)
+            ON CONFLICT(agent) DO UPDATE SET hits = hits + 1,
+                saved_tokens = saved_tokens + excluded.saved_tokens,
+                saved_seconds = saved_seconds + excluded.saved_seconds
+            ''', (agent, tokens, latency))
+            conn.commit()
+            conn.close()
+
+            self.hits += 1
+            self.saved_tokens += tokens
+            self.saved_seconds += latency
+
+        debug(f"LLM cache hit for {agent} ({model}): saved ~{tokens} tokens, {latency:.2f}s", file_only=True)
+        return response
+
+    def put(self, agent, model, prompt, temperature, response, latency_seconds=0.0, tokens=None, system_prompt=""):
+        """Store a response for this agent's TTL"""
+        if not response or not self.is_cacheable(agent, temperature):
+            return
+
+        if tokens is None:
+            tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt) + estimate_tokens(response)
+        now = time.time()
+        key = prompt_key(model, prompt, temperature, system_prompt)
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('''
+            INSERT OR REPLACE INTO llm_responses
+            (cache_key, agent, model, temperature, response, tokens, latency_seconds, created_at, expires_at, hit_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+            ''', (key, agent, model, float(temperature or 0), response, int(tokens),
+                  float(latency_seconds), now, now + self.ttl_for(agent)))
+            conn.commit()
+            conn.close()
+
+    def get_or_call(self, agent, model, prompt, temperature, call, system_prompt=""):
+        """
+        Return a cached response, or run call() and cache its result
+
+        Args:
+            agent (str): Agent name used to pick the TTL ('copybot', 'risk', 'chartanalysis', 'dca')
+            model (str): Model name the request is sent to; the answer is cached under the
+                model that produced it (ModelResponse.model_name, e.g. a hedge fallback)
+            prompt (str): User prompt
+            temperature (float): Sampling temperature
+            call (callable): Zero-argument function returning the response text or a
+                ModelResponse. A streamed decision (ModelResponse.completion set) is
+                cached with its full text once that arrives, never truncated
+            system_prompt (str): System prompt, if any
+
+        Returns:
+            str: Response text
+        """
+        cached = self.get(agent, model, prompt, temperature, system_prompt)
+        if cached is not None:
+            info(f"Using cached AI response for {agent} ({model})")
+            return cached
+
+        start = time.time()
+        response = call()
+        content = getattr(response, 'content', response)
+        completion = getattr(response, 'completion', None)
+        # A hedge fallback's answer must not be served later as the primary model's
+        model = getattr(response, 'model_name', None) or model
+        if completion is None:
+            self.put(agent, model, prompt, temperature, content, time.time() - start, system_prompt=system_prompt)
+        else:
+            def store_full_text(future):
+                try:
+                    full_text = future.result()
+                    if full_text:
+                        self.put(agent, model, prompt, temperature, full_text, time.time() - start,
+                                 system_prompt=system_prompt)
+                except Exception as e:
+                    debug(f"Could not cache streamed {agent} response: {str(e)}", file_only=True)
+            completion.add_done_callback(store_full_text)
+        return content
+
+    def purge_expired(self):
+        """Delete every expired entry and return how many were removed"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM llm_responses WHERE expires_at <= ?', (time.time(),))
+            removed = cursor.rowcount
+            conn.commit()
+            conn.close()
+        return removed
+
+    def stats(self):
+        """Get session and lifetime savings statistics"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM llm_responses')
+            entries = cursor.fetchone()[0]
+            cursor.execute('SELECT agent, hits, saved_tokens, saved_seconds FROM llm_cache_savings')
+            by_agent = {
+                agent: {'hits': hits, 'saved_tokens': tokens, 'saved_seconds': seconds}
+                for agent, hits, tokens, seconds in cursor.fetchall()
+            }
+            conn.close()
+
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'saved_tokens': self.saved_tokens,
+                'saved_seconds': self.saved_seconds,
+                'lifetime_hits': sum(a['hits'] for a in by_agent.values()),
+                'lifetime_saved_tokens': sum(a['saved_tokens'] for a in by_agent.values()),
+                'lifetime_saved_seconds': sum(a['saved_seconds'] for a in by_agent.values()),
+                'by_agent': by_agent,
+            }
+
+    def log_stats(self):
+        """Log a one-line summary of cache savings"""
+        s = self.stats()
+        info(f"LLM response cache: {s['entries']} entries, hit rate {s['hit_rate'] * 100:.1f}% "
+             f"({s['hits']} hits / {s['misses']} misses), saved ~{s['saved_tokens']} tokens and "
+             f"{s['saved_seconds']:.1f}s this session (~{s['lifetime_saved_tokens']} tokens, "
+             f"{s['lifetime_saved_seconds']:.1f}s lifetime)")
+
+
+# Process-wide shared instance
+llm_response_cache = LLMResponseCache()
@@ -0,0 +1,158 @@
+"""
+Anarcho Capital's Market Data Cache
+Bounded TTL + LRU cache for OHLCV DataFrames shared by all agents. Entries
+are copied in and out, so callers may modify what they get back
+Built with love by Anarcho Capital
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+from src import config
+from src.scripts.logger import debug, info
+
+DEFAULT_MAX_MB = 256
+
+
+def _frame_size_bytes(value):
+    """Estimate the in-memory size of a cached value"""
+    try:
+        if hasattr(value, 'memory_usage'):
+            return int(value.memory_usage(deep=True).sum())
+    except Exception:
+        pass
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    """Copy DataFrames (and anything else with .copy()) so a caller cannot mutate an entry"""
+    return value.copy() if hasattr(value, 'copy') else value
+
+
+class MarketDataCache:
+    """Thread-safe OHLCV cache with per-entry TTL and an LRU byte cap"""
+
+    def __init__(self, max_bytes=None, ttl_seconds=None):
+        if max_bytes is None:
+            max_bytes = int(getattr(config, 'MARKET_DATA_CACHE_MAX_MB', DEFAULT_MAX_MB) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        # Per-timeframe TTLs live in config (MARKET_DATA_CACHE_TTL_SECONDS) only
+        self.ttl_seconds = dict(ttl_seconds or getattr(config, 'MARKET_DATA_CACHE_TTL_SECONDS', {}))
+
+        self._entries = OrderedDict()  # key -> (value, size_bytes, expires_at)
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, timeframe):
+        """Get the TTL in seconds for a candle timeframe (the '1d' TTL if unlisted, 0 = don't cache)"""
+        return self.ttl_seconds.get(timeframe, self.ttl_seconds.get('1d', 0))
+
+    def get(self, key):
+        """Return a copy of the cached value for key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if time.time() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _copy(value)
+
+    def put(self, key, value, timeframe='1d', ttl=None):
+        """Store a copy of a value, evicting least recently used entries to stay under the byte cap"""
+        ttl = ttl if ttl is not None else self.ttl_for(timeframe)
+        if value is None or ttl <= 0:
+            return
+        value = _copy(value)
+
+        size = _frame_size_bytes(value)
+        if size > self.max_bytes:
+            debug(f"Market data for {key} ({size} bytes) exceeds cache cap, not caching", file_only=True)
+            return
+
+        expires_at = time.time() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.total_bytes += size
+
+            while self.total_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drop a single entry if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def purge_expired(self):
+        """Drop every expired entry and return how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, _, expires_at) in self._entries.items() if now >= expires_at]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        """Drop all entries (stats are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Get a snapshot of cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def log_stats(self):
+        """Log a one-line summary of cache statistics"""
+        s = self.stats()
+        info(f"Market data cache: {s['entries']} entries, {s['bytes'] / (1024 * 1024):.1f}/"
+             f"{s['max_bytes'] / (1024 * 1024):.0f} MB, hit rate {s['hit_rate'] * 100:.1f}% "
+             f"({s['hits']} hits / {s['misses']} misses), {s['evictions']} evictions, "
+             f"{s['expirations']} expirations")
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() < entry[2]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+
+
+# Process-wide shared instance
+market_data_cache = MarketDataCache()
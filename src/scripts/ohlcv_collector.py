@@ -7,12 +7,14 @@ Built with love by Anarcho Capital
 from src.config import *
 from src import nice_funcs as n
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 from termcolor import colored, cprint
 import time
 from src.scripts.fetch_historical_data import fetch_coingecko_data
 from src.scripts.logger import debug, info, warning, error, critical
+from src.scripts.market_data_cache import market_data_cache
+from src.scripts.candle_store import candle_store, CANDLE_COLUMNS
 import numpy as np
 import requests
 import random
@@ -72,8 +74,23 @@ def get_token_name(token_address):
     TOKEN_NAMES[token_address] = name
     return name
 
-def collect_token_data(token_address, suppress_logs=False):
-    """Collects OHLCV data for a specific token"""
+def collect_token_data(token_address, suppress_logs=False, use_cache=True):
+    """Collects OHLCV data for a specific token (daily candles, served from the shared cache when fresh)"""
+    if use_cache:
+        cached = market_data_cache.get(token_address)
+        if cached is not None:
+            debug(f"Using cached market data for {token_address[:6]}", file_only=True)
+            return cached
+
+    df = _fetch_token_data(token_address, suppress_logs)
+    # Synthetic stand-in data is never cached, so the next call retries the real sources
+    synthetic = df is not None and 'source' in df.columns and (df['source'] == 'Synthetic').any()
+    if use_cache and df is not None and not synthetic:
+        market_data_cache.put(token_address, df, timeframe='1d')
+    return df
+
+def _fetch_token_data(token_address, suppress_logs=False):
+    """Fetch daily OHLCV data for a token from Birdeye, CoinGecko or synthetic fallback"""
     try:
         token_name = get_token_name(token_address)
         
@@ -85,7 +102,11 @@ def collect_token_data(token_address, suppress_logs=False):
         try:
             debug(f"Attempting Birdeye data for {token_name}", file_only=True)
             headers = {"X-API-KEY": os.getenv("BIRDEYE_API_KEY", "9ca8697fa5974150a760c7d7ad9310e3")}
-            url = f"https://public-api.birdeye.so/public/candle?address={token_address}&type=day&limit=14"
+            # Only request the days after the locally stored history
+            window_start = datetime.utcnow() - timedelta(days=14)
+            fetch_from = candle_store.fetch_start('birdeye', token_address, '1d', window_start)
+            limit = min(14, max(1, int((datetime.utcnow() - fetch_from).total_seconds() // 86400) + 1))
+            url = f"https://public-api.birdeye.so/public/candle?address={token_address}&type=day&limit={limit}"
             response = requests.get(url, headers=headers, timeout=10)
             
             if response.status_code == 200:
@@ -96,6 +117,7 @@ def collect_token_data(token_address, suppress_logs=False):
                         # Convert Birdeye format to our dataframe
                         df = pd.DataFrame(candles)
                         df['date'] = pd.to_datetime(df['time'], unit='s')
+                        df = _merge_stored_daily_candles(token_address, df, window_start)
                         df['name'] = token_name
                         df['source'] = 'Birdeye'  # Add source information
                         info(f"Birdeye data found for {token_name}")
@@ -141,6 +163,26 @@ def collect_token_data(token_address, suppress_logs=False):
             error(f"Error collecting data for {token_address}: {str(e)}")
         return None
 
+def _merge_stored_daily_candles(token_address, df, window_start):
+    """
+    Store fetched Birdeye daily candles and return the full 14-day window from the candle store
+
+    Birdeye's o/h/l/c/v are renamed to open/high/low/close/volume whether or not the
+    store is enabled, so the frame has the same schema as the CoinGecko and synthetic ones
+    """
+    candles = df.rename(columns={'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume'})
+    if not candle_store.enabled or not set(CANDLE_COLUMNS[1:]).issubset(candles.columns):
+        return candles
+    candle_store.append('birdeye', token_address, '1d', candles.assign(timestamp=candles['date']))
+    stored = candle_store.read('birdeye', token_address, '1d', start=window_start)
+    if stored.empty:
+        return candles
+    # Stored OHLCV for every day in the window, plus whatever extra fields the latest fetch returned
+    extra = candles.drop(columns=[c for c in CANDLE_COLUMNS[1:] + ['time'] if c in candles.columns])
+    merged = stored.rename(columns={'timestamp': 'date'}).merge(extra, on='date', how='left')
+    merged['time'] = (merged['date'] - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    return merged
+
 def generate_synthetic_data(token_address, days=14):
     """Generate synthetic OHLCV data for testing"""
     # Try to get current price (or use fallback)
@@ -0,0 +1,94 @@
+"""
+Anarcho Capital's Portfolio Snapshot
+One valuation of the monitored portfolio, taken once per risk cycle and passed
+to every check that needs the balance, PnL or current positions, plus the
+Hyperliquid positions of the same cycle indexed by HL symbol
+Built with love by Anarcho Capital
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+
+class PortfolioSnapshot:
+    """Total value, per-token values and (lazily) wallet holdings at one point in time"""
+
+    def __init__(self, total_value, balances, monitored_tokens, excluded_tokens=(), holdings_loader=None, source='wallet'):
+        """
+        Args:
+            total_value (float): Portfolio value in USD
+            balances (dict): Token address -> USD value (spot plus leverage)
+            monitored_tokens (list): Tokens the valuation covered
+            excluded_tokens (list): Tokens never treated as positions
+            holdings_loader (callable): Returns the wallet holdings DataFrame; called at
+                most once, and only if a check needs per-position detail
+            source (str): 'wallet' or 'paper'
+        """
+        self.total_value = float(total_value or 0.0)
+        self.balances = balances or {}
+        self.monitored_tokens = list(monitored_tokens or [])
+        self.excluded_tokens = set(excluded_tokens or ())
+        self.source = source
+        self.taken_at = datetime.now()
+        self.record_id = None  # Balance store row, once recorded
+        self._holdings_loader = holdings_loader
+        self._holdings = None
+
+    def pnl(self, start_balance):
+        """PnL in USD against start_balance"""
+        return self.total_value - start_balance
+
+    def pnl_percent(self, start_balance):
+        """PnL in percent against start_balance (None when start_balance is 0)"""
+        if not start_balance:
+            return None
+        return self.pnl(start_balance) / start_balance * 100
+
+    @property
+    def holdings(self):
+        """Wallet holdings, fetched on first use"""
+        if self._holdings is None:
+            holdings = self._holdings_loader() if self._holdings_loader else None
+            self._holdings = holdings if holdings is not None else pd.DataFrame()
+        return self._holdings
+
+    def monitored_positions(self):
+        """Holdings in monitored, non-excluded tokens, with a 'Mint Address' column"""
+        holdings = self.holdings
+        if holdings.empty:
+            return holdings
+        if 'Mint Address' not in holdings.columns and 'Address' in holdings.columns:
+            holdings = holdings.rename(columns={'Address': 'Mint Address'})
+        mints = holdings['Mint Address']
+        return holdings[mints.isin(self.monitored_tokens) & ~mints.isin(self.excluded_tokens)]
+
+
+class LeverageSnapshot:
+    """Hyperliquid positions fetched once and indexed by HL symbol"""
+
+    def __init__(self, positions, symbol_map):
+        """
+        Args:
+            positions (dict): HL symbol -> position dict with 'size' and 'current_price'
+            symbol_map (dict): Token address -> HL symbol (e.g. config.TOKEN_TO_HL_MAPPING)
+        """
+        self.positions = positions or {}
+        self.symbol_map = dict(symbol_map or {})
+
+    @classmethod
+    def fetch(cls, tokens, symbol_map, positions_loader):
+        """Fetch positions once, skipping the request when none of tokens maps to an HL symbol"""
+        symbol_map = {token: symbol_map[token] for token in tokens if symbol_map.get(token)}
+        positions = positions_loader() if symbol_map else {}
+        return cls(positions, symbol_map)
+
+    def hl_symbol(self, token):
+        return self.symbol_map.get(token)
+
+    def value(self, token):
+        """USD value of the token's leverage position (0.0 without one)"""
+        pos = self.positions.get(self.symbol_map.get(token))
+        if not pos:
+            return 0.0
+        return pos.get('size', 0) * pos.get('current_price', 0)
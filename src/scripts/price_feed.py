@@ -0,0 +1,60 @@
+"""
+Anarcho Capital's Price Feed
+Publishes every price the price layer fetches to in-process subscribers, so
+consumers such as the risk engine react to new prices without polling or
+making requests of their own
+Built with love by Anarcho Capital
+"""
+
+import threading
+
+from src.scripts.logger import debug
+
+
+class PriceFeed:
+    """Fan-out of (token address, price) updates to subscriber callbacks"""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Call callback(address, price) on every new price; callbacks must return quickly"""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, address, price):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(address, price)
+            except Exception as e:
+                debug(f"Price subscriber failed for {address[:8]}: {str(e)}", file_only=True)
+
+
+class PriceCache(dict):
+    """Price cache dict that publishes each changed positive price to a PriceFeed"""
+
+    def __init__(self, feed):
+        super().__init__()
+        self.feed = feed
+
+    def __setitem__(self, address, price):
+        previous = self.get(address)
+        super().__setitem__(address, price)
+        if isinstance(price, (int, float)) and price > 0 and price != previous:
+            self.feed.publish(address, float(price))
+
+    def set_quiet(self, address, price):
+        """Cache a placeholder price (e.g. a hardcoded fallback) without publishing it"""
+        super().__setitem__(address, price)
+
+# Create a singleton instance
+price_feed = PriceFeed()
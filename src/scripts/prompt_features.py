@@ -0,0 +1,194 @@
+"""
+Anarcho Capital's Prompt Feature Builder
+Turns OHLCV + indicator DataFrames into a small fixed set of rounded numeric
+features for LLM prompts instead of dumping raw rows
+Built with love by Anarcho Capital
+"""
+
+import math
+
+from src.scripts.logger import info
+
+# Optional exact tokenizer; falls back to a ~4 chars/token estimate
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+# Feature name -> candidate column names produced by the different data sources
+INDICATOR_COLUMNS = {
+    'ema20': ['20EMA'],
+    'ema50': ['50EMA'],
+    'ema100': ['100EMA'],
+    'sma200': ['200SMA'],
+    'ma20': ['MA20', 'sma_20'],
+    'ma40': ['MA40'],
+    'sma50': ['sma_50'],
+}
+RSI_COLUMNS = ['RSI', 'rsi']
+MACD_COLUMNS = ['MACD', 'MACD_12_26_9']
+MACD_SIGNAL_COLUMNS = ['MACD_Signal', 'MACDs_12_26_9']
+ATR_COLUMNS = ['ATR', 'atr']
+
+SIG_FIGS = 4
+
+
+def round_sig(value, sig=SIG_FIGS):
+    """Round to a number of significant figures (None/NaN/inf become None)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(value) or math.isinf(value):
+        return None
+    if value == 0:
+        return 0.0
+    return round(value, sig - int(math.floor(math.log10(abs(value)))) - 1)
+
+
+def count_tokens(text):
+    """Count prompt tokens with tiktoken when installed, otherwise estimate"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return max(1, len(text) // 4)
+
+
+def _column(df, candidates):
+    """Return the first matching column (case-insensitive), or None"""
+    lookup = {str(c).lower(): c for c in df.columns}
+    for name in candidates:
+        col = lookup.get(name.lower())
+        if col is not None:
+            series = df[col].astype('float64')
+            if series.notna().any():
+                return series
+    return None
+
+
+def _pct(a, b):
+    if a is None or b is None or b == 0:
+        return None
+    return (a / b - 1) * 100
+
+
+def build_features(df, regime=None):
+    """
+    Build a compact feature dict from an OHLCV DataFrame
+
+    Args:
+        df (DataFrame): Candles with close (and ideally high/low/volume) plus any indicator columns
+        regime (str): Market regime if already known; otherwise derived from trend features
+
+    Returns:
+        dict: Rounded features (returns and distances in %), or {} if there is no close data
+    """
+    if df is None or len(df) == 0:
+        return {}
+    close = _column(df, ['close', 'price'])
+    if close is None:
+        return {}
+    close = close.dropna()
+    if close.empty:
+        return {}
+
+    last = float(close.iloc[-1])
+    returns = close.pct_change() * 100
+    features = {'close': last, 'bars': len(close)}
+
+    for n in (1, 5, 20):
+        if len(close) > n:
+            features[f'ret{n}'] = _pct(last, float(close.iloc[-1 - n]))
+
+    window = close.tail(20)
+    if len(window) >= 5:
+        std = float(window.std())
+        features['z20'] = (last - float(window.mean())) / std if std else 0.0
+        features['vol20'] = float(returns.tail(20).std())
+
+    high = _column(df, ['high'])
+    low = _column(df, ['low'])
+    hi = float(high.max()) if high is not None else float(close.max())
+    lo = float(low.min()) if low is not None else float(close.min())
+    features['hi'] = hi
+    features['lo'] = lo
+    features['range_pos'] = (last - lo) / (hi - lo) if hi > lo else 0.5
+
+    volume = _column(df, ['volume'])
+    if volume is not None and len(volume.dropna()) >= 5:
+        vol_window = volume.dropna().tail(20)
+        vol_std = float(vol_window.std())
+        features['vz20'] = (float(vol_window.iloc[-1]) - float(vol_window.mean())) / vol_std if vol_std else 0.0
+
+    # Distance of price from each moving average, in %
+    for name, candidates in INDICATOR_COLUMNS.items():
+        series = _column(df, candidates)
+        if series is not None and series.notna().any():
+            features[f'd_{name}'] = _pct(last, float(series.dropna().iloc[-1]))
+
+    rsi = _column(df, RSI_COLUMNS)
+    if rsi is not None:
+        rsi = rsi.dropna()
+        features['rsi'] = float(rsi.iloc[-1])
+        if len(rsi) > 1:
+            features['rsi_d'] = float(rsi.iloc[-1] - rsi.iloc[-2])
+
+    macd = _column(df, MACD_COLUMNS)
+    signal = _column(df, MACD_SIGNAL_COLUMNS)
+    if macd is not None and signal is not None:
+        hist = (macd - signal).dropna()
+        if not hist.empty:
+            # Normalize by price so the value is comparable across tokens
+            features['macd_h'] = float(hist.iloc[-1]) / last * 100
+            if len(hist) > 1:
+                features['macd_h_d'] = float(hist.iloc[-1] - hist.iloc[-2]) / last * 100
+
+    atr = _column(df, ATR_COLUMNS)
+    if atr is not None and atr.notna().any():
+        features['atr_pct'] = float(atr.dropna().iloc[-1]) / last * 100
+
+    if regime is None:
+        trend = features.get('d_sma200', features.get('d_ema50', features.get('d_ma40')))
+        ret20 = features.get('ret20', features.get('ret5'))
+        if trend is not None and ret20 is not None and trend > 0 and ret20 > 0:
+            regime = 'uptrend'
+        elif trend is not None and ret20 is not None and trend < 0 and ret20 < 0:
+            regime = 'downtrend'
+        else:
+            regime = 'range'
+    features['regime'] = regime
+
+    return {k: (round_sig(v) if isinstance(v, float) else v) for k, v in features.items() if v is not None}
+
+
+def format_features(features):
+    """Render features as one compact key=value line"""
+    if not features:
+        return "No market data available"
+    return " ".join(f"{k}={v}" for k, v in features.items())
+
+
+def encode_market_data(df, regime=None):
+    """Build and format features in one step (non-DataFrame input is passed through as text)"""
+    if df is None or not hasattr(df, 'columns'):
+        return str(df) if df is not None else "No market data available"
+    return format_features(build_features(df, regime))
+
+
+FEATURE_LEGEND = (
+    "Features: ret1/ret5/ret20 = % return over 1/5/20 bars, z20 = close z-score vs 20 bars, "
+    "vol20 = stdev of bar returns %, range_pos = position in lookback high/low (0-1), "
+    "vz20 = volume z-score, d_* = % distance of price above/below each moving average, "
+    "rsi_d = RSI change, macd_h = MACD histogram as % of price, atr_pct = ATR as % of price"
+)
+
+
+def log_prompt_size(label, prompt):
+    """Report the token count of a prompt and return it"""
+    tokens = count_tokens(prompt)
+    info(f"Prompt for {label}: {tokens} tokens{'' if TIKTOKEN_AVAILABLE else ' (estimated)'}")
+    return tokens
@@ -0,0 +1,225 @@
+"""
+Anarcho Capital's Recommendation Accuracy
+Scores chart recommendations against the price of the next recommendation.
+History is evaluated once per symbol with vectorized masks, then each new
+recommendation updates running totals overall, per market regime and per
+timeframe
+Built with love by Anarcho Capital
+"""
+
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src import config
+
+NOTHING_BAND_PCT = 3.0  # NOTHING is correct if the next price stayed within this move
+MIN_RECOMMENDATIONS = 3  # Fewer recommendations than this are not scored
+
+
+def evaluate_recommendations(history):
+    """
+    Score each recommendation against the next recommendation's price
+
+    BUY is correct when the price rose, SELL when it fell and NOTHING when it moved
+    less than NOTHING_BAND_PCT. Other signals count as incorrect. Rows without a
+    positive price on both ends (and the last row) are not evaluated.
+
+    Args:
+        history (DataFrame): Recommendations in time order with 'signal' and 'price'
+
+    Returns:
+        DataFrame: history with 'evaluated', 'correct' and 'profit_pct' columns
+    """
+    df = history.copy()
+    price = pd.to_numeric(df['price'], errors='coerce').to_numpy(dtype=np.float64)
+    next_price = np.r_[price[1:], np.nan]
+    signal = df['signal'].astype(str).to_numpy()
+
+    evaluated = (price > 0) & (next_price > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = (next_price / price - 1) * 100
+        short_pct = (price / next_price - 1) * 100
+    buy = evaluated & (signal == 'BUY')
+    sell = evaluated & (signal == 'SELL')
+    nothing = evaluated & (signal == 'NOTHING')
+
+    profit_pct = np.select([buy, sell], [change_pct, short_pct], 0.0)
+    df['evaluated'] = evaluated
+    df['profit_pct'] = profit_pct
+    df['correct'] = ((buy | sell) & (profit_pct > 0)) | (nothing & (np.abs(change_pct) < NOTHING_BAND_PCT))
+    return df
+
+
+class _Tally:
+    """Running correct/evaluated/profit totals for one group"""
+
+    __slots__ = ('correct', 'evaluated', 'profit')
+
+    def __init__(self, correct=0, evaluated=0, profit=0.0):
+        self.correct = int(correct)
+        self.evaluated = int(evaluated)
+        self.profit = float(profit)
+
+    def add(self, correct, profit):
+        self.correct += int(correct)
+        self.evaluated += 1
+        self.profit += profit
+
+    def summary(self):
+        return {
+            'accuracy': self.correct / self.evaluated * 100,
+            'avg_profit_pct': self.profit / self.evaluated,
+            'total_evaluated': self.evaluated,
+        }
+
+
+class _SymbolAccuracy:
+    """Incremental accuracy state for one symbol"""
+
+    def __init__(self, window):
+        self.rows = 0
+        self.overall = _Tally()
+        self.recent = deque(maxlen=window)
+        self.by_regime = {}
+        self.by_timeframe = {}
+        self.last = None  # Latest recommendation, scored by the next one
+        self.last_by_timeframe = {}  # Latest recommendation per timeframe, scored within its timeframe
+
+    def seed(self, history):
+        """Build the totals from the full history in one vectorized pass"""
+        history = history.assign(
+            market_regime=_labels(history, 'market_regime', 'NEUTRAL'),
+            timeframe=_labels(history, 'timeframe', 'unknown'),
+        )
+        scored = evaluate_recommendations(history)
+        self.rows = len(scored)
+        evaluated = scored[scored['evaluated']]
+        self.overall = _Tally(evaluated['correct'].sum(), len(evaluated), evaluated['profit_pct'].sum())
+        self.recent.extend(evaluated['correct'].astype(bool).tolist())
+        self.by_regime = {
+            regime: _Tally(group['correct'].sum(), len(group), group['profit_pct'].sum())
+            for regime, group in evaluated.groupby('market_regime')
+        }
+        # Within a timeframe a recommendation is scored by the next one of the same timeframe
+        self.by_timeframe = {}
+        for timeframe, group in scored.groupby('timeframe', sort=False):
+            tf_scored = evaluate_recommendations(group)
+            tf_evaluated = tf_scored[tf_scored['evaluated']]
+            self.by_timeframe[timeframe] = _Tally(tf_evaluated['correct'].sum(), len(tf_evaluated),
+                                                  tf_evaluated['profit_pct'].sum())
+            self.last_by_timeframe[timeframe] = _row_fields(group.iloc[-1])
+        self.last = _row_fields(scored.iloc[-1]) if self.rows else None
+
+    def add(self, row):
+        """Score the previous recommendation against this one and make it the latest"""
+        row = _row_fields(row)
+        self.rows += 1
+        scored = _score(self.last, row['price'])
+        if scored:
+            correct, profit = scored
+            self.overall.add(correct, profit)
+            self.recent.append(correct)
+            self.by_regime.setdefault(self.last['market_regime'], _Tally()).add(correct, profit)
+        previous = self.last_by_timeframe.get(row['timeframe'])
+        tf_tally = self.by_timeframe.setdefault(row['timeframe'], _Tally())
+        scored = _score(previous, row['price'])
+        if scored:
+            tf_tally.add(*scored)
+        self.last = row
+        self.last_by_timeframe[row['timeframe']] = row
+
+    def summary(self):
+        if self.rows < MIN_RECOMMENDATIONS or self.overall.evaluated == 0:
+            return None
+        return {
+            'accuracy': self.overall.correct / self.overall.evaluated * 100,
+            # Averaged over every recommendation; NOTHING and the latest one count as 0%
+            'recommendation_performance': self.overall.profit / self.rows,
+            'total_evaluated': self.overall.evaluated,
+            'rolling_accuracy': sum(self.recent) / len(self.recent) * 100,
+            'rolling_window': len(self.recent),
+            'by_regime': {k: t.summary() for k, t in self.by_regime.items() if t.evaluated},
+            'by_timeframe': {k: t.summary() for k, t in self.by_timeframe.items() if t.evaluated},
+        }
+
+
+def _labels(history, column, default):
+    if column not in history:
+        return default
+    return history[column].fillna(default).astype(str)
+
+
+def _row_fields(row):
+    price = pd.to_numeric(row.get('price'), errors='coerce')
+    regime = row.get('market_regime')
+    timeframe = row.get('timeframe')
+    return {
+        'signal': str(row.get('signal')),
+        'price': float(price) if pd.notna(price) else np.nan,
+        'market_regime': str(regime) if pd.notna(regime) else 'NEUTRAL',
+        'timeframe': str(timeframe) if pd.notna(timeframe) else 'unknown',
+    }
+
+
+def _score(previous, next_price):
+    """(correct, profit_pct) for one recommendation, or None if it cannot be evaluated"""
+    if previous is None or not (previous['price'] > 0 and next_price > 0):
+        return None
+    change_pct = (next_price / previous['price'] - 1) * 100
+    if previous['signal'] == 'BUY':
+        return change_pct > 0, change_pct
+    if previous['signal'] == 'SELL':
+        profit = (previous['price'] / next_price - 1) * 100
+        return profit > 0, profit
+    if previous['signal'] == 'NOTHING':
+        return abs(change_pct) < NOTHING_BAND_PCT, 0.0
+    return False, 0.0
+
+
+class RecommendationAccuracy:
+    """Per-symbol accuracy, seeded from history once and updated as recommendations are saved"""
+
+    def __init__(self, window=None):
+        self.window = window or getattr(config, 'CHART_ACCURACY_WINDOW', 20)
+        self._symbols = {}
+        self._lock = threading.Lock()
+
+    def summary(self, symbol, load_history):
+        """
+        Accuracy summary for a symbol
+
+        Args:
+            load_history (callable): Returns the symbol's recommendations in time
+                order (DataFrame or None); only called the first time a symbol is seen
+
+        Returns:
+            dict or None: accuracy, recommendation_performance, total_evaluated,
+                rolling_accuracy, by_regime and by_timeframe
+        """
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None:
+                state = _SymbolAccuracy(self.window)
+                history = load_history()
+                if history is not None and not history.empty:
+                    state.seed(history)
+                self._symbols[symbol] = state
+            return state.summary()
+
+    def record(self, symbol, row):
+        """Add a newly saved recommendation (ignored until the symbol has been seeded)"""
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is not None:
+                state.add(row)
+
+    def invalidate(self, symbol):
+        """Drop a symbol's state so the next summary re-reads its history"""
+        with self._lock:
+            self._symbols.pop(symbol, None)
+
+# Create a singleton instance
+recommendation_accuracy = RecommendationAccuracy()
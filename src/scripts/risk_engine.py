@@ -0,0 +1,138 @@
+"""
+Anarcho Capital's Streaming Risk Engine
+Keeps the portfolio's exposure in memory and re-values it on every price the
+price layer publishes (one multiply-add per tick), firing a breach callback
+as soon as a loss, gain, drawdown or minimum balance limit is crossed
+Built with love by Anarcho Capital
+"""
+
+import threading
+
+from src import config
+from src.scripts.logger import debug, info, error
+from src.scripts.price_feed import price_feed
+
+
+def drawdown_breach(total_value, peak):
+    """('DRAWDOWN', drawdown %) when total_value is MAX_DRAWDOWN_PERCENT or more below peak, else None"""
+    max_drawdown = getattr(config, 'MAX_DRAWDOWN_PERCENT', 0)
+    if not max_drawdown or not peak:
+        return None
+    drawdown_pct = (total_value / peak - 1) * 100
+    if drawdown_pct <= -max_drawdown:
+        return 'DRAWDOWN', drawdown_pct
+    return None
+
+
+def evaluate_limits(total_value, start_balance, peak=None):
+    """
+    Check a portfolio value against the configured risk limits
+
+    Args:
+        start_balance (float): Balance PnL is measured against (the lookback baseline)
+        peak (float): Highest checkpointed value over the lookback, for the drawdown limit
+
+    Returns:
+        tuple or None: (breach_type, value) with breach_type MINIMUM_BALANCE (value =
+            balance), DRAWDOWN (value = drawdown %), PNL_PERCENT (value = PnL %) or
+            PNL_USD (value = PnL $)
+    """
+    if total_value < getattr(config, 'MINIMUM_BALANCE_USD', 0.0):
+        return 'MINIMUM_BALANCE', total_value
+    breach = drawdown_breach(total_value, peak)
+    if breach is not None:
+        return breach
+    pnl = total_value - start_balance
+    if getattr(config, 'USE_PERCENTAGE', True):
+        if not start_balance:
+            return None
+        pnl_pct = pnl / start_balance * 100
+        if pnl_pct <= -config.MAX_LOSS_PERCENT or pnl_pct >= config.MAX_GAIN_PERCENT:
+            return 'PNL_PERCENT', pnl_pct
+    elif pnl <= -config.MAX_LOSS_USD or pnl >= config.MAX_GAIN_USD:
+        return 'PNL_USD', pnl
+    return None
+
+
+class StreamingRiskEngine:
+    """Incremental portfolio value, re-synced from each snapshot and moved by price ticks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._quantities = {}  # Token address -> exposure in token units (USD value / price)
+        self._prices = {}  # Token address -> price the quantity was last valued at
+        self._on_breach = None
+        self._tripped = False  # Set once a breach fires; cleared when a tick is back within limits
+        self.total_value = 0.0
+        self.start_balance = 0.0
+        self.peak = None
+        self.ticks = 0
+
+    def start(self, on_breach):
+        """
+        Subscribe to the price feed and route breaches to on_breach(breach_type, value)
+
+        The callback runs on its own thread so a slow breach handler (AI
+        consultation, closing positions) never blocks the price layer.
+        """
+        self._on_breach = on_breach
+        price_feed.subscribe(self.on_price)
+
+    def stop(self):
+        price_feed.unsubscribe(self.on_price)
+        self._on_breach = None
+
+    def reset(self, balances, prices, total_value, start_balance, peak=None):
+        """
+        Re-sync from a full valuation
+
+        Args:
+            balances (dict): Token address -> USD value
+            prices (dict): Token address -> price the values were computed with
+            total_value (float): Portfolio value, including anything not priced per token
+            start_balance (float): Balance PnL is measured against
+            peak (float): Highest checkpointed value over the lookback, for the drawdown limit
+        """
+        quantities = {}
+        used_prices = {}
+        for token, value in balances.items():
+            price = prices.get(token)
+            if value and price:
+                quantities[token] = value / price
+                used_prices[token] = price
+        with self._lock:
+            self._quantities = quantities
+            self._prices = used_prices
+            self.total_value = float(total_value)
+            self.start_balance = float(start_balance)
+            self.peak = float(peak) if peak else None
+        debug(f"Risk engine tracking {len(quantities)} positions at ${total_value:.2f}", file_only=True)
+
+    def on_price(self, address, price):
+        """Price feed callback: O(1) re-valuation and limit check"""
+        with self._lock:
+            quantity = self._quantities.get(address)
+            if quantity is None:
+                return
+            self.total_value += (price - self._prices[address]) * quantity
+            self._prices[address] = price
+            self.ticks += 1
+            breach = evaluate_limits(self.total_value, self.start_balance, self.peak)
+            if breach is None:
+                self._tripped = False
+                return
+            if self._tripped or self._on_breach is None:
+                return
+            self._tripped = True
+            on_breach = self._on_breach
+        info(f"Risk engine: {breach[0]} breached on a {address[:8]} price update")
+        threading.Thread(target=self._fire, args=(on_breach, breach), name='risk-breach', daemon=True).start()
+
+    def _fire(self, on_breach, breach):
+        try:
+            on_breach(*breach)
+        except Exception as e:
+            error(f"Error handling streaming risk breach: {str(e)}")
+
+# Create a singleton instance
+risk_engine = StreamingRiskEngine()
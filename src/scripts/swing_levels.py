@@ -0,0 +1,65 @@
+"""
+Anarcho Capital's Swing Levels
+Finds the swing high/low of a lookback window with argmax/argmin over NumPy
+arrays and derives the Fibonacci retracement levels of both trend directions
+in one pass, as compact ratio/price arrays
+Built with love by Anarcho Capital
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+class FibonacciLevels(NamedTuple):
+    """Retracement prices for both trend directions, aligned with ratios (0.0 and 1.0 included)"""
+    ratios: np.ndarray
+    uptrend: np.ndarray  # From the swing high down to the lowest low after it
+    downtrend: np.ndarray  # From the swing low up to the highest high after it
+
+    def levels(self, is_uptrend=True):
+        """{ratio: price} for one direction, the form the entry-price logic works with"""
+        prices = self.uptrend if is_uptrend else self.downtrend
+        return dict(zip(self.ratios.tolist(), prices.tolist()))
+
+
+def swing_range(high, low, lookback):
+    """
+    Swing anchors of the last `lookback` candles
+
+    Returns:
+        tuple: (swing_high, low_after_high, swing_low, high_after_low); the
+            "after" extremes include the swing candle itself
+    """
+    high = np.asarray(high, dtype=np.float64)[-lookback:]
+    low = np.asarray(low, dtype=np.float64)[-lookback:]
+    high_idx = int(np.argmax(high))
+    low_idx = int(np.argmin(low))
+    # Extremes from each position to the end, so "after the swing" is one lookup
+    low_from = np.minimum.accumulate(low[::-1])[::-1]
+    high_from = np.maximum.accumulate(high[::-1])[::-1]
+    return high[high_idx], low_from[high_idx], low[low_idx], high_from[low_idx]
+
+
+def fibonacci_levels(high, low, lookback, ratios):
+    """
+    Fibonacci retracements of the last `lookback` candles (at most len - 1)
+
+    Args:
+        high, low (array-like): Candle highs and lows in time order
+        ratios (list): Retracement ratios, e.g. config.FIBONACCI_LEVELS
+
+    Returns:
+        FibonacciLevels or None: None with fewer than two candles
+    """
+    lookback = min(lookback, len(high) - 1)
+    if lookback < 1:
+        return None
+    swing_high, low_after_high, swing_low, high_after_low = swing_range(high, low, lookback)
+    ratios = np.r_[0.0, np.asarray(ratios, dtype=np.float64), 1.0]
+    uptrend = swing_high - (swing_high - low_after_high) * ratios
+    downtrend = swing_low + (high_after_low - swing_low) * ratios
+    # Pin the extremes exactly rather than through the multiplication
+    uptrend[[0, -1]] = swing_high, low_after_high
+    downtrend[[0, -1]] = swing_low, high_after_low
+    return FibonacciLevels(ratios, uptrend, downtrend)
@@ -3,13 +3,18 @@ import json
 import requests
 from typing import List, Dict
 import time
+import threading
 from datetime import datetime, timedelta
 from src import nice_funcs as n
 from concurrent.futures import ThreadPoolExecutor  # For parallel processing
 import pandas as pd  # For data manipulation
 from src.config import MONITORED_TOKENS, DYNAMIC_MODE, previous_monitored_tokens, previous_mode, FILTER_MODE, PERCENTAGE_THRESHOLD, AMOUNT_THRESHOLD, ENABLE_PERCENTAGE_FILTER, ENABLE_AMOUNT_FILTER, ENABLE_ACTIVITY_FILTER, ACTIVITY_WINDOW_HOURS, WALLETS_TO_TRACK, API_SLEEP_SECONDS, API_TIMEOUT_SECONDS, API_MAX_RETRIES
+from src import config
 from src.scripts.logger import logger, debug, info, warning, error, critical, system, log_print  # Import logging utilities
 
+# Watermark file updates are read-modify-write; trackers in every thread share this lock
+_watermark_lock = threading.Lock()
+
 
 class TokenAccountTracker:
     def __init__(self):
@@ -32,6 +37,10 @@ class TokenAccountTracker:
         )
         debug(f"Cache file: {self.cache_file}", file_only=True)
 
+        # Incremental wallet activity: per-wallet watermarks plus an append-only log
+        self.activity_watermark_file = os.path.join(os.getcwd(), "src/data/wallet_activity_watermarks.json")
+        self.activity_log_file = os.path.join(os.getcwd(), "src/data/wallet_activity_log.jsonl")
+
     def check_birdeye_api_available(self):
         """Simple check if BirdEye API is available"""
         birdeye_api_key = os.getenv("BIRDEYE_API_KEY")
@@ -302,18 +311,160 @@ class TokenAccountTracker:
             error(f"Unexpected error: {str(e)}")
             return []
 
+    def load_activity_watermarks(self):
+        """Load the per-wallet activity watermarks (last seen timestamp and signatures)"""
+        if os.path.exists(self.activity_watermark_file):
+            try:
+                with open(self.activity_watermark_file, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                error(f"Error loading activity watermarks: {str(e)}")
+        return {}
+
+    def save_activity_watermarks(self, watermarks):
+        """Persist the per-wallet activity watermarks (tmp file + rename, so readers never see a partial file)"""
+        try:
+            os.makedirs(os.path.dirname(self.activity_watermark_file), exist_ok=True)
+            tmp_file = f"{self.activity_watermark_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(watermarks, f, indent=2)
+            os.replace(tmp_file, self.activity_watermark_file)
+        except Exception as e:
+            error(f"Error saving activity watermarks: {str(e)}")
+
+    def update_activity_watermark(self, key, watermark):
+        """Replace one wallet's watermark, keeping entries other threads wrote since we loaded"""
+        with _watermark_lock:
+            watermarks = self.load_activity_watermarks()
+            watermarks[key] = watermark
+            self.save_activity_watermarks(watermarks)
+
+    def append_activity_log(self, wallet_address, transactions):
+        """Append newly seen transactions to the local activity log (one JSON object per line)"""
+        if not transactions:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.activity_log_file), exist_ok=True)
+            with open(self.activity_log_file, "a") as f:
+                for tx in transactions:
+                    f.write(json.dumps({"wallet_address": wallet_address, **tx}) + "\n")
+        except Exception as e:
+            error(f"Error appending to activity log: {str(e)}")
+
+    @staticmethod
+    def _tx_signature(tx):
+        return tx.get("txHash") or tx.get("signature") or tx.get("tx_hash")
+
+    @staticmethod
+    def _tx_timestamp(tx):
+        try:
+            return int(tx.get("blockUnixTime") or tx.get("timestamp") or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def _fetch_activity_since(self, url, headers, wallet_address, mint, time_from, time_to):
+        """
+        Page through the transactions between time_from and time_to, newest first
+
+        Returns:
+            tuple or None: (transactions, truncated); truncated is True when
+                WALLET_ACTIVITY_MAX_PAGES ran out before the oldest transaction.
+                None on request failure
+        """
+        page_size = 100
+        max_pages = getattr(config, 'WALLET_ACTIVITY_MAX_PAGES', 10)
+        transactions = []
+
+        for page in range(max_pages):
+            params = {
+                "time_from": time_from,
+                "time_to": time_to,
+                "limit": page_size,
+                "offset": page * page_size
+            }
+            if mint:
+                params["mint"] = mint
+
+            try:
+                response = requests.get(url, headers=headers, params=params, timeout=API_TIMEOUT_SECONDS)
+                if response.status_code != 200:
+                    debug(f"Failed to fetch wallet activity: HTTP {response.status_code}", file_only=True)
+                    return None
+                items = response.json().get("data", {}).get("items", [])
+            except Exception as e:
+                debug(f"Error fetching wallet activity: {str(e)}", file_only=True)
+                return None
+
+            transactions.extend(items)
+            if len(items) < page_size:
+                return transactions, False
+        return transactions, True
+
+    def _fetch_window(self, url, headers, wallet_address, mint, window):
+        """
+        Fetch the not yet seen transactions of one window
+
+        A window spans time_from..time_to; transactions at either boundary second
+        whose signatures are listed in from_signatures/to_signatures were already
+        seen. If the page cap cuts the fetch short, the older part that was not
+        reached is returned as a remainder window for a later poll.
+
+        Returns:
+            tuple or None: (transactions, remainder window or None); None on request failure
+        """
+        result = self._fetch_activity_since(url, headers, wallet_address, mint, window["time_from"], window["time_to"])
+        if result is None:
+            return None
+        transactions, truncated = result
+        from_seen = set(window.get("from_signatures", []))
+        to_seen = set(window.get("to_signatures", []))
+
+        def unseen(tx):
+            timestamp = self._tx_timestamp(tx)
+            signature = self._tx_signature(tx)
+            if timestamp == window["time_from"] and signature in from_seen:
+                return False
+            if timestamp == window["time_to"] and signature in to_seen:
+                return False
+            return window["time_from"] <= timestamp <= window["time_to"]
+
+        transactions = [tx for tx in transactions if unseen(tx)]
+        if not truncated or not transactions:
+            return transactions, None
+
+        # Pages run newest first, so everything after the oldest fetched second is complete
+        oldest = min(self._tx_timestamp(tx) for tx in transactions)
+        oldest_signatures = {self._tx_signature(tx) for tx in transactions if self._tx_timestamp(tx) == oldest}
+        if oldest == window["time_to"]:
+            oldest_signatures |= to_seen
+        remainder = {
+            "time_from": window["time_from"],
+            "from_signatures": sorted(from_seen),
+            "time_to": oldest,
+            "to_signatures": sorted(sig for sig in oldest_signatures if sig),
+        }
+        warning(f"Activity for {wallet_address[:4]} exceeded the page cap; "
+                f"transactions before {datetime.fromtimestamp(oldest).isoformat()} will be fetched next poll")
+        return transactions, remainder
+
     def get_wallet_activity(self, wallet_address, mint=None, dynamic_threshold=True, max_lookback_minutes=60):
         """
         Fetch and analyze the wallet's transaction history to detect buys and sells.
         
+        After the first call for a wallet, only transactions newer than the persisted
+        watermark (last seen timestamp and signatures) are fetched, and each new
+        transaction is appended to the local activity log. When WALLET_ACTIVITY_MAX_PAGES
+        cuts a fetch short, the older range that was not reached is kept in the
+        watermark's backlog and fetched on later polls.
+        
         Parameters:
             wallet_address (str): The wallet address to analyze.
             mint (str, optional): Specific token mint address to filter activity. Default is None (all tokens).
             dynamic_threshold (bool): If True, use a dynamic threshold based on recent activity. Default is True.
-            max_lookback_minutes (int): Maximum lookback time in minutes for dynamic threshold. Default is 60 minutes.
+            max_lookback_minutes (int): Maximum lookback time in minutes for the first fetch of a wallet. Default is 60 minutes.
         
         Returns:
-            dict: A dictionary containing buy/sell activity for the wallet.
+            dict: A dictionary containing buy/sell activity seen since the previous call.
         """
         debug(f"Fetching transaction history for wallet {wallet_address[:4]}...", file_only=True)
         # We need to make sure BASE_URL and BIRDEYE_API_KEY are properly defined
@@ -328,55 +479,86 @@ class TokenAccountTracker:
         headers = {"X-API-KEY": BIRDEYE_API_KEY}
         current_time = int(datetime.now().timestamp())
         
-        # Calculate dynamic lookback time based on recent activity
-        if dynamic_threshold:
-            # Start with a small lookback window (e.g., 5 minutes)
-            lookback_minutes = 5
-            while lookback_minutes <= max_lookback_minutes:
-                lookback_time = int((datetime.now() - timedelta(minutes=lookback_minutes)).timestamp())
-                params = {
-                    "time_from": lookback_time,
-                    "time_to": current_time,
-                    "limit": 100  # Limit to the most recent 100 transactions
-                }
-                if mint:
-                    params["mint"] = mint
-
-                try:
-                    response = requests.get(url, headers=headers, params=params, timeout=API_TIMEOUT_SECONDS)
-                    if response.status_code == 200:
-                        transactions = response.json().get("data", {}).get("items", [])
-                        if transactions:  # Stop if we find transactions
-                            break
-                    else:
-                        debug(f"Failed to fetch wallet activity: HTTP {response.status_code}", file_only=True)
-                        return {}
-                except Exception as e:
-                    debug(f"Error fetching wallet activity: {str(e)}", file_only=True)
-                    return {}
-
-                # Increase lookback time incrementally (e.g., 5, 10, 15, ..., up to max_lookback_minutes)
-                lookback_minutes += 5
-        else:
-            # Use a fixed lookback window (e.g., 1 hour)
-            lookback_time = int((datetime.now() - timedelta(hours=1)).timestamp())
-            params = {
-                "time_from": lookback_time,
+        watermark_key = f"{wallet_address}:{mint}" if mint else wallet_address
+        watermark = self.load_activity_watermarks().get(watermark_key)
+        backlog = []  # Older windows the page cap kept us from reaching
+        
+        if watermark:
+            # Incremental fetch: what happened since the last seen transaction, then ranges left over from capped polls
+            last_timestamp = watermark.get("last_timestamp", 0)
+            result = self._fetch_window(url, headers, wallet_address, mint, {
+                "time_from": last_timestamp,
+                "from_signatures": watermark.get("last_signatures", []),
                 "time_to": current_time,
-                "limit": 100
-            }
-            if mint:
-                params["mint"] = mint
+            })
+            if result is None:
+                return {}
+            transactions, remainder = result
+            if remainder:
+                backlog.append(remainder)
+            for window in watermark.get("backlog", []):
+                result = self._fetch_window(url, headers, wallet_address, mint, window)
+                if result is None:
+                    backlog.append(window)  # Retry next poll
+                    continue
+                window_transactions, remainder = result
+                transactions.extend(window_transactions)
+                if remainder:
+                    backlog.append(remainder)
+            window_description = f"since {datetime.fromtimestamp(last_timestamp).isoformat()}"
+        else:
+            # First fetch for this wallet: seed from a lookback window
+            remainder = None
+            if dynamic_threshold:
+                # Start with a small lookback window (e.g., 5 minutes)
+                lookback_minutes = 5
+                transactions = []
+                while lookback_minutes <= max_lookback_minutes:
+                    lookback_time = int((datetime.now() - timedelta(minutes=lookback_minutes)).timestamp())
+                    result = self._fetch_window(url, headers, wallet_address, mint,
+                                                {"time_from": lookback_time, "time_to": current_time})
+                    if result is None:
+                        return {}
+                    transactions, remainder = result
+                    if transactions:  # Stop if we find transactions
+                        break
 
-            try:
-                response = requests.get(url, headers=headers, params=params, timeout=API_TIMEOUT_SECONDS)
-                if response.status_code != 200:
-                    debug(f"Failed to fetch wallet activity: HTTP {response.status_code}", file_only=True)
+                    # Increase lookback time incrementally (e.g., 5, 10, 15, ..., up to max_lookback_minutes)
+                    lookback_minutes += 5
+            else:
+                # Use a fixed lookback window (e.g., 1 hour)
+                lookback_minutes = 60
+                lookback_time = int((datetime.now() - timedelta(hours=1)).timestamp())
+                result = self._fetch_window(url, headers, wallet_address, mint,
+                                            {"time_from": lookback_time, "time_to": current_time})
+                if result is None:
                     return {}
-                transactions = response.json().get("data", {}).get("items", [])
-            except Exception as e:
-                debug(f"Error fetching wallet activity: {str(e)}", file_only=True)
-                return {}
+                transactions, remainder = result
+            if remainder:
+                backlog.append(remainder)
+            window_description = f"in the last {lookback_minutes} minutes"
+
+        # Oldest first so the log stays in chronological order
+        transactions.sort(key=self._tx_timestamp)
+        self.append_activity_log(wallet_address, transactions)
+
+        # Advance the watermark to the newest transaction seen; ranges the page cap
+        # cut off stay in the backlog until a later poll fetches them
+        new_watermark = dict(watermark or {"last_timestamp": current_time, "last_signatures": []})
+        if transactions:
+            newest_timestamp = self._tx_timestamp(transactions[-1])
+            newest_signatures = [
+                self._tx_signature(tx) for tx in transactions
+                if self._tx_timestamp(tx) == newest_timestamp and self._tx_signature(tx)
+            ]
+            if watermark and newest_timestamp == watermark.get("last_timestamp"):
+                newest_signatures = list(set(watermark.get("last_signatures", [])) | set(newest_signatures))
+            if not watermark or newest_timestamp >= watermark.get("last_timestamp", 0):
+                new_watermark["last_timestamp"] = newest_timestamp
+                new_watermark["last_signatures"] = newest_signatures
+        new_watermark["backlog"] = backlog
+        new_watermark["updated"] = datetime.now().isoformat()
+        self.update_activity_watermark(watermark_key, new_watermark)
 
         # Parse transactions
         activity = {"buys": [], "sells": []}
@@ -399,7 +581,7 @@ class TokenAccountTracker:
                     "timestamp": timestamp
                 })
 
-        debug(f"Detected {len(activity['buys'])} buys and {len(activity['sells'])} sells in the last {lookback_minutes} minutes.", file_only=True)
+        debug(f"Detected {len(activity['buys'])} buys and {len(activity['sells'])} sells {window_description}.", file_only=True)
         return activity
 
     def get_token_data(self, mint: str) -> Dict:
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import threading
+import time
+
+from src import config
+from src.scripts.balance_store import BalanceStore
+from src.scripts.risk_engine import StreamingRiskEngine, drawdown_breach, evaluate_limits
+
+
+def _store():
+    return BalanceStore(os.path.join(tempfile.mkdtemp(), 'balances.db'), legacy_csv=None)
+
+
+def _with_drawdown_limit(percent, check):
+    previous = getattr(config, 'MAX_DRAWDOWN_PERCENT', 0)
+    config.MAX_DRAWDOWN_PERCENT = percent
+    try:
+        check()
+    finally:
+        config.MAX_DRAWDOWN_PERCENT = previous
+
+
+def test_drawdown_disabled_by_default():
+    """The shipped config never turns a drawdown into a breach"""
+    assert config.MAX_DRAWDOWN_PERCENT == 0
+    assert drawdown_breach(500.0, 1000.0) is None
+    assert evaluate_limits(500.0, 480.0, peak=1000.0) is None
+
+
+def test_drawdown_breach_when_enabled():
+    def check():
+        assert drawdown_breach(850.0, 1000.0) is None
+        breach_type, drawdown_pct = evaluate_limits(750.0, 740.0, peak=1000.0)
+        assert breach_type == 'DRAWDOWN' and round(drawdown_pct) == -25
+        # No checkpointed peak yet: nothing to measure a drawdown against
+        assert evaluate_limits(750.0, 740.0, peak=None) is None
+    _with_drawdown_limit(20, check)
+
+
+def test_lookback_peak_ignores_non_checkpoint_valuations():
+    """A single inflated snapshot must not become the drawdown peak"""
+    store = _store()
+    now = time.time()
+    store.append(1000.0, timestamp=now - 3 * 3600, checkpoint=True)
+    store.append(5000.0, timestamp=now - 2 * 3600)  # e.g. a bad fallback price
+    store.append(990.0, timestamp=now - 3600)
+    baseline, peak = store.lookback(29, now=now)
+    assert baseline == 1000.0
+    assert peak == 1000.0
+
+
+def test_lookback_window_and_empty_store():
+    store = _store()
+    assert store.lookback(29) == (None, None)
+    now = time.time()
+    store.append(2000.0, timestamp=now - 40 * 3600, checkpoint=True)  # outside the window
+    store.append(1200.0, timestamp=now - 10 * 3600)
+    assert store.lookback(29, now=now) == (1200.0, None)
+
+
+def test_mark_checkpoint_counts_once():
+    """Marking a recorded snapshot as the daily log adds no second sample"""
+    store = _store()
+    row_id = store.append(1500.0)
+    store.mark_checkpoint(row_id)
+    assert len(store.history()) == 1
+    assert store.rollup('1m')['samples'].tolist() == [1]
+    assert store.lookback(1)[1] == 1500.0
+
+
+def test_streaming_engine_peak_comes_from_reset_only():
+    def check():
+        engine = StreamingRiskEngine()
+        fired = threading.Event()
+        breaches = []
+        engine._on_breach = lambda breach_type, value: (breaches.append(breach_type), fired.set())
+        engine.reset({'TOKEN': 1000.0}, {'TOKEN': 1.0}, 1000.0, 1000.0, peak=1000.0)
+        # A spike on a tick does not raise the peak...
+        engine.on_price('TOKEN', 3.0)
+        assert engine.peak == 1000.0
+        assert not fired.is_set()
+        # ...so the drop back only breaches against the checkpointed peak
+        engine.on_price('TOKEN', 0.78)
+        assert fired.wait(2)
+        assert breaches == ['DRAWDOWN']
+    _with_drawdown_limit(20, check)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"{name}: SUCCESS")